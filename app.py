@@ -1,7 +1,11 @@
-from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for
-from datetime import datetime, timedelta
+from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for, g, has_request_context
+from datetime import datetime, timedelta, date
+from decimal import Decimal
 import json
+import math
 import os
+import re
+import sqlite3
 import hashlib
 import mysql.connector
 from mysql.connector import Error
@@ -9,13 +13,20 @@ from openpyxl import load_workbook, Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
 import io
+import base64
 import secrets
 import logging
 from logging.handlers import RotatingFileHandler
 import sys
 import time
-from functools import wraps
-from mysql.connector import pooling
+import queue
+import threading
+import itertools
+import click
+import atexit
+from collections import OrderedDict, namedtuple
+from functools import wraps, partial, lru_cache
+from mysql.connector.errors import PoolError
 
 
 # 如果使用dateutil，需要安装：pip install python-dateutil
@@ -48,7 +59,7 @@ logger = logging.getLogger(__name__)
 
 # 尝试导入拼音库
 try:
-    from pypinyin import pinyin, Style
+    from pypinyin import pinyin, lazy_pinyin, Style
     HAS_PINYIN = True
     logger.info("pypinyin库加载成功")
 except ImportError:
@@ -65,6 +76,41 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# 存储后端：mysql（默认）或 sqlite（单机家庭部署，WAL模式，无需数据库服务器）
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mysql').lower()
+SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join('data', 'web_gift_management_system.db'))
+
+# 应用创建时初始化数据库并执行尚未执行的结构迁移（python app.py、flask run 和 WSGI 服务器都会执行）；
+# 设为 0 时不自动执行，需在部署或升级时先运行 flask init-db
+DB_INIT_ON_STARTUP = os.environ.get('DB_INIT_ON_STARTUP', '1') != '0'
+
+# 数据库连接池配置（可通过环境变量覆盖）
+DB_POOL_CONFIG = {
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),                       # 最大并发连接数
+    'checkout_timeout': float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', 5)),   # 借出连接最长等待秒数
+    'validate_on_checkout': True,                                               # 借出时校验连接是否可用
+    'statement_cache_size': int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 16))  # 每个连接缓存的预编译语句数
+}
+
+# 各类接口的查询时间预算（秒）：连接借出时按需设置一次 MAX_EXECUTION_TIME，而不是每条语句前都设置
+QUERY_BUDGETS = {
+    'interactive': 5,   # 列表、增删改等交互接口（默认）
+    'statistics': 15,   # 统计、图表接口
+    'export': 60        # Excel导出接口
+}
+
+# MySQL 查询超时错误码（5.7.8+ 为 3024，早期版本为 1907）
+QUERY_TIMEOUT_ERRNOS = (3024, 1907)
+
+# 只读副本配置：DB_READ_REPLICAS 为JSON数组，每项覆盖 DB_CONFIG 中的连接参数
+# 例如 [{"host": "127.0.0.1", "port": 3307}]，未配置时所有查询都走主库
+DB_READ_REPLICAS = json.loads(os.environ.get('DB_READ_REPLICAS') or '[]')
+
+DB_REPLICA_CONFIG = {
+    'sticky_seconds': float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5)),   # 写入后该会话读主库的秒数
+    'retry_after': float(os.environ.get('DB_REPLICA_RETRY_AFTER', 30))          # 副本不可用后暂停使用的秒数
+}
+
 # 操作类型常量
 OPERATION_TYPES = {
     "ADD": "添加记录",
@@ -78,6 +124,27 @@ OPERATION_TYPES = {
     "SYSTEM": "系统操作"
 }
 
+# 操作日志异步写入配置：队列上限、每批最多条数、最长等待秒数
+AUDIT_LOG_CONFIG = {
+    'queue_size': 10000,
+    'batch_size': 200,
+    'flush_interval': 1.0
+}
+
+# 操作日志保留策略：由后台定时任务和 flask purge-logs 命令按批清理，不再在每次写日志时清理
+LOG_RETENTION_CONFIG = {
+    'retention_days': int(os.environ.get('LOG_RETENTION_DAYS', 7)),            # 日志保留天数
+    'batch_size': int(os.environ.get('LOG_RETENTION_BATCH_SIZE', 1000)),       # 每批删除条数
+    'interval_seconds': int(os.environ.get('LOG_RETENTION_INTERVAL', 3600)),   # 定时清理间隔，0 表示不启动定时任务
+    'partitions_ahead': 3                                                        # 按天分区时预建的未来分区天数
+}
+
+# 批量添加记账记录的单次上限
+BULK_ACCOUNT_MAX_ITEMS = 500
+
+# 列表接口每页条数上限（导出日志时前端一次取 10000 条）
+MAX_PER_PAGE = 10000
+
 app = Flask(__name__)
 app.secret_key = 'gift-management-system-secret-key-2024'
 app.permanent_session_lifetime = timedelta(minutes=30)  # 会话30分钟过期
@@ -120,15 +187,974 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def create_connection():
-    """创建数据库连接"""
+# ===================== 存储后端 =====================
+class MySQLBackend:
+    """MySQL 存储后端（默认）"""
+
+    name = 'mysql'
+
+    def connect_factory(self, config):
+        # 池内连接关闭自动提交，由请求级事务统一提交；自动消费未读结果，便于同一请求内的辅助函数共用连接
+        return partial(mysql.connector.connect, **dict(config, autocommit=False, consume_results=True))
+
+    def set_execution_limit(self, raw, limit_ms):
+        cursor = raw.cursor()
+        try:
+            cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (limit_ms,))
+        finally:
+            cursor.close()
+
+    # 按 created_at 索引顺序删除一批过期日志
+    purge_logs_sql = """
+        DELETE FROM system_logs
+        WHERE created_at < %s
+        ORDER BY created_at
+        LIMIT %s
+    """
+
+    def table_exists(self, cursor, table):
+        cursor.execute("SHOW TABLES LIKE %s", (table,))
+        return len(cursor.fetchall()) > 0
+
+    def describe_table(self, cursor, table):
+        cursor.execute(f"DESCRIBE {table}")
+        return cursor.fetchall()
+
+    def add_column(self, cursor, table, column, definition):
+        """添加字段，已存在时忽略"""
+        try:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        except Error as e:
+            if e.errno != 1060:  # Duplicate column name
+                raise
+
+    def has_index(self, cursor, table, index):
+        cursor.execute("""
+            SELECT COUNT(*) AS index_count FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, index))
+        # 调用方可能传入字典游标
+        row = cursor.fetchone()
+        return (row['index_count'] if isinstance(row, dict) else row[0]) > 0
+
+    def create_index(self, cursor, table, index, columns, unique=False):
+        """创建索引，已存在时忽略"""
+        try:
+            cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {index} ON {table}({columns})")
+        except Error as e:
+            if e.errno != 1061:  # Duplicate key name
+                raise
+
+    def drop_index(self, cursor, table, index):
+        """删除索引，不存在时忽略"""
+        try:
+            cursor.execute(f"DROP INDEX {index} ON {table}")
+        except Error as e:
+            if e.errno != 1091:  # Can't DROP; check that it exists
+                raise
+
+    def explain(self, cursor, sql, params=()):
+        """EXPLAIN 查询，标记全表扫描（type=ALL）和额外排序（Using filesort）"""
+        cursor.execute(f"EXPLAIN {sql}", params)
+        plan = [dict(row) for row in cursor.fetchall()]
+        return {
+            'plan': [f"{row['table']}: type={row['type']}, key={row['key']}, rows={row['rows']}, {row['Extra'] or ''}"
+                     for row in plan],
+            'full_scan': any(row['type'] == 'ALL' for row in plan),
+            'filesort': any('Using filesort' in (row['Extra'] or '') for row in plan),
+            'temporary': any('Using temporary' in (row['Extra'] or '') for row in plan)
+        }
+
+    # 生成列存储在表中，可以建索引
+    generated_column_storage = 'STORED'
+
+    # ngram 分词默认按2个字切分，关键词至少2个字才能走全文索引
+    log_fulltext_min_length = 2
+
+    def log_keyword_condition(self, cursor, keyword):
+        """操作日志关键词检索条件：有全文索引时用 MATCH ... AGAINST，否则返回 None 由调用方退回 LIKE"""
+        if len(keyword) < self.log_fulltext_min_length or not _cached_flag(
+                'log_fulltext', lambda: self.has_index(cursor, 'system_logs', 'ft_system_logs_text')):
+            return None
+        # 整个关键词作为短语匹配，与 LIKE '%关键词%' 的子串语义一致
+        phrase = '"' + keyword.replace('"', ' ') + '"'
+        return "MATCH(operation_details, user_name) AGAINST (%s IN BOOLEAN MODE)", [phrase]
+
+
+def _sqlite_year(value):
+    return int(str(value)[:4]) if value else None
+
+def _sqlite_month(value):
+    return int(str(value)[5:7]) if value else None
+
+def _sqlite_quarter(value):
+    return (int(str(value)[5:7]) - 1) // 3 + 1 if value else None
+
+def _sqlite_lpad(value, length, pad):
+    if value is None or length is None or pad is None:
+        return None
+    text = str(value)
+    if len(text) >= length:
+        return text[:length]
+    return (pad * length)[:length - len(text)] + text
+
+def _sqlite_concat(*values):
+    # 与 MySQL 一致：任一参数为 NULL 时结果为 NULL
+    if any(v is None for v in values):
+        return None
+    return ''.join(str(v) for v in values)
+
+_MYSQL_DATE_FORMAT_CODES = {'Y': '%Y', 'y': '%y', 'm': '%m', 'd': '%d', 'H': '%H', 'i': '%M', 's': '%S', '%': '%%'}
+
+def _sqlite_date_format(value, fmt):
+    if value is None or fmt is None:
+        return None
+    text = str(value)
+    try:
+        parsed = datetime.strptime(text[:19], '%Y-%m-%d %H:%M:%S' if len(text) > 10 else '%Y-%m-%d')
+    except ValueError:
+        return None
+    py_fmt = re.sub(r'%(.)', lambda m: _MYSQL_DATE_FORMAT_CODES.get(m.group(1), m.group(1)), fmt)
+    return parsed.strftime(py_fmt)
+
+def _sqlite_now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _sqlite_curdate():
+    return datetime.now().strftime('%Y-%m-%d')
+
+def _sqlite_convert_date(value):
+    text = value.decode()
+    try:
+        return datetime.strptime(text[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return text
+
+def _sqlite_convert_timestamp(value):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+def _sqlite_convert_decimal(value):
+    return Decimal(value.decode()).quantize(Decimal('0.01'))
+
+# 与 mysql.connector 返回类型保持一致：DATE -> date，TIMESTAMP -> datetime，DECIMAL -> Decimal
+sqlite3.register_converter('DATE', _sqlite_convert_date)
+sqlite3.register_converter('TIMESTAMP', _sqlite_convert_timestamp)
+sqlite3.register_converter('DECIMAL', _sqlite_convert_decimal)
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, lambda v: v.strftime('%Y-%m-%d'))
+sqlite3.register_adapter(datetime, lambda v: v.strftime('%Y-%m-%d %H:%M:%S'))
+
+# MySQL 方言到 SQLite 的改写（需要 SQLite 3.35+ 支持省略冲突目标的 UPSERT）
+_SQLITE_SQL_REWRITES = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.IGNORECASE), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'\bVALUES\((\w+)\)', re.IGNORECASE), r'excluded.\1'),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE), 'INSERT OR IGNORE')
+]
+
+# 表达式中的 CURRENT_TIMESTAMP 改为本地时间的 NOW()；建表语句的 DEFAULT CURRENT_TIMESTAMP 保持不变
+_SQLITE_EXPRESSION_REWRITES = [
+    (re.compile(r'\bCURRENT_TIMESTAMP\b', re.IGNORECASE), 'NOW()')
+]
+
+# 字符串字面量和带引号的标识符，改写时原样保留
+_SQL_QUOTED = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.)*"|`[^`]*`)""")
+
+_SQL_DDL = re.compile(r'\s*(CREATE|ALTER|DROP)\b', re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def translate_sql_for_sqlite(operation):
+    """将 MySQL 风格的SQL改写为 SQLite 可执行的SQL（结果缓存）
+
+    只改写引号之外的部分，字符串中的 %s 等内容不受影响。
+    """
+    rewrites = list(_SQLITE_SQL_REWRITES)
+    if not _SQL_DDL.match(operation):
+        rewrites += _SQLITE_EXPRESSION_REWRITES
+    parts = _SQL_QUOTED.split(operation)
+    # split 带捕获组：偶数下标为引号外的 SQL，奇数下标为引号内的字面量
+    for i in range(0, len(parts), 2):
+        for pattern, replacement in rewrites:
+            parts[i] = pattern.sub(replacement, parts[i])
+    return ''.join(parts)
+
+def _sqlite_error(e):
+    """将 sqlite3 异常转换为 mysql.connector 的 Error，调用方的异常处理保持不变"""
+    message = str(e)
+    errno = None
+    if 'interrupted' in message:
+        errno = QUERY_TIMEOUT_ERRNOS[0]
+    elif isinstance(e, sqlite3.IntegrityError) and 'UNIQUE' in message:
+        errno = 1062
+        message = f"Duplicate entry: {message}"
+    elif 'no such column' in message:
+        errno = 1054
+        message = f"Unknown column: {message}"
+    elif 'no such table' in message:
+        errno = 1146
+    return Error(msg=message, errno=errno)
+
+
+class SQLiteCursor:
+    """sqlite3 游标适配：%s 占位符、字典结果、mysql.connector 异常类型"""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._conn.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, operation, params=None):
+        sql = translate_sql_for_sqlite(operation)
+        self._connection._start_statement(sql)
+        try:
+            self._cursor.execute(sql, tuple(params) if params else ())
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+
+    def executemany(self, operation, seq_params):
+        sql = translate_sql_for_sqlite(operation)
+        self._connection._start_statement(sql)
+        try:
+            self._cursor.executemany(sql, [tuple(p) for p in seq_params])
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+
+    def _to_row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        try:
+            return self._to_row(self._cursor.fetchone())
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+
+    def fetchmany(self, size=1):
+        try:
+            return [self._to_row(row) for row in self._cursor.fetchmany(size)]
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+
+    def fetchall(self):
+        try:
+            return [self._to_row(row) for row in self._cursor.fetchall()]
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """sqlite3 连接适配：提供应用用到的 mysql.connector 连接接口"""
+
+    unread_result = False
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(
+            path,
+            timeout=10,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,   # 连接池保证同一时间只有一个线程使用
+            cached_statements=256      # 语句缓存，作用等同于 MySQL 的预编译语句
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        for name, nargs, func, deterministic in (
+            ('YEAR', 1, _sqlite_year, True),
+            ('MONTH', 1, _sqlite_month, True),
+            ('QUARTER', 1, _sqlite_quarter, True),
+            ('LPAD', 3, _sqlite_lpad, True),
+            ('CONCAT', -1, _sqlite_concat, True),
+            ('DATE_FORMAT', 2, _sqlite_date_format, True),
+            ('NOW', 0, _sqlite_now, False),
+            ('CURDATE', 0, _sqlite_curdate, False)
+        ):
+            self._conn.create_function(name, nargs, func, deterministic=deterministic)
+        self.execution_limit_ms = None
+        self._deadline = None
+        # 查询时间预算：超过截止时间的 SELECT 被中断，报错与 MySQL 查询超时一致
+        self._conn.set_progress_handler(self._past_deadline, 10000)
+        self._closed = False
+
+    def _past_deadline(self):
+        return 1 if self._deadline is not None and time.monotonic() > self._deadline else 0
+
+    def _start_statement(self, sql):
+        if self.execution_limit_ms and sql.split(None, 1)[0].upper() in ('SELECT', 'WITH'):
+            self._deadline = time.monotonic() + self.execution_limit_ms / 1000
+        else:
+            self._deadline = None
+
+    def cursor(self, dictionary=False, prepared=False, **kwargs):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def is_connected(self):
+        return not self._closed
+
+    def consume_results(self):
+        pass
+
+    def start_transaction(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._closed = True
+        self._conn.close()
+
+
+class SQLiteBackend:
+    """SQLite 存储后端：单机家庭部署使用，无需数据库服务器"""
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect_factory(self, config):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        return partial(SQLiteConnection, self.path)
+
+    def set_execution_limit(self, raw, limit_ms):
+        raw.execution_limit_ms = limit_ms
+
+    # SQLite 默认不支持 DELETE ... LIMIT，改为按主键删除子查询选出的一批
+    purge_logs_sql = """
+        DELETE FROM system_logs
+        WHERE id IN (
+            SELECT id FROM system_logs
+            WHERE created_at < %s
+            ORDER BY created_at
+            LIMIT %s
+        )
+    """
+
+    def table_exists(self, cursor, table):
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+        return len(cursor.fetchall()) > 0
+
+    def add_column(self, cursor, table, column, definition):
+        """添加字段，已存在时忽略"""
+        # table_xinfo 包含生成列，table_info 不包含
+        cursor.execute(f"PRAGMA table_xinfo({table})")
+        if any(row[1] == column for row in cursor.fetchall()):
+            return
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def has_index(self, cursor, table, index):
+        cursor.execute("SELECT COUNT(*) AS index_count FROM sqlite_master WHERE tbl_name = %s AND name = %s",
+                       (table, index))
+        # 调用方可能传入字典游标
+        row = cursor.fetchone()
+        return (row['index_count'] if isinstance(row, dict) else row[0]) > 0
+
+    def create_index(self, cursor, table, index, columns, unique=False):
+        """创建索引，已存在时忽略"""
+        cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index} ON {table}({columns})")
+
+    def drop_index(self, cursor, table, index):
+        """删除索引，不存在时忽略"""
+        # SQLite 的索引名在整个库内唯一，先确认属于该表
+        if self.has_index(cursor, table, index):
+            cursor.execute(f"DROP INDEX {index}")
+
+    def explain(self, cursor, sql, params=()):
+        """EXPLAIN QUERY PLAN，标记全表扫描（SCAN 表且未用索引）和额外排序（TEMP B-TREE FOR ORDER BY）"""
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = [row['detail'] for row in cursor.fetchall()]
+        return {
+            'plan': plan,
+            'full_scan': any(re.match(r'SCAN \w+$', detail) for detail in plan),
+            'filesort': any('FOR ORDER BY' in detail for detail in plan),
+            'temporary': any('FOR GROUP BY' in detail or 'FOR DISTINCT' in detail for detail in plan)
+        }
+
+    # SQLite 只允许通过 ALTER TABLE 添加 VIRTUAL 生成列，VIRTUAL 生成列同样可以建索引
+    generated_column_storage = 'VIRTUAL'
+
+    # trigram 分词至少需要3个字符
+    log_fulltext_min_length = 3
+
+    def log_keyword_condition(self, cursor, keyword):
+        """操作日志关键词检索条件：使用 FTS5 trigram 索引，关键词过短时返回 None 由调用方退回 LIKE"""
+        if len(keyword) < self.log_fulltext_min_length or not _cached_flag(
+                'log_fulltext', lambda: self.table_exists(cursor, 'system_logs_fts')):
+            return None
+        phrase = '"' + keyword.replace('"', ' ') + '"'
+        return "id IN (SELECT rowid FROM system_logs_fts WHERE system_logs_fts MATCH %s)", [phrase]
+
+    def describe_table(self, cursor, table):
+        cursor.execute(f"PRAGMA table_info({table})")
+        columns = []
+        for column in cursor.fetchall():
+            if isinstance(column, dict):
+                column = tuple(column.values())
+            _, field, column_type, not_null, default, primary_key = column
+            columns.append({
+                'Field': field,
+                'Type': column_type,
+                'Null': 'NO' if not_null or primary_key else 'YES',
+                'Key': 'PRI' if primary_key else '',
+                'Default': default,
+                'Extra': 'auto_increment' if primary_key else ''
+            })
+        return columns
+
+
+_flag_cache = {}
+
+def _cached_flag(name, check, ttl=300):
+    """缓存数据库结构检查结果（如索引是否存在），避免每次请求都查询元数据"""
+    cached = _flag_cache.get(name)
+    now = time.monotonic()
+    if cached and cached[1] > now:
+        return cached[0]
+    value = check()
+    _flag_cache[name] = (value, now + ttl)
+    return value
+
+def clear_cached_flags():
+    _flag_cache.clear()
+
+
+if STORAGE_BACKEND == 'sqlite':
+    storage = SQLiteBackend(SQLITE_PATH)
+else:
+    storage = MySQLBackend()
+
+# ===================== 数据库连接池 =====================
+class ConnectionPool:
+    """数据库连接池：限制并发连接数，借出时校验连接，并统计等待与占用情况"""
+
+    def __init__(self, connect_factory, pool_size=10, checkout_timeout=5.0,
+                 validate_on_checkout=True, statement_cache_size=16, name='primary'):
+        self.name = name
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.validate_on_checkout = validate_on_checkout
+        self.statement_cache_size = statement_cache_size
+        self._connect_factory = connect_factory
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        """重置空闲队列和计数（初始化或进程fork后调用）"""
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._statement_caches = {}
+        self._execution_limits = {}
+        self.stats = {
+            'checkouts': 0,
+            'checkout_waits': 0,
+            'checkout_wait_ms': 0.0,
+            'checkout_timeouts': 0,
+            'connections_created': 0,
+            'validation_failures': 0,
+            'statement_cache_hits': 0,
+            'statement_cache_misses': 0,
+            'statement_cache_evictions': 0,
+            'in_use': 0,
+            'peak_in_use': 0
+        }
+
+    def _check_pid(self):
+        # 多进程WSGI服务器fork后不能复用父进程的连接
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset_state()
+
+    def get_connection(self):
+        """借出一个连接，连接池耗尽时最多等待 checkout_timeout 秒"""
+        self._check_pid()
+        start = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats['checkout_waits'] += 1
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                with self._lock:
+                    self.stats['checkout_timeouts'] += 1
+                logger.warning(f"连接池[{self.name}]耗尽，等待 {self.checkout_timeout} 秒仍无可用连接")
+                raise PoolError(f"连接池[{self.name}]无可用连接")
+        waited_ms = (time.monotonic() - start) * 1000
+
+        try:
+            raw = self._take_idle() or self._new_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.stats['checkouts'] += 1
+            self.stats['checkout_wait_ms'] += waited_ms
+            self.stats['in_use'] += 1
+            self.stats['peak_in_use'] = max(self.stats['peak_in_use'], self.stats['in_use'])
+        return PooledConnection(self, raw)
+
+    def _take_idle(self):
+        """取出一个可用的空闲连接，校验失败的连接直接丢弃"""
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if not self.validate_on_checkout or self._is_alive(raw):
+                return raw
+            with self._lock:
+                self.stats['validation_failures'] += 1
+            self._discard(raw)
+
+    def _new_connection(self):
+        raw = self._connect_factory()
+        with self._lock:
+            self.stats['connections_created'] += 1
+        return raw
+
+    @staticmethod
+    def _is_alive(raw):
+        try:
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    def _discard(self, raw):
+        self._statement_caches.pop(id(raw), None)
+        self._execution_limits.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def prepared_cursor(self, raw, name):
+        """取得连接上缓存的预编译游标，超出缓存容量时按LRU关闭最久未用的语句"""
+        cache = self._statement_caches.setdefault(id(raw), OrderedDict())
+        cursor = cache.get(name)
+        if cursor is not None:
+            cache.move_to_end(name)
+            with self._lock:
+                self.stats['statement_cache_hits'] += 1
+            return cursor
+
+        cursor = raw.cursor(prepared=True)
+        cache[name] = cursor
+        evicted = None
+        if len(cache) > self.statement_cache_size:
+            _, evicted = cache.popitem(last=False)
+        with self._lock:
+            self.stats['statement_cache_misses'] += 1
+            if evicted is not None:
+                self.stats['statement_cache_evictions'] += 1
+        if evicted is not None:
+            try:
+                evicted.close()
+            except Error:
+                pass
+        return cursor
+
+    def release(self, raw):
+        """归还连接：清理未读结果和未提交事务后放回空闲队列"""
+        try:
+            if self._pid != os.getpid():
+                return
+            try:
+                if getattr(raw, 'unread_result', False):
+                    raw.consume_results()
+                if raw.in_transaction:
+                    raw.rollback()
+                self._idle.put(raw)
+            except Exception as e:
+                logger.warning(f"连接归还失败，已丢弃: {e}")
+                self._discard(raw)
+        finally:
+            with self._lock:
+                self.stats['in_use'] = max(0, self.stats['in_use'] - 1)
+            self._slots.release()
+
+    def set_execution_limit(self, raw, limit_ms):
+        """设置连接的查询超时，与连接上已生效的值相同时不再发送"""
+        if self._execution_limits.get(id(raw)) == limit_ms:
+            return
+        try:
+            storage.set_execution_limit(raw, limit_ms)
+        except Error as e:
+            logger.warning(f"设置查询超时失败: {e}")
+        self._execution_limits[id(raw)] = limit_ms
+
+    def get_stats(self):
+        """连接池运行计数"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['name'] = self.name
+        stats['pool_size'] = self.pool_size
+        stats['idle'] = self._idle.qsize()
+        stats['checkout_timeout'] = self.checkout_timeout
+        stats['avg_checkout_wait_ms'] = round(stats['checkout_wait_ms'] / stats['checkouts'], 3) if stats['checkouts'] else 0.0
+        stats['checkout_wait_ms'] = round(stats['checkout_wait_ms'], 3)
+        return stats
+
+
+class PooledConnection:
+    """连接池借出的连接，close() 时归还连接池而不是断开"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise AttributeError(f"连接已归还连接池，无法访问 {name}")
+        return getattr(raw, name)
+
+    def is_connected(self):
+        # 借出期间视为可用，归还后视为已关闭，避免 close() 前额外的 ping
+        return self._raw is not None
+
+    def prepared_cursor(self, name):
+        return self._pool.prepared_cursor(self._raw, name)
+
+    def set_execution_limit(self, limit_ms):
+        self._pool.set_execution_limit(self._raw, limit_ms)
+
+    def savepoint(self):
+        # 请求外每个辅助函数独占一个事务，出错时 rollback() 撤销的正是这一次写入
+        pass
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool.release(raw)
+
+
+# 应用创建时即初始化连接池（连接按需建立）
+db_pool = ConnectionPool(storage.connect_factory(DB_CONFIG), **DB_POOL_CONFIG)
+
+# 只读副本连接池（统计、导出等只读接口使用，仅 MySQL 后端）
+if DB_READ_REPLICAS and storage.name != 'mysql':
+    logger.warning("只读副本仅支持 MySQL 后端，已忽略 DB_READ_REPLICAS 配置")
+read_pools = [
+    ConnectionPool(storage.connect_factory(dict(DB_CONFIG, **replica)), name=f"replica-{i + 1}", **DB_POOL_CONFIG)
+    for i, replica in enumerate(DB_READ_REPLICAS if storage.name == 'mysql' else [])
+]
+_replica_down_until = {}
+# 轮询计数器，next() 在多线程下也不会取到重复的值
+_replica_cursor = itertools.count()
+
+
+class RequestConnection:
+    """请求内共享的数据库连接：辅助函数的 commit()/close() 推迟到请求结束时统一处理"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.has_writes = False
+        self.failed = False
+        self._in_savepoint = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def is_connected(self):
+        return True
+
+    def _execute(self, sql):
+        cursor = self._conn.cursor()
+        cursor.execute(sql)
+        cursor.close()
+
+    def savepoint(self):
+        """辅助函数开始一次写入前设置保存点，出错时 rollback() 只撤销这一次写入"""
+        if not self._conn.in_transaction:
+            self._conn.start_transaction()
+        self._execute("SAVEPOINT request_write")
+        self._in_savepoint = True
+
+    def commit(self):
+        # 由 finish_request_transaction 在请求结束时统一提交，这里只记录本次请求有写入
+        self.has_writes = True
+        self._in_savepoint = False
+
+    def rollback(self):
+        """撤销到本次写入的保存点；没有保存点时整个请求事务作废，请求结束时回滚而不是提交"""
+        if self._in_savepoint:
+            self._in_savepoint = False
+            self._execute("ROLLBACK TO SAVEPOINT request_write")
+        else:
+            self.failed = True
+            self._conn.rollback()
+
+    def close(self):
+        # 由 release_request_connection 在请求结束时统一归还
+        pass
+
+    def cursor(self, *args, **kwargs):
+        return BudgetedCursor(self._conn.cursor(*args, **kwargs))
+
+
+class BudgetedCursor:
+    """请求内的游标包装：查询超出时间预算时做标记，由 query_budget 转为503响应"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _call(self, method, *args, **kwargs):
+        try:
+            return getattr(self._cursor, method)(*args, **kwargs)
+        except Error as e:
+            if is_query_timeout(e):
+                g.query_timed_out = True
+                logger.warning(f"查询超出时间预算[{g.get('query_budget', 'interactive')}]: {e}")
+            raise
+
+    def execute(self, *args, **kwargs):
+        return self._call('execute', *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._call('executemany', *args, **kwargs)
+
+    def fetchone(self):
+        return self._call('fetchone')
+
+    def fetchall(self):
+        return self._call('fetchall')
+
+
+def is_query_timeout(error):
+    """是否为查询超时错误"""
+    return getattr(error, 'errno', None) in QUERY_TIMEOUT_ERRNOS
+
+def query_budget(budget):
+    """声明接口的查询时间预算（interactive/statistics/export），查询超时时返回503"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.query_budget = budget
+            try:
+                response = f(*args, **kwargs)
+            except Error as e:
+                if not is_query_timeout(e):
+                    raise
+                g.query_timed_out = True
+            if g.get('query_timed_out'):
+                return jsonify({
+                    'success': False,
+                    'timeout': True,
+                    'message': f'查询超时（超过{QUERY_BUDGETS[budget]}秒），请缩小时间范围或筛选条件后重试'
+                }), 503
+            return response
+        return decorated_function
+    return decorator
+
+
+# ===================== 预编译语句注册表 =====================
+# 高频参数化语句：每个连接只预编译一次，之后仅传参数执行
+PREPARED_STATEMENTS = {
+    'gift_duplicate': """
+        SELECT id FROM gift_records
+        WHERE record_type = %s AND name = %s AND amount = %s
+        AND occasion = %s AND date = %s AND owner = %s AND id != %s
+        LIMIT 1
+    """,
+    'gift_insert': """
+        INSERT INTO gift_records
+        (record_type, name, amount, occasion, date, has_returned, return_amount, return_occasion, return_date, remark, owner,
+         name_pinyin_key, person_key)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'gift_update': """
+        UPDATE gift_records
+        SET record_type = %s, name = %s, amount = %s, occasion = %s, date = %s,
+            has_returned = %s, return_amount = %s, return_occasion = %s,
+            return_date = %s, remark = %s, owner = %s, name_pinyin_key = %s, person_key = %s
+        WHERE id = %s
+    """,
+    'account_duplicate': """
+        SELECT id FROM daily_accounts
+        WHERE record_type = %s AND category = %s AND subcategory = %s
+        AND amount = %s AND account_date = %s AND owner = %s AND id != %s
+        LIMIT 1
+    """,
+    'account_insert': """
+        INSERT INTO daily_accounts
+        (record_type, category, subcategory, amount, account_date, description, payment_method, owner)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'account_update': """
+        UPDATE daily_accounts
+        SET record_type = %s, category = %s, subcategory = %s, amount = %s,
+            account_date = %s, description = %s, payment_method = %s, owner = %s
+        WHERE id = %s
+    """,
+    'user_security_login': """
+        SELECT password_hash, password_salt
+        FROM user_security
+        WHERE username = %s
+    """
+}
+
+def execute_prepared(connection, name, params=()):
+    """用连接上缓存的预编译游标执行注册表中的语句，返回该游标（游标由缓存管理，调用方不要关闭）"""
+    cursor = connection.prepared_cursor(name)
+    # 传入注册表中的同一字符串对象，驱动据此跳过重复预编译
+    cursor.execute(PREPARED_STATEMENTS[name], tuple(params))
+    return cursor
+
+def read_replica(f):
+    """声明接口只读：配置了只读副本时查询走副本，刚写入过的会话和副本不可用时仍走主库"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+def _checkout_connection(pool=None):
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
+        return (pool or db_pool).get_connection()
     except Error as e:
         logger.error(f"数据库连接失败: {str(e)}")
         return None
 
+def _checkout_replica():
+    """轮询可用的只读副本，借出失败的副本暂停使用一段时间"""
+    now = time.time()
+    for _ in range(len(read_pools)):
+        pool = read_pools[next(_replica_cursor) % len(read_pools)]
+        if _replica_down_until.get(pool.name, 0) > now:
+            continue
+        try:
+            return pool.get_connection()
+        except Error as e:
+            logger.warning(f"只读副本 {pool.name} 不可用，暂停使用 {DB_REPLICA_CONFIG['retry_after']} 秒: {e}")
+            _replica_down_until[pool.name] = now + DB_REPLICA_CONFIG['retry_after']
+    return None
+
+def _use_read_replica():
+    """当前请求是否可以读副本（只读接口，且本会话最近没有写入）"""
+    if not read_pools or not g.get('db_read_only'):
+        return False
+    last_write_at = session.get('db_last_write_at', 0)
+    return time.time() - last_write_at > DB_REPLICA_CONFIG['sticky_seconds']
+
+def create_connection(write=False):
+    """获取数据库连接：请求内复用同一连接和事务，请求外直接从连接池借出
+
+    只读接口的读查询可路由到只读副本；write=True 时始终使用主库。
+    """
+    if not has_request_context():
+        return _checkout_connection()
+
+    if not write and _use_read_replica():
+        connection = g.get('db_read_connection')
+        if connection is None:
+            pooled = _checkout_replica()
+            if pooled:
+                connection = g.db_read_connection = _bind_request_connection(pooled)
+        if connection is not None:
+            return connection
+
+    connection = g.get('db_connection')
+    if connection is None:
+        pooled = _checkout_connection()
+        if not pooled:
+            return None
+        connection = g.db_connection = _bind_request_connection(pooled)
+    return connection
+
+def _bind_request_connection(pooled):
+    budget = g.get('query_budget', 'interactive')
+    pooled.set_execution_limit(QUERY_BUDGETS[budget] * 1000)
+    return RequestConnection(pooled)
+
+@app.after_request
+def finish_request_transaction(response):
+    """请求结束时提交本次请求的事务，出错响应则回滚；事务提交成功后才把本次请求的操作日志交给后台写入"""
+    audit_events = g.pop('audit_events', [])
+    connection = g.get('db_connection')
+
+    if connection is not None:
+        raw = connection._conn
+        try:
+            if connection.failed:
+                raw.rollback()
+            elif raw.in_transaction:
+                if response.status_code < 400:
+                    raw.commit()
+                    if g.pop('account_data_changed', False):
+                        account_data_generation.bump()
+                    if connection.has_writes:
+                        # 读写一致：写入后的短时间内该会话的只读接口仍读主库
+                        session['db_last_write_at'] = time.time()
+                else:
+                    raw.rollback()
+        except Error as e:
+            logger.error(f"提交请求事务失败: {e}")
+            try:
+                raw.rollback()
+            except Error:
+                pass
+            response = jsonify({'success': False, 'message': '保存到数据库失败'})
+            response.status_code = 500
+
+    if response.status_code < 400:
+        for event in audit_events:
+            audit_writer.submit(event)
+    return response
+
+@app.teardown_request
+def release_request_connection(exc=None):
+    """请求结束后将连接归还连接池（未提交的事务会被回滚）"""
+    for key in ('db_connection', 'db_read_connection'):
+        connection = g.pop(key, None)
+        if connection is not None:
+            connection._conn.close()
+
 def safe_execute(cursor, query, params=None):
     """安全执行SQL查询"""
     try:
@@ -140,8 +1166,132 @@ def safe_execute(cursor, query, params=None):
     except Error as e:
         raise e
 
+# SQLite 后端的表结构（与 init_database 中的 MySQL 表结构一致；ENUM 用 CHECK 约束代替）
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS gift_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        record_type VARCHAR(10) NOT NULL DEFAULT '受礼记录' CHECK (record_type IN ('受礼记录', '随礼记录')),
+        name VARCHAR(100) NOT NULL,
+        amount DECIMAL(10,2) NOT NULL,
+        occasion VARCHAR(100) NOT NULL,
+        date DATE NOT NULL,
+        has_returned BOOLEAN NOT NULL DEFAULT 0,
+        return_amount DECIMAL(10,2) DEFAULT 0.00,
+        return_occasion VARCHAR(100),
+        return_date DATE,
+        remark TEXT,
+        owner VARCHAR(50) DEFAULT '郭宁',
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+        updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+
+    CREATE TABLE IF NOT EXISTS system_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        config_key VARCHAR(50) UNIQUE NOT NULL,
+        config_value TEXT,
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+        updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+
+    CREATE TABLE IF NOT EXISTS system_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        operation_type VARCHAR(50) NOT NULL,
+        operation_details TEXT NOT NULL,
+        user_name VARCHAR(100) DEFAULT 'admin',
+        record_id INT NULL,
+        ip_address VARCHAR(45) DEFAULT '127.0.0.1',
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+
+    CREATE TABLE IF NOT EXISTS user_security (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        password_hash VARCHAR(128) NOT NULL,
+        password_salt VARCHAR(32) NOT NULL,
+        security_question VARCHAR(255) NOT NULL,
+        security_answer_hash VARCHAR(128) NOT NULL,
+        security_answer_salt VARCHAR(32) NOT NULL,
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+        updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+
+    CREATE TABLE IF NOT EXISTS daily_accounts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        record_type VARCHAR(10) NOT NULL DEFAULT '支出' CHECK (record_type IN ('支出', '收入')),
+        category VARCHAR(50) NOT NULL,
+        subcategory VARCHAR(50),
+        amount DECIMAL(10,2) NOT NULL,
+        account_date DATE NOT NULL,
+        description TEXT,
+        payment_method VARCHAR(50) DEFAULT '现金',
+        owner VARCHAR(50) DEFAULT '郭宁',
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+        updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+
+    CREATE TABLE IF NOT EXISTS account_categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category_type VARCHAR(10) NOT NULL CHECK (category_type IN ('支出', '收入')),
+        category_name VARCHAR(50) NOT NULL,
+        subcategories TEXT,
+        sort_order INT DEFAULT 0,
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+        UNIQUE (category_type, category_name)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_gift_records_date ON gift_records(date);
+    CREATE INDEX IF NOT EXISTS idx_gift_records_type ON gift_records(record_type);
+    CREATE INDEX IF NOT EXISTS idx_gift_records_owner ON gift_records(owner);
+    CREATE INDEX IF NOT EXISTS idx_gift_records_name ON gift_records(name);
+    CREATE INDEX IF NOT EXISTS idx_system_logs_created_at ON system_logs(created_at);
+    CREATE INDEX IF NOT EXISTS idx_system_logs_operation_type ON system_logs(operation_type);
+    CREATE INDEX IF NOT EXISTS idx_system_logs_user_name ON system_logs(user_name);
+"""
+
+# MySQL 的 ON UPDATE CURRENT_TIMESTAMP 在 SQLite 中用触发器实现
+SQLITE_UPDATED_AT_TABLES = ['gift_records', 'system_config', 'user_security', 'daily_accounts']
+
+def init_sqlite_database():
+    """初始化 SQLite 数据库和表"""
+    connection = None
+    try:
+        connection = storage.connect_factory(DB_CONFIG)()
+        connection._conn.executescript(SQLITE_SCHEMA)
+        for table in SQLITE_UPDATED_AT_TABLES:
+            connection._conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_at
+                AFTER UPDATE ON {table} FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+                BEGIN
+                    UPDATE {table} SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+                END
+            """)
+
+        cursor = connection.cursor()
+        init_account_categories(cursor)
+        connection.commit()
+        cursor.close()
+        connection.close()
+        connection = None
+
+        run_schema_migrations()
+        init_config()
+        logger.info(f"SQLite 数据库初始化完成: {storage.path}")
+        return True
+    except Error as e:
+        logger.error(f"数据库初始化失败: {str(e)}")
+        return False
+    except sqlite3.Error as e:
+        logger.error(f"数据库初始化失败: {str(e)}")
+        return False
+    finally:
+        if connection:
+            connection.close()
+
 def init_database():
     """初始化数据库和表"""
+    if storage.name == 'sqlite':
+        return init_sqlite_database()
+
     connection = None
     cursor = None
 
@@ -157,32 +1307,6 @@ def init_database():
         safe_execute(cursor, f"USE {DB_CONFIG['database']}")
         connection.commit()
 
-    # 添加更多索引
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_gift_records_date ON gift_records(date)",
-            "CREATE INDEX IF NOT EXISTS idx_gift_records_type ON gift_records(record_type)",
-            "CREATE INDEX IF NOT EXISTS idx_gift_records_owner ON gift_records(owner)",
-            "CREATE INDEX IF NOT EXISTS idx_gift_records_name ON gift_records(name)",
-            "CREATE INDEX IF NOT EXISTS idx_daily_accounts_date ON daily_accounts(account_date)",
-            "CREATE INDEX IF NOT EXISTS idx_daily_accounts_type ON daily_accounts(record_type)",
-            "CREATE INDEX IF NOT EXISTS idx_daily_accounts_category ON daily_accounts(category)",
-            "CREATE INDEX IF NOT EXISTS idx_daily_accounts_owner ON daily_accounts(owner)",
-            "CREATE INDEX IF NOT EXISTS idx_daily_accounts_type_date ON daily_accounts(record_type, account_date)",
-            "CREATE INDEX IF NOT EXISTS idx_daily_accounts_owner_date ON daily_accounts(owner, account_date)",
-            "CREATE INDEX IF NOT EXISTS idx_system_logs_created_at ON system_logs(created_at)",
-            "CREATE INDEX IF NOT EXISTS idx_system_logs_operation_type ON system_logs(operation_type)",
-            "CREATE INDEX IF NOT EXISTS idx_system_logs_user_name ON system_logs(user_name)"
-        ]
-    
-        for index_sql in indexes:
-            try:
-                safe_execute(cursor, index_sql)
-                connection.commit()
-                logger.info(f"成功创建索引: {index_sql.split(' ON ')[0]}")
-            except Error as e:
-                if "Duplicate key name" not in str(e) and "already exists" not in str(e):
-                    logger.warning(f"创建索引时出现错误: {e}")
-
         safe_execute(cursor, """
             CREATE TABLE IF NOT EXISTS gift_records (
                 id INT AUTO_INCREMENT PRIMARY KEY,
@@ -294,11 +1418,7 @@ def init_database():
                 payment_method VARCHAR(50) DEFAULT '现金',
                 owner VARCHAR(50) DEFAULT '郭宁',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_account_date (account_date),
-                INDEX idx_category (category),
-                INDEX idx_record_type (record_type),
-                INDEX idx_owner (owner)
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
             )
         """)
         connection.commit()
@@ -322,9 +1442,6 @@ def init_database():
             "CREATE INDEX idx_gift_records_type ON gift_records(record_type)",
             "CREATE INDEX idx_gift_records_owner ON gift_records(owner)",
             "CREATE INDEX idx_gift_records_name ON gift_records(name)",
-            "CREATE INDEX idx_daily_accounts_date ON daily_accounts(account_date)",
-            "CREATE INDEX idx_daily_accounts_type ON daily_accounts(record_type)",
-            "CREATE INDEX idx_daily_accounts_category ON daily_accounts(category)",
             "CREATE INDEX idx_system_logs_created_at ON system_logs(created_at)",
             "CREATE INDEX idx_system_logs_operation_type ON system_logs(operation_type)"
         ]
@@ -349,12 +1466,117 @@ def init_database():
         cursor.close()
         connection.close()
 
+        run_schema_migrations()
         init_config()
         return True
     except Error as e:
         logger.error(f"数据库初始化失败: {str(e)}")
         return False
 
+# ===================== 数据库结构迁移 =====================
+# 已注册的迁移，按版本号顺序执行；已执行的版本记录在 schema_migrations 表中
+SCHEMA_MIGRATIONS = []
+
+def schema_migration(version):
+    """注册数据库结构迁移，每个版本只执行一次"""
+    def decorator(f):
+        SCHEMA_MIGRATIONS.append((version, f))
+        return f
+    return decorator
+
+def run_schema_migrations():
+    """执行尚未执行的数据库结构迁移"""
+    connection = _checkout_connection()
+    if not connection:
+        logger.error("数据库连接失败，无法执行结构迁移")
+        return False
+
+    try:
+        cursor = connection.cursor()
+        if storage.name == 'mysql':
+            # 多个 worker 同时启动时只有一个执行迁移，其余等待后跳过已执行的版本
+            cursor.execute("SELECT GET_LOCK('schema_migrations', 300)")
+            cursor.fetchall()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(100) PRIMARY KEY,
+                applied_at TIMESTAMP NULL
+            )
+        """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        for version, migrate in sorted(SCHEMA_MIGRATIONS, key=lambda item: item[0]):
+            if version in applied:
+                continue
+            logger.info(f"执行数据库结构迁移: {version}")
+            migrate(cursor)
+            cursor.execute("INSERT INTO schema_migrations (version, applied_at) VALUES (%s, %s)",
+                           (version, datetime.now()))
+            connection.commit()
+
+        cursor.close()
+        clear_cached_flags()
+        return True
+    except Error as e:
+        logger.error(f"数据库结构迁移失败: {e}")
+        connection.rollback()
+        return False
+    finally:
+        if storage.name == 'mysql':
+            try:
+                cursor = connection.cursor()
+                cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+                cursor.fetchall()
+                cursor.close()
+            except Error:
+                pass
+        connection.close()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """初始化数据库表并执行尚未执行的结构迁移"""
+    if init_database():
+        click.echo("数据库初始化完成，结构迁移已是最新")
+    else:
+        click.echo("数据库初始化失败，详见日志", err=True)
+
+@schema_migration('0001_system_logs_search')
+def migrate_system_logs_search(cursor):
+    """操作日志关键词全文索引，以及按操作类型筛选、按时间倒序分页的复合索引"""
+    storage.create_index(cursor, 'system_logs', 'idx_system_logs_type_created', 'operation_type, created_at')
+    if storage.name == 'sqlite':
+        # FTS5 trigram 外部内容表，由触发器与 system_logs 保持同步
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS system_logs_fts USING fts5(
+                operation_details, user_name, content='system_logs', content_rowid='id', tokenize='trigram'
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_system_logs_fts_insert AFTER INSERT ON system_logs BEGIN
+                INSERT INTO system_logs_fts (rowid, operation_details, user_name)
+                VALUES (NEW.id, NEW.operation_details, NEW.user_name);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_system_logs_fts_delete AFTER DELETE ON system_logs BEGIN
+                INSERT INTO system_logs_fts (system_logs_fts, rowid, operation_details, user_name)
+                VALUES ('delete', OLD.id, OLD.operation_details, OLD.user_name);
+            END
+        """)
+        cursor.execute("INSERT INTO system_logs_fts (system_logs_fts) VALUES ('rebuild')")
+        return
+
+    try:
+        cursor.execute("""
+            ALTER TABLE system_logs
+            ADD FULLTEXT INDEX ft_system_logs_text (operation_details, user_name) WITH PARSER ngram
+        """)
+    except Error as e:
+        # 分区表不支持全文索引，此时关键词检索退回 LIKE
+        if e.errno != 1061:
+            logger.warning(f"创建操作日志全文索引失败，关键词检索将使用 LIKE: {e}")
+
 def get_default_username():
     """获取默认用户名"""
     connection = create_connection()
@@ -397,21 +1619,16 @@ def verify_login(username, password):
         
         # 首先尝试从user_security表查询用户信息
         logger.info(f"查询user_security表获取用户: {username}")
-        cursor.execute("""
-            SELECT password_hash, password_salt 
-            FROM user_security 
-            WHERE username = %s
-        """, (username,))
-        
-        result = cursor.fetchone()
+        rows = execute_prepared(connection, 'user_security_login', (username,)).fetchall()
         
         # 如果在user_security表中找到用户，验证密码
-        if result:
+        if rows:
+            password_hash, password_salt = rows[0]
             logger.info(f"在user_security表中找到用户 {username}")
-            logger.info(f"存储的密码哈希: {result['password_hash'][:16]}...")
-            logger.info(f"存储的密码盐值: {result['password_salt'][:16]}...")
+            logger.info(f"存储的密码哈希: {password_hash[:16]}...")
+            logger.info(f"存储的密码盐值: {password_salt[:16]}...")
             
-            is_valid = verify_password(result['password_hash'], result['password_salt'], password)
+            is_valid = verify_password(password_hash, password_salt, password)
             
             if is_valid:
                 logger.info(f"用户 {username} 密码验证成功")
@@ -792,98 +2009,475 @@ def reset_user_password(username, new_password):
         if connection and connection.is_connected():
             connection.close()
 
+# ===================== 异步批量操作日志 =====================
+class AuditLogWriter:
+    """异步批量写入操作日志：事件进入有界队列，由后台线程按条数或时间批量插入"""
+
+    def __init__(self, queue_size=10000, batch_size=200, flush_interval=1.0):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._queue = queue.Queue(maxsize=queue_size)
+        self.stats = {'enqueued': 0, 'dropped': 0, 'flushed': 0, 'batches': 0, 'failed': 0}
+
+    def _ensure_started(self):
+        # 后台线程在首次写日志时启动；多进程WSGI服务器fork后在子进程中重新启动
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size)
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, event):
+        """提交一条日志事件，队列已满时丢弃并计数"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+            with self._lock:
+                self.stats['enqueued'] += 1
+        except queue.Full:
+            with self._lock:
+                self.stats['dropped'] += 1
+            logger.warning(f"操作日志队列已满，丢弃日志: {event[0]}")
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+            elif self._stopping:
+                return
+
+    def _next_batch(self):
+        """等待第一条事件，再在 flush_interval 内凑满一批"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stopping:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        connection = _checkout_connection()
+        if not connection:
+            with self._lock:
+                self.stats['failed'] += len(batch)
+            logger.error(f"数据库连接失败，{len(batch)} 条操作日志未写入")
+            return
+
+        try:
+            cursor = connection.cursor()
+            # 普通游标的 executemany 会合并为一条多行 INSERT
+            cursor.executemany("""
+                INSERT INTO system_logs (operation_type, operation_details, user_name, record_id, ip_address, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, batch)
+
+            connection.commit()
+            cursor.close()
+            log_count_cache.clear()
+            with self._lock:
+                self.stats['flushed'] += len(batch)
+                self.stats['batches'] += 1
+        except Error as e:
+            with self._lock:
+                self.stats['failed'] += len(batch)
+            logger.error(f"批量写入操作日志错误: {e}")
+        finally:
+            connection.close()
+
+    def drain(self, timeout=5.0):
+        """停止后台线程前写完队列中剩余的日志（进程退出时调用）"""
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"操作日志写入线程未在 {timeout} 秒内结束，剩余 {self._queue.qsize()} 条")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['queued'] = self._queue.qsize()
+        stats['queue_size'] = self.queue_size
+        return stats
+
+
+audit_writer = AuditLogWriter(**AUDIT_LOG_CONFIG)
+atexit.register(audit_writer.drain)
+
 def log_operation(operation_type, operation_details, record_id=None, user_name="admin", record_data=None):
-    """记录系统操作日志，并自动清理一周前的旧日志"""
-    connection = create_connection()
-    if not connection:
-        logger.error(f"数据库连接失败，无法记录日志: {operation_type}")
-        return False
+    """记录系统操作日志（异步批量写入）
+
+    请求内的日志在本次请求的事务提交成功后才交给后台线程写入，请求外的日志直接进入队列。
+    """
+    # 客户端IP取自当前请求，请求外的调用（命令行、后台任务）记为本机
+    ip_address = (request.remote_addr or "127.0.0.1") if has_request_context() else "127.0.0.1"
+
+    # 如果有详细的记录数据，将其添加到操作详情中
+    if record_data and isinstance(record_data, dict):
+        details_with_data = f"{operation_details}\n\n记录详情：\n"
+
+        # 添加记录类型
+        if 'record_type' in record_data:
+            details_with_data += f"• 记录类型：{record_data['record_type']}\n"
+
+        # 添加所属人信息
+        if 'owner' in record_data:
+            details_with_data += f"• 所属人：{record_data['owner']}\n"
+
+        # 添加基本信息
+        if 'name' in record_data:
+            details_with_data += f"• 姓名：{record_data['name']}\n"
+        if 'amount' in record_data:
+            details_with_data += f"• 金额：{record_data['amount']}元\n"
+        if 'occasion' in record_data:
+            details_with_data += f"• 事件：{record_data['occasion']}\n"
+        if 'date' in record_data:
+            details_with_data += f"• 日期：{record_data['date']}\n"
+
+        # 添加回礼信息
+        if 'return_amount' in record_data and record_data['return_amount'] and record_data['return_amount'] > 0:
+            details_with_data += f"• 回礼金额：{record_data['return_amount']}元\n"
+        if 'return_occasion' in record_data and record_data['return_occasion']:
+            details_with_data += f"• 回礼事件：{record_data['return_occasion']}\n"
+        if 'return_date' in record_data and record_data['return_date']:
+            details_with_data += f"• 回礼日期：{record_data['return_date']}\n"
+
+        # 添加备注信息
+        if 'remark' in record_data and record_data['remark']:
+            details_with_data += f"• 备注：{record_data['remark']}\n"
+
+        operation_details = details_with_data
+
+    event = (operation_type, operation_details, user_name, record_id, ip_address, datetime.now())
+    if has_request_context():
+        g.setdefault('audit_events', []).append(event)
+    else:
+        audit_writer.submit(event)
+    logger.info(f"操作日志已加入写入队列: {operation_type}")
+    return True
+
+# ===================== 操作日志定期清理 =====================
+def get_log_partitions(cursor):
+    """获取 system_logs 的按天分区（未分区或非 MySQL 后端时返回空列表）"""
+    if storage.name != 'mysql':
+        return []
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'system_logs' AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    return cursor.fetchall()
+
+def _mysql_unix_timestamp(cursor, moment):
+    """按 MySQL 会话时区换算时间戳，与分区表达式 UNIX_TIMESTAMP(created_at) 保持一致"""
+    cursor.execute("SELECT UNIX_TIMESTAMP(%s) AS ts", (moment.strftime('%Y-%m-%d %H:%M:%S'),))
+    row = cursor.fetchone()
+    return int(row['ts'] if isinstance(row, dict) else row[0])
+
+def _log_partition_definitions(cursor, start_day, end_day):
+    """生成 [start_day, end_day] 每天一个分区的定义，分区上界为次日零点的时间戳"""
+    definitions = []
+    day = start_day
+    while day <= end_day:
+        upper = _mysql_unix_timestamp(cursor, datetime.combine(day + timedelta(days=1), datetime.min.time()))
+        definitions.append(f"PARTITION p{day.strftime('%Y%m%d')} VALUES LESS THAN ({upper})")
+        day += timedelta(days=1)
+    return definitions
+
+def ensure_log_partitions(cursor, partitions):
+    """在 pmax 之前补建到未来若干天的分区"""
+    # 只剩 pmax 时从今天开始补建
+    last_day = max((datetime.strptime(name[1:], '%Y%m%d').date()
+                    for name, _, _ in partitions if name != 'pmax'),
+                   default=date.today() - timedelta(days=1))
+    end_day = date.today() + timedelta(days=LOG_RETENTION_CONFIG['partitions_ahead'])
+    definitions = _log_partition_definitions(cursor, last_day + timedelta(days=1), end_day)
+    if definitions:
+        cursor.execute(f"""
+            ALTER TABLE system_logs REORGANIZE PARTITION pmax INTO (
+                {', '.join(definitions)},
+                PARTITION pmax VALUES LESS THAN MAXVALUE
+            )
+        """)
 
+def drop_expired_log_partitions(cursor, partitions, cutoff):
+    """删除上界不晚于截止时间的整天分区，返回删除的大致行数"""
+    cutoff_ts = _mysql_unix_timestamp(cursor, cutoff)
+    expired = [(name, rows) for name, upper, rows in partitions
+               if name != 'pmax' and int(upper) <= cutoff_ts]
+    if not expired:
+        return 0
+    cursor.execute(f"ALTER TABLE system_logs DROP PARTITION {', '.join(name for name, _ in expired)}")
+    return sum(int(rows or 0) for _, rows in expired)
+
+def partition_system_logs():
+    """将 system_logs 改为按天分区（仅 MySQL，一次性操作），之后过期日志按分区整体删除"""
+    if storage.name != 'mysql':
+        raise ValueError("按天分区仅支持 MySQL 后端")
+
+    connection = _checkout_connection()
+    if not connection:
+        raise ValueError("数据库连接失败")
     try:
         cursor = connection.cursor()
+        if get_log_partitions(cursor):
+            return False
 
-        # 获取客户端IP地址
-        try:
-            import socket
-            hostname = socket.gethostname()
-            ip_address = socket.gethostbyname(hostname)
-        except:
-            ip_address = "127.0.0.1"
-
-        # 如果有详细的记录数据，将其添加到操作详情中
-        if record_data and isinstance(record_data, dict):
-            details_with_data = f"{operation_details}\n\n记录详情：\n"
-
-            # 添加记录类型
-            if 'record_type' in record_data:
-                details_with_data += f"• 记录类型：{record_data['record_type']}\n"
-
-            # 添加所属人信息
-            if 'owner' in record_data:
-                details_with_data += f"• 所属人：{record_data['owner']}\n"
-
-            # 添加基本信息
-            if 'name' in record_data:
-                details_with_data += f"• 姓名：{record_data['name']}\n"
-            if 'amount' in record_data:
-                details_with_data += f"• 金额：{record_data['amount']}元\n"
-            if 'occasion' in record_data:
-                details_with_data += f"• 事件：{record_data['occasion']}\n"
-            if 'date' in record_data:
-                details_with_data += f"• 日期：{record_data['date']}\n"
-
-            # 添加回礼信息
-            if 'return_amount' in record_data and record_data['return_amount'] and record_data['return_amount'] > 0:
-                details_with_data += f"• 回礼金额：{record_data['return_amount']}元\n"
-            if 'return_occasion' in record_data and record_data['return_occasion']:
-                details_with_data += f"• 回礼事件：{record_data['return_occasion']}\n"
-            if 'return_date' in record_data and record_data['return_date']:
-                details_with_data += f"• 回礼日期：{record_data['return_date']}\n"
-
-            # 添加备注信息
-            if 'remark' in record_data and record_data['remark']:
-                details_with_data += f"• 备注：{record_data['remark']}\n"
-
-            operation_details = details_with_data
-
-        # 记录新日志
-        cursor.execute("""
-            INSERT INTO system_logs (operation_type, operation_details, user_name, record_id, ip_address)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (operation_type, operation_details, user_name, record_id, ip_address))
+        # 分区表不支持全文索引，关键词检索随之退回 LIKE
+        if storage.has_index(cursor, 'system_logs', 'ft_system_logs_text'):
+            cursor.execute("ALTER TABLE system_logs DROP INDEX ft_system_logs_text")
+            clear_cached_flags()
+
+        # 分区表的所有唯一键都必须包含分区字段
+        cursor.execute("ALTER TABLE system_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)")
+        today = date.today()
+        definitions = _log_partition_definitions(
+            cursor,
+            today - timedelta(days=LOG_RETENTION_CONFIG['retention_days'] + 1),
+            today + timedelta(days=LOG_RETENTION_CONFIG['partitions_ahead'])
+        )
+        cursor.execute(f"""
+            ALTER TABLE system_logs PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+                {', '.join(definitions)},
+                PARTITION pmax VALUES LESS THAN MAXVALUE
+            )
+        """)
+        cursor.close()
+        return True
+    finally:
+        connection.close()
 
-        # ===================== 新增：自动清理一周前的旧日志 =====================
-        try:
-            # 删除创建时间超过7天的日志
-            cursor.execute("""
-                DELETE FROM system_logs 
-                WHERE created_at < DATE_SUB(NOW(), INTERVAL 7 DAY)
-            """)
-            deleted_count = cursor.rowcount
-            
-            if deleted_count > 0:
-                logger.info(f"自动清理了 {deleted_count} 条一周前的旧日志")
-                
-                # 记录清理操作本身
-                cursor.execute("""
-                    INSERT INTO system_logs (operation_type, operation_details, user_name, ip_address)
-                    VALUES (%s, %s, %s, %s)
-                """, ("SYSTEM", f"自动清理日志 - 删除了{deleted_count}条一周前的旧日志", user_name, ip_address))
-        except Error as e:
-            logger.warning(f"清理旧日志时出错: {e}")
-            # 不因清理失败而影响主要操作
-        # ===================== 结束新增 =====================
+def purge_expired_logs(retention_days=None, batch_size=None):
+    """清理过期操作日志，返回删除条数
 
-        connection.commit()
+    按天分区的表直接删除过期分区；否则沿 created_at 索引按批删除，每批单独提交，避免长时间锁住日志表。
+    """
+    if retention_days is None:
+        retention_days = LOG_RETENTION_CONFIG['retention_days']
+    if batch_size is None:
+        batch_size = LOG_RETENTION_CONFIG['batch_size']
+    if retention_days < 0:
+        raise ValueError("日志保留天数不能为负数")
+    if batch_size <= 0:
+        raise ValueError("每批删除条数必须大于0")
+    cutoff = datetime.now() - timedelta(days=retention_days)
+
+    connection = _checkout_connection()
+    if not connection:
+        logger.error("数据库连接失败，无法清理旧日志")
+        return 0
+
+    deleted_count = 0
+    try:
+        cursor = connection.cursor()
+        partitions = get_log_partitions(cursor)
+        if partitions:
+            deleted_count = drop_expired_log_partitions(cursor, partitions, cutoff)
+            ensure_log_partitions(cursor, get_log_partitions(cursor))
+        else:
+            while True:
+                cursor.execute(storage.purge_logs_sql, (cutoff, batch_size))
+                batch_deleted = cursor.rowcount
+                connection.commit()
+                deleted_count += batch_deleted
+                if batch_deleted < batch_size:
+                    break
         cursor.close()
-        logger.info(f"操作日志记录成功: {operation_type}")
-        return True
     except Error as e:
-        logger.error(f"记录日志错误: {e}")
-        return False
+        logger.error(f"清理旧日志时出错: {e}")
     finally:
-        if connection and connection.is_connected():
-            connection.close()
+        connection.close()
+
+    if deleted_count > 0:
+        logger.info(f"自动清理了 {deleted_count} 条{retention_days}天前的旧日志")
+        # 记录清理操作本身
+        log_operation("SYSTEM", f"自动清理日志 - 删除了{deleted_count}条{retention_days}天前的旧日志", user_name="system")
+    return deleted_count
+
+
+class LogRetentionJob:
+    """进程内的定时日志清理任务"""
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop_event = threading.Event()
+
+    def ensure_started(self):
+        if self.interval_seconds <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='log-retention', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                with app.app_context():
+                    purge_expired_logs()
+            except Exception as e:
+                logger.error(f"定时清理日志任务出错: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+log_retention_job = LogRetentionJob(LOG_RETENTION_CONFIG['interval_seconds'])
+atexit.register(log_retention_job.stop)
+
+@app.before_request
+def start_background_jobs():
+    """首个请求时在当前进程启动后台定时任务"""
+    log_retention_job.ensure_started()
+
+@app.cli.command('purge-logs')
+@click.option('--days', type=int, default=None, help='日志保留天数，默认取 LOG_RETENTION_CONFIG')
+@click.option('--batch-size', type=int, default=None, help='每批删除条数')
+def purge_logs_command(days, batch_size):
+    """按批清理过期操作日志"""
+    try:
+        deleted_count = purge_expired_logs(days, batch_size)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    audit_writer.drain()
+    click.echo(f"已清理 {deleted_count} 条过期日志")
+
+@app.cli.command('partition-logs')
+def partition_logs_command():
+    """将 system_logs 改为按天分区（仅 MySQL），之后清理任务按分区删除过期日志"""
+    try:
+        if partition_system_logs():
+            click.echo("system_logs 已改为按天分区")
+        else:
+            click.echo("system_logs 已经是分区表，无需处理")
+    except (ValueError, Error) as e:
+        click.echo(f"分区失败: {e}", err=True)
+
+def get_page_args(source=None, default_per_page=20):
+    """读取分页参数并校正：page 至少为 1，per_page 限制在 1 到 MAX_PER_PAGE 之间，不是整数时取默认值
+
+    source 默认为查询字符串，POST 接口传入请求 JSON。
+    """
+    source = request.args if source is None else source
+
+    def to_int(value, default):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
+    page = max(to_int(source.get('page'), 1), 1)
+    per_page = min(max(to_int(source.get('per_page'), default_per_page), 1), MAX_PER_PAGE)
+    return page, per_page
+
+def encode_page_cursor(*values):
+    """把排序键编码为不透明的分页游标"""
+    encoded = [v.strftime('%Y-%m-%d %H:%M:%S') if isinstance(v, datetime)
+               else v.strftime('%Y-%m-%d') if isinstance(v, date)
+               else str(v) if isinstance(v, Decimal)
+               else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(encoded, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+def decode_page_cursor(value, arity):
+    """解析分页游标，应为 arity 个排序键（字符串、数字或空值），格式不正确时抛出 ValueError"""
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(value.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError, TypeError) as e:
+        raise ValueError(f"无效的分页游标: {value}") from e
+    if (not isinstance(decoded, list) or len(decoded) != arity
+            or any(isinstance(v, bool) or not isinstance(v, (str, int, float, type(None))) for v in decoded)):
+        raise ValueError(f"无效的分页游标: {value}")
+    return decoded
+
+def keyset_condition(columns, values, descending=False):
+    """生成游标分页条件：排在 values 之后的行（columns 为 ORDER BY 的列，方向一致）"""
+    op = '<' if descending else '>'
+    clauses = []
+    params = []
+    for i, column in enumerate(columns):
+        parts = [f"{c} = %s" for c in columns[:i]] + [f"{column} {op} %s"]
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+class TTLCache:
+    """进程内的短时结果缓存"""
+
+    def __init__(self, ttl_seconds, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 操作日志总数缓存：日志只增不改，总数短时间内略有滞后不影响使用
+log_count_cache = TTLCache(ttl_seconds=30)
+
+def subtract_months(value, months):
+    """日期时间减去若干个月（与 MySQL 的 INTERVAL n MONTH 一致，月末日期取目标月最后一天）"""
+    month_index = value.year * 12 + value.month - 1 - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    next_month = datetime(year + (month == 12), month % 12 + 1, 1)
+    last_day = (next_month - timedelta(days=1)).day
+    return value.replace(year=year, month=month, day=min(value.day, last_day))
 
 def calculate_completion_status(record):
     """计算完成状态"""
@@ -936,6 +2530,53 @@ def get_pinyin_sort_key(name):
     # 备用方案：使用Unicode编码排序（简单的中文排序）
     return name
 
+def get_name_search_terms(name):
+    """姓名检索词：姓名、拼音首字母、全拼（按音节）的各个后缀，前缀匹配即可覆盖子串、首字母和全拼检索"""
+    name = (name or '').strip().lower()
+    if not name:
+        return set()
+
+    terms = {name[i:] for i in range(len(name))}
+    if HAS_PINYIN:
+        try:
+            syllables = [s.lower() for s in lazy_pinyin(name) if s.strip()]
+            initials = ''.join(s[0] for s in syllables)
+            terms.update(initials[i:] for i in range(len(initials)))
+            terms.update(''.join(syllables[i:]) for i in range(len(syllables)))
+        except Exception as e:
+            logger.error(f"拼音转换错误: {e}")
+    return {term[:100] for term in terms if term.strip()}
+
+def update_name_index(cursor, record_id, name):
+    """重建单条记录的姓名检索词"""
+    cursor.execute("DELETE FROM gift_name_index WHERE record_id = %s", (record_id,))
+    terms = get_name_search_terms(name)
+    if terms:
+        cursor.executemany("INSERT INTO gift_name_index (term, record_id) VALUES (%s, %s)",
+                           [(term, record_id) for term in terms])
+
+def escape_like(value):
+    """转义 LIKE 通配符，配合 ESCAPE '!' 使用（MySQL 与 SQLite 写法一致）"""
+    return value.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def name_search_condition(keyword):
+    """姓名检索条件：在检索词表中做前缀匹配"""
+    return ("id IN (SELECT record_id FROM gift_name_index WHERE term LIKE %s ESCAPE '!')",
+            [escape_like(keyword.strip().lower()) + '%'])
+
+def register_occasions(cursor, *occasions):
+    """把事件名称记入事件字典"""
+    occasions = {o.strip() for o in occasions if o and o.strip()}
+    if occasions:
+        cursor.executemany("INSERT IGNORE INTO gift_occasions (occasion) VALUES (%s)",
+                           [(o,) for o in occasions])
+
+def find_occasions(cursor, keyword):
+    """在事件字典中查找包含关键词的事件名称"""
+    cursor.execute("SELECT occasion FROM gift_occasions WHERE occasion LIKE %s ESCAPE '!'",
+                   (f"%{escape_like(keyword)}%",))
+    return [row[0] if isinstance(row, tuple) else row['occasion'] for row in cursor.fetchall()]
+
 def load_records():
     """从数据库加载记录"""
     connection = create_connection()
@@ -996,36 +2637,17 @@ def is_duplicate_gift_record(record, exclude_id=None):
         return False
 
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # 构建查询条件 - 检查主要字段是否相同
-        query = """
-            SELECT id FROM gift_records 
-            WHERE record_type = %s 
-            AND name = %s 
-            AND amount = %s 
-            AND occasion = %s 
-            AND date = %s 
-            AND owner = %s
-        """
-        params = [
+        # 检查主要字段是否相同；更新操作时排除当前记录（新增时传0，不排除任何记录）
+        cursor = execute_prepared(connection, 'gift_duplicate', (
             record['record_type'],
             record['name'],
             record['amount'],
             record['occasion'],
             record['date'],
-            record['owner']
-        ]
-        
-        # 如果是更新操作，排除当前记录
-        if exclude_id:
-            query += " AND id != %s"
-            params.append(exclude_id)
-        
-        cursor.execute(query, params)
-        result = cursor.fetchone()
-        
-        return result is not None
+            record['owner'],
+            exclude_id or 0
+        ))
+        return len(cursor.fetchall()) > 0
         
     except Error as e:
         logger.error(f"检查重复礼尚往来记录错误: {e}")
@@ -1042,8 +2664,7 @@ def save_record(record):
         return False
 
     try:
-        cursor = connection.cursor()
-
+        connection.savepoint()
         return_date = record.get('return_date', '')
         if return_date == '':
             return_date = None
@@ -1060,43 +2681,46 @@ def save_record(record):
 
         is_update = 'id' in record and record['id']
 
+        cursor = connection.cursor(dictionary=True)
+        old_summary_row = get_gift_summary_row(cursor, record['id']) if is_update else None
+        cursor.close()
+
         if is_update:
-            cursor.execute("""
-                UPDATE gift_records 
-                SET record_type = %s, name = %s, amount = %s, occasion = %s, date = %s,
-                    has_returned = %s, return_amount = %s, return_occasion = %s, 
-                    return_date = %s, remark = %s, owner = %s
-                WHERE id = %s
-            """, (
+            execute_prepared(connection, 'gift_update', (
                 record_type, record['name'], record['amount'], record['occasion'], date,
                 has_returned, record['return_amount'], record['return_occasion'],
-                return_date, record['remark'], owner, record['id']
+                return_date, record['remark'], owner, get_pinyin_sort_key(record['name']),
+                normalize_person_name(record['name']), record['id']
             ))
             operation_type = "EDIT"
             operation_details = f"修改{record_type}"
             record_id = record['id']
         else:
-            cursor.execute("""
-                INSERT INTO gift_records 
-                (record_type, name, amount, occasion, date, has_returned, return_amount, return_occasion, return_date, remark, owner)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
+            cursor = execute_prepared(connection, 'gift_insert', (
                 record_type, record['name'], record['amount'], record['occasion'], date,
                 has_returned, record['return_amount'], record['return_occasion'],
-                return_date, record['remark'], owner
+                return_date, record['remark'], owner, get_pinyin_sort_key(record['name']),
+                normalize_person_name(record['name'])
             ))
             operation_type = "ADD"
             operation_details = f"添加{record_type}"
             record_id = cursor.lastrowid
 
-        connection.commit()
+        cursor = connection.cursor(dictionary=True)
+        update_name_index(cursor, record_id, record['name'])
+        register_occasions(cursor, record['occasion'], record['return_occasion'])
+        apply_gift_summary_delta(cursor, old_summary_row, -1)
+        apply_gift_summary_delta(cursor, get_gift_summary_row(cursor, record_id), 1)
         cursor.close()
 
+        connection.commit()
+
         # 记录操作日志
         log_operation(operation_type, operation_details, record_id, record_data=record)
         return True
     except Error as e:
         logger.error(f"保存记录错误: {e}")
+        connection.rollback()
         return False
     finally:
         if connection and connection.is_connected():
@@ -1109,12 +2733,16 @@ def delete_record_by_id(record_id):
         return False
 
     try:
+        connection.savepoint()
         # 先获取记录信息用于日志
         cursor = connection.cursor(dictionary=True)
         cursor.execute("SELECT * FROM gift_records WHERE id = %s", (record_id,))
         record = cursor.fetchone()
+        summary_row = get_gift_summary_row(cursor, record_id)
 
         cursor.execute("DELETE FROM gift_records WHERE id = %s", (record_id,))
+        cursor.execute("DELETE FROM gift_name_index WHERE record_id = %s", (record_id,))
+        apply_gift_summary_delta(cursor, summary_row, -1)
         connection.commit()
         cursor.close()
 
@@ -1128,6 +2756,7 @@ def delete_record_by_id(record_id):
         return True
     except Error as e:
         logger.error(f"删除记录错误: {e}")
+        connection.rollback()
         return False
     finally:
         if connection and connection.is_connected():
@@ -1141,36 +2770,17 @@ def is_duplicate_account_record(record, exclude_id=None):
         return False
 
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # 构建查询条件 - 检查主要字段是否相同
-        query = """
-            SELECT id FROM daily_accounts 
-            WHERE record_type = %s 
-            AND category = %s 
-            AND subcategory = %s 
-            AND amount = %s 
-            AND account_date = %s 
-            AND owner = %s
-        """
-        params = [
+        # 检查主要字段是否相同；更新操作时排除当前记录（新增时传0，不排除任何记录）
+        cursor = execute_prepared(connection, 'account_duplicate', (
             record['record_type'],
             record['category'],
             record['subcategory'] or '',  # 处理None值
             record['amount'],
             record['account_date'],
-            record['owner']
-        ]
-        
-        # 如果是更新操作，排除当前记录
-        if exclude_id:
-            query += " AND id != %s"
-            params.append(exclude_id)
-        
-        cursor.execute(query, params)
-        result = cursor.fetchone()
-        
-        return result is not None
+            record['owner'],
+            exclude_id or 0
+        ))
+        return len(cursor.fetchall()) > 0
         
     except Error as e:
         logger.error(f"检查重复记录错误: {e}")
@@ -1186,8 +2796,7 @@ def save_account_record(record):
         return False
 
     try:
-        cursor = connection.cursor()
-
+        connection.savepoint()
         account_date = record.get('account_date', '')
         if account_date == '':
             account_date = None
@@ -1195,18 +2804,23 @@ def save_account_record(record):
         is_update = 'id' in record and record['id']
         record_id = record.get('id')
 
+        # 更新时先取原记录，汇总计数要先移出原记录；记录不存在时不写入
+        old_row = None
+        if is_update:
+            cursor = connection.cursor()
+            cursor.execute("SELECT record_type, amount FROM daily_accounts WHERE id = %s", (record['id'],))
+            old_row = cursor.fetchone()
+            cursor.close()
+            if old_row is None:
+                return 'not_found'
+
         # 检查是否重复（更新时排除当前记录）
         if is_duplicate_account_record(record, exclude_id=record_id):
             logger.info(f"发现重复记录: {record}")
             return 'duplicate'
 
         if is_update:
-            cursor.execute("""
-                UPDATE daily_accounts 
-                SET record_type = %s, category = %s, subcategory = %s, amount = %s, 
-                    account_date = %s, description = %s, payment_method = %s, owner = %s
-                WHERE id = %s
-            """, (
+            execute_prepared(connection, 'account_update', (
                 record['record_type'], record['category'], record['subcategory'], 
                 record['amount'], account_date, record['description'], 
                 record['payment_method'], record['owner'], record['id']
@@ -1215,11 +2829,7 @@ def save_account_record(record):
             operation_details = f"修改记账记录 - 类别: {record['category']}, 金额: {record['amount']}"
             record_id = record['id']
         else:
-            cursor.execute("""
-                INSERT INTO daily_accounts 
-                (record_type, category, subcategory, amount, account_date, description, payment_method, owner)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
+            cursor = execute_prepared(connection, 'account_insert', (
                 record['record_type'], record['category'], record['subcategory'], 
                 record['amount'], account_date, record['description'], 
                 record['payment_method'], record['owner']
@@ -1228,19 +2838,151 @@ def save_account_record(record):
             operation_details = f"添加记账记录 - 类别: {record['category']}, 金额: {record['amount']}"
             record_id = cursor.lastrowid
 
-        connection.commit()
+        # 汇总计数随记录一起写入
+        cursor = connection.cursor()
+        if old_row:
+            apply_account_summary_delta(cursor, old_row[0], old_row[1], -1)
+        apply_account_summary_delta(cursor, record['record_type'], record['amount'], 1)
         cursor.close()
 
+        connection.commit()
+
         # 记录操作日志
         log_operation(operation_type, operation_details, record_id, record_data=record)
         return True
     except Error as e:
         logger.error(f"保存记账记录错误: {e}")
+        connection.rollback()
         return False
     finally:
         if connection and connection.is_connected():
             connection.close()
 
+def parse_account_record(data):
+    """校验并整理记账记录请求数据，返回 (record, 错误信息)"""
+    if not isinstance(data, dict):
+        return None, '记录格式错误'
+
+    category = data.get('category')
+    if not category or not str(category).strip():
+        return None, '类别不能为空'
+
+    try:
+        amount = float(data['amount'])
+    except (KeyError, ValueError, TypeError):
+        return None, '金额格式错误'
+    if not math.isfinite(amount):
+        return None, '金额格式错误'
+    if amount <= 0:
+        return None, '金额必须大于0'
+
+    account_date = data.get('account_date')
+    if not account_date or not str(account_date).strip():
+        return None, '日期不能为空'
+    account_date = str(account_date).strip()
+    try:
+        # 统一为 YYYY-MM-DD，便于重复判断和日期比较
+        account_date = datetime.strptime(account_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None, '日期格式错误'
+
+    record_type = data.get('record_type', '支出')
+    if record_type not in ('支出', '收入'):
+        return None, '记录类型必须为支出或收入'
+
+    owner = data.get('owner', '郭宁')
+    if not isinstance(owner, str):
+        return None, '所属人格式错误'
+
+    return {
+        'record_type': record_type,
+        'owner': owner,
+        'category': str(category).strip(),
+        'subcategory': str(data.get('subcategory') or '').strip(),
+        'amount': amount,
+        'account_date': account_date,
+        'description': str(data.get('description') or '').strip(),
+        'payment_method': data.get('payment_method', '现金')
+    }, None
+
+def account_record_key(record):
+    """记账记录的重复判断键（与 is_duplicate_account_record 的比较字段一致）"""
+    account_date = record['account_date']
+    if isinstance(account_date, (date, datetime)):
+        account_date = account_date.strftime('%Y-%m-%d')
+    return (
+        record['record_type'],
+        record['category'],
+        record['subcategory'] or '',
+        round(float(record['amount']), 2),
+        str(account_date),
+        record['owner']
+    )
+
+def save_account_records_bulk(records, user_name="admin"):
+    """批量保存记账记录：一次查询判断重复，多行插入，写一条汇总日志
+
+    返回每条记录的状态列表（created/duplicate），数据库出错时返回 None。
+    """
+    connection = create_connection()
+    if not connection:
+        return None
+
+    try:
+        connection.savepoint()
+        cursor = connection.cursor()
+
+        # 一次查询取出同日期、同所属人的已有记录，在内存中按重复判断键比对
+        dates = sorted({record['account_date'] for record in records})
+        owners = sorted({record['owner'] for record in records})
+        cursor.execute(f"""
+            SELECT record_type, category, subcategory, amount, account_date, owner
+            FROM daily_accounts
+            WHERE account_date IN ({', '.join(['%s'] * len(dates))})
+            AND owner IN ({', '.join(['%s'] * len(owners))})
+        """, dates + owners)
+        existing_keys = {
+            account_record_key(dict(zip(('record_type', 'category', 'subcategory', 'amount', 'account_date', 'owner'), row)))
+            for row in cursor.fetchall()
+        }
+
+        statuses = []
+        rows = []
+        for record in records:
+            key = account_record_key(record)
+            if key in existing_keys:
+                statuses.append('duplicate')
+                continue
+            # 同一批次内的重复记录也只保存一条
+            existing_keys.add(key)
+            statuses.append('created')
+            rows.append((
+                record['record_type'], record['category'], record['subcategory'],
+                record['amount'], record['account_date'], record['description'],
+                record['payment_method'], record['owner']
+            ))
+
+        if rows:
+            # 普通游标的 executemany 会把 INSERT ... VALUES 合并为一条多行插入
+            cursor.executemany(PREPARED_STATEMENTS['account_insert'], rows)
+            for record_type in {row[0] for row in rows}:
+                typed = [row for row in rows if row[0] == record_type]
+                apply_account_summary_delta(cursor, record_type, sum(Decimal(str(row[3])) for row in typed),
+                                            1, count=len(typed))
+        connection.commit()
+        cursor.close()
+
+        duplicate_count = statuses.count('duplicate')
+        log_operation("ADD", f"批量添加记账记录 - 成功: {len(rows)}条, 重复: {duplicate_count}条", user_name=user_name)
+        return statuses
+    except Error as e:
+        logger.error(f"批量保存记账记录错误: {e}")
+        connection.rollback()
+        return None
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
 def delete_account_record_by_id(record_id):
     """根据ID删除记账记录"""
     connection = create_connection()
@@ -1248,12 +2990,15 @@ def delete_account_record_by_id(record_id):
         return False
 
     try:
+        connection.savepoint()
         # 先获取记录信息用于日志
         cursor = connection.cursor(dictionary=True)
         cursor.execute("SELECT * FROM daily_accounts WHERE id = %s", (record_id,))
         record = cursor.fetchone()
 
         cursor.execute("DELETE FROM daily_accounts WHERE id = %s", (record_id,))
+        if record:
+            apply_account_summary_delta(cursor, record['record_type'], record['amount'], -1)
         connection.commit()
         cursor.close()
 
@@ -1267,6 +3012,7 @@ def delete_account_record_by_id(record_id):
         return True
     except Error as e:
         logger.error(f"删除记账记录错误: {e}")
+        connection.rollback()
         return False
     finally:
         if connection and connection.is_connected():
@@ -1317,128 +3063,252 @@ def load_account_records():
         if connection and connection.is_connected():
             connection.close()
 
+# ===================== 记账筛选条件 =====================
+ACCOUNT_FILTER_FIELDS = ('record_type', 'category', 'subcategory', 'owner', 'start_date', 'end_date')
+
+class AccountFilter(namedtuple('AccountFilter', ACCOUNT_FILTER_FIELDS)):
+    """记账记录的筛选条件（不可变）：'全部' 和空值统一为 None，相同条件生成相同的 SQL 和缓存键"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_mapping(cls, data, fields=ACCOUNT_FILTER_FIELDS):
+        """从请求参数或 JSON 解析筛选条件，只取 fields 中的字段"""
+        values = dict.fromkeys(ACCOUNT_FILTER_FIELDS)
+        for field in fields:
+            value = str((data or {}).get(field) or '').strip()
+            if value and value != '全部':
+                values[field] = value
+        for field in ('start_date', 'end_date'):
+            # 日期统一为 YYYY-MM-DD，'2024-1-5' 与 '2024-01-05' 视为同一条件
+            try:
+                values[field] = datetime.strptime(values[field], '%Y-%m-%d').strftime('%Y-%m-%d')
+            except (TypeError, ValueError):
+                pass
+        return cls(**values)
+
+    def where(self):
+        """WHERE 子句（不含 WHERE）和参数，没有条件时为 1=1"""
+        conditions = ["1=1"]
+        params = []
+        for field in ('record_type', 'category', 'subcategory', 'owner'):
+            value = getattr(self, field)
+            if value is not None:
+                conditions.append(f"{field} = %s")
+                params.append(value)
+        if self.start_date and self.end_date:
+            conditions.append("account_date BETWEEN %s AND %s")
+            params.extend([self.start_date, self.end_date])
+        elif self.start_date:
+            conditions.append("account_date >= %s")
+            params.append(self.start_date)
+        elif self.end_date:
+            conditions.append("account_date <= %s")
+            params.append(self.end_date)
+        return " AND ".join(conditions), params
+
+    def cache_key(self, *parts):
+        """筛选条件的规范哈希，parts 用于区分同一条件下的不同查询"""
+        payload = json.dumps([list(self), list(parts)], ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class WriteGeneration:
+    """数据写入代数：每次写入加一，缓存键带上代数，写入后旧的缓存结果不再命中"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+
+
+account_data_generation = WriteGeneration()
+
+# 记账列表合计、统计、导出按筛选条件共用的查询结果缓存。
+# 写入代数只在本进程内递增：多进程部署时，其他进程在写入后最多 60 秒内仍可能返回旧的合计和统计；
+# 写入过的会话在这段时间内不使用缓存，始终能读到自己的写入。
+account_query_cache = TTLCache(ttl_seconds=60)
+
+def account_cache_key(kind, account_filter, *parts):
+    """缓存键：查询种类、筛选条件哈希、读取来源（主库/副本）和写入代数；返回 None 表示本次不使用缓存"""
+    source = 'primary'
+    if has_request_context():
+        if time.time() - session.get('db_last_write_at', 0) <= account_query_cache.ttl_seconds:
+            return None
+        if _use_read_replica():
+            # 副本结果可能滞后，与主库结果分开缓存
+            source = 'replica'
+    return (kind, source, account_filter.cache_key(*parts), account_data_generation.value)
+
+def account_cache_get(key):
+    return account_query_cache.get(key) if key is not None else None
+
+def account_cache_set(key, value):
+    if key is not None:
+        account_query_cache.set(key, value)
+
+def mark_account_data_changed():
+    """记账数据有写入：立即让缓存失效；请求内的写入在事务提交后再失效一次，避免提交前读到的旧结果被缓存"""
+    account_data_generation.bump()
+    if has_request_context():
+        g.account_data_changed = True
+
+def account_totals_query(account_filter):
+    """按记录类型分组的条数和金额合计查询，返回 (SQL, 参数)"""
+    where_clause, params = account_filter.where()
+    return f"""
+        SELECT record_type, COUNT(*) as record_count, COALESCE(SUM(amount), 0) as amount_sum
+        FROM daily_accounts 
+        WHERE {where_clause}
+        GROUP BY record_type
+    """, params
+
+def account_search_totals(cursor, account_filter):
+    """按记录类型分组聚合一次，得到条数、支出合计和收入合计（按筛选条件缓存）"""
+    key = account_cache_key('totals', account_filter)
+    cached = account_cache_get(key)
+    if cached is not None:
+        return dict(cached)
+
+    cursor.execute(*account_totals_query(account_filter))
+    totals = {row['record_type']: row for row in cursor.fetchall()}
+    total_expense = float(totals['支出']['amount_sum']) if '支出' in totals else 0.0
+    total_income = float(totals['收入']['amount_sum']) if '收入' in totals else 0.0
+    result = {
+        'total_count': sum(int(row['record_count']) for row in totals.values()),
+        'total_expense': total_expense,
+        'total_income': total_income,
+        'net_amount': total_income - total_expense
+    }
+    account_cache_set(key, result)
+    return dict(result)
+
 # ===================== 修复：高级统计功能 =====================
 # 在app.py中找到get_account_statistics_by_period函数，修改以下部分：
 
 # ===================== 修复：高级统计功能 =====================
-def get_account_statistics_by_period(stat_type, start_date=None, end_date=None, owner=None):
-    """按时间段统计记账数据（优化版）"""
-    connection = create_connection()
-    if not connection:
-        return []
-
-    try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # 构建查询条件
-        where_conditions = []
-        params = []
-        
-        if start_date:
-            where_conditions.append("account_date >= %s")
-            params.append(start_date)
-        
-        if end_date:
-            where_conditions.append("account_date <= %s")
-            params.append(end_date)
-            
-        if owner and owner != "全部":
-            where_conditions.append("owner = %s")
-            params.append(owner)
-        
-        where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-        
-        # 使用更高效的查询
-        if stat_type == "monthly":
-            # 修复按月统计查询 - 确保返回正确的字段名和格式
-            query = f"""
-                SELECT 
-                    CONCAT(YEAR(account_date), '年', LPAD(MONTH(account_date), 2, '0'), '月') as period_name,
-                    CONCAT(YEAR(account_date), LPAD(MONTH(account_date), 2, '0')) as sort_key,
-                    record_type,
-                    owner,
-                    COUNT(*) as count,
-                    COALESCE(SUM(amount), 0) as total_amount
-                FROM daily_accounts 
-                {where_clause}
-                GROUP BY YEAR(account_date), MONTH(account_date), record_type, owner
-                ORDER BY sort_key DESC, record_type, owner
-            """
-        elif stat_type == "quarterly":
-            #按季度统计
-            query = f"""
-                SELECT 
-                    CONCAT(YEAR(account_date), '年第', QUARTER(account_date), '季度') as period_name,
-                    CONCAT(YEAR(account_date), LPAD(QUARTER(account_date), 2, '0')) as sort_key,
-                    record_type,
-                    owner,
-                    COUNT(*) as count,
-                    COALESCE(SUM(amount), 0) as total_amount
-                FROM daily_accounts 
-                {where_clause}
-                GROUP BY YEAR(account_date), QUARTER(account_date), record_type, owner
-                ORDER BY sort_key DESC, record_type, owner
-            """
-        elif stat_type == "yearly":
-            #按年统计
-            query = f"""
-                SELECT 
-                    CONCAT(YEAR(account_date), '年') as period_name,
-                    YEAR(account_date) as sort_key,
-                    record_type,
-                    owner,
-                    COUNT(*) as count,
-                    COALESCE(SUM(amount), 0) as total_amount
-                FROM daily_accounts 
-                {where_clause}
-                GROUP BY YEAR(account_date), record_type, owner
-                ORDER BY sort_key DESC, record_type, owner
-            """
-        elif stat_type == "category":
-            #按类别统计
-            query = f"""
-                SELECT 
-                    category as period_name,
-                    record_type,
-                    owner,
-                    COUNT(*) as count,
-                    COALESCE(SUM(amount), 0) as total_amount
-                FROM daily_accounts 
-                {where_clause}
-                GROUP BY category, record_type, owner
-                ORDER BY category, record_type, owner
-            """
-        elif stat_type == "subcategory":
-            #按子类别统计
-            query = f"""
-                SELECT 
-                    CONCAT(category, '-', subcategory) as period_name,
-                    record_type,
-                    category,
-                    subcategory,
-                    owner,
-                    COUNT(*) as count,
-                    COALESCE(SUM(amount), 0) as total_amount
-                FROM daily_accounts 
-                {where_clause}
-                GROUP BY category, subcategory, record_type, owner
-                ORDER BY category, subcategory, record_type, owner
-            """
-        elif stat_type == "owner_detail":
-            #按所属人详细统计
-            query = f"""
-                SELECT 
-                    owner as period_name,
-                    record_type,
-                    category,
-                    COUNT(*) as count,
-                    COALESCE(SUM(amount), 0) as total_amount
-                FROM daily_accounts 
-                {where_clause}
-                GROUP BY owner, record_type, category
-                ORDER BY owner, record_type, category
-            """
-        else:
+def account_period_query(stat_type, account_filter):
+    """按时间段、类别或所属人分组的统计查询，返回 (SQL, 参数)；不支持的统计类型返回 (None, None)"""
+    where_clause, params = account_filter.where()
+    where_clause = f"WHERE {where_clause}"
+
+    # 使用更高效的查询
+    if stat_type == "monthly":
+        # 修复按月统计查询 - 确保返回正确的字段名和格式
+        query = f"""
+            SELECT 
+                CONCAT(YEAR(account_date), '年', LPAD(MONTH(account_date), 2, '0'), '月') as period_name,
+                CONCAT(YEAR(account_date), LPAD(MONTH(account_date), 2, '0')) as sort_key,
+                record_type,
+                owner,
+                COUNT(*) as count,
+                COALESCE(SUM(amount), 0) as total_amount
+            FROM daily_accounts 
+            {where_clause}
+            GROUP BY YEAR(account_date), MONTH(account_date), record_type, owner
+            ORDER BY sort_key DESC, record_type, owner
+        """
+    elif stat_type == "quarterly":
+        #按季度统计
+        query = f"""
+            SELECT 
+                CONCAT(YEAR(account_date), '年第', QUARTER(account_date), '季度') as period_name,
+                CONCAT(YEAR(account_date), LPAD(QUARTER(account_date), 2, '0')) as sort_key,
+                record_type,
+                owner,
+                COUNT(*) as count,
+                COALESCE(SUM(amount), 0) as total_amount
+            FROM daily_accounts 
+            {where_clause}
+            GROUP BY YEAR(account_date), QUARTER(account_date), record_type, owner
+            ORDER BY sort_key DESC, record_type, owner
+        """
+    elif stat_type == "yearly":
+        #按年统计
+        query = f"""
+            SELECT 
+                CONCAT(YEAR(account_date), '年') as period_name,
+                YEAR(account_date) as sort_key,
+                record_type,
+                owner,
+                COUNT(*) as count,
+                COALESCE(SUM(amount), 0) as total_amount
+            FROM daily_accounts 
+            {where_clause}
+            GROUP BY YEAR(account_date), record_type, owner
+            ORDER BY sort_key DESC, record_type, owner
+        """
+    elif stat_type == "category":
+        #按类别统计
+        query = f"""
+            SELECT 
+                category as period_name,
+                record_type,
+                owner,
+                COUNT(*) as count,
+                COALESCE(SUM(amount), 0) as total_amount
+            FROM daily_accounts 
+            {where_clause}
+            GROUP BY category, record_type, owner
+            ORDER BY category, record_type, owner
+        """
+    elif stat_type == "subcategory":
+        #按子类别统计
+        query = f"""
+            SELECT 
+                CONCAT(category, '-', subcategory) as period_name,
+                record_type,
+                category,
+                subcategory,
+                owner,
+                COUNT(*) as count,
+                COALESCE(SUM(amount), 0) as total_amount
+            FROM daily_accounts 
+            {where_clause}
+            GROUP BY category, subcategory, record_type, owner
+            ORDER BY category, subcategory, record_type, owner
+        """
+    elif stat_type == "owner_detail":
+        #按所属人详细统计
+        query = f"""
+            SELECT 
+                owner as period_name,
+                record_type,
+                category,
+                COUNT(*) as count,
+                COALESCE(SUM(amount), 0) as total_amount
+            FROM daily_accounts 
+            {where_clause}
+            GROUP BY owner, record_type, category
+            ORDER BY owner, record_type, category
+        """
+    else:
+        return None, None
+    return query, params
+
+def get_account_statistics_by_period(stat_type, account_filter):
+    """按时间段统计记账数据（优化版，按筛选条件缓存）"""
+    key = account_cache_key('period', account_filter, stat_type)
+    cached = account_cache_get(key)
+    if cached is not None:
+        return cached
+
+    connection = create_connection()
+    if not connection:
+        return []
+
+    try:
+        cursor = connection.cursor(dictionary=True)
+        
+        query, params = account_period_query(stat_type, account_filter)
+        if query is None:
             return []
         
         cursor.execute(query, params)
@@ -1449,6 +3319,7 @@ def get_account_statistics_by_period(stat_type, start_date=None, end_date=None,
             result['total_amount'] = float(result['total_amount'])
         
         cursor.close()
+        account_cache_set(key, results)
         return results
         
     except Error as e:
@@ -1458,8 +3329,13 @@ def get_account_statistics_by_period(stat_type, start_date=None, end_date=None,
         if connection and connection.is_connected():
             connection.close()
 
-def get_account_summary_statistics(start_date=None, end_date=None, owner=None):
-    """获取记账数据汇总统计"""
+def get_account_summary_statistics(account_filter):
+    """获取记账数据汇总统计（按筛选条件缓存）"""
+    key = account_cache_key('summary', account_filter)
+    cached = account_cache_get(key)
+    if cached is not None:
+        return cached
+
     connection = create_connection()
     if not connection:
         return {
@@ -1472,43 +3348,16 @@ def get_account_summary_statistics(start_date=None, end_date=None, owner=None):
         cursor = connection.cursor(dictionary=True)
         
         # 构建查询条件
-        where_conditions = []
-        params = []
-        
-        if start_date:
-            where_conditions.append("account_date >= %s")
-            params.append(start_date)
-        
-        if end_date:
-            where_conditions.append("account_date <= %s")
-            params.append(end_date)
-            
-        if owner and owner != "全部":
-            where_conditions.append("owner = %s")
-            params.append(owner)
-        
-        where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-        
-        # 总统计
-        total_query = f"""
-            SELECT 
-                COUNT(*) as total_count,
-                COALESCE(SUM(CASE WHEN record_type = '支出' THEN amount ELSE 0 END), 0) as total_expense,
-                COALESCE(SUM(CASE WHEN record_type = '收入' THEN amount ELSE 0 END), 0) as total_income
-            FROM daily_accounts 
-            {where_clause}
-        """
-        
-        cursor.execute(total_query, params)
-        total_stats = cursor.fetchone()
-        
-        # 确保所有字段都有默认值
-        if total_stats:
-            total_stats['total_count'] = total_stats.get('total_count', 0) or 0
-            total_stats['total_expense'] = float(total_stats.get('total_expense', 0) or 0)
-            total_stats['total_income'] = float(total_stats.get('total_income', 0) or 0)
-        else:
-            total_stats = {'total_count': 0, 'total_expense': 0.0, 'total_income': 0.0}
+        where_clause, params = account_filter.where()
+        where_clause = f"WHERE {where_clause}"
+        
+        # 总统计（与记账列表的合计共用缓存）
+        totals = account_search_totals(cursor, account_filter)
+        total_stats = {
+            'total_count': totals['total_count'],
+            'total_expense': totals['total_expense'],
+            'total_income': totals['total_income']
+        }
         
         # 按所属人统计
         owner_query = f"""
@@ -1544,11 +3393,13 @@ def get_account_summary_statistics(start_date=None, end_date=None, owner=None):
         
         cursor.close()
         
-        return {
+        summary = {
             'total': total_stats,
             'by_owner': owner_stats,
             'by_category': category_stats
         }
+        account_cache_set(key, summary)
+        return summary
         
     except Error as e:
         logger.error(f"汇总统计查询错误: {e}")
@@ -1725,10 +3576,14 @@ def change_security_question():
             
 @app.route('/api/event_statistics')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_event_statistics():
-    """获取事件金额统计（基于整个数据库）"""
+    """获取事件金额统计（基于整个数据库）：先在事件字典中匹配事件名称，再按事件汇总，相关记录分页返回"""
+    connection = None
     try:
         event_name = request.args.get('event_name', '').strip()
+        page, per_page = get_page_args(default_per_page=100)
         
         if not event_name:
             return jsonify({'success': False, 'message': '事件名称不能为空'})
@@ -1739,46 +3594,54 @@ def get_event_statistics():
 
         cursor = connection.cursor(dictionary=True)
         
-        # 获取数据库中所有记录来计算事件统计
-        cursor.execute("""
-            SELECT id, record_type, name, amount, occasion, date, 
-                   has_returned, return_amount, return_occasion, return_date, remark, owner
-            FROM gift_records 
-        """)
-        all_records = cursor.fetchall()
-        
-        # 筛选相关记录
-        related_records = []
-        
-        # 1. 筛选受礼记录中事件名称包含输入事件名称的记录
-        gift_records = [r for r in all_records if 
-                       r["record_type"] == "受礼记录" and 
-                       r["occasion"] and event_name in r["occasion"]]
-        
-        # 2. 筛选随礼记录中回礼事件包含输入事件名称的记录
-        return_records = [r for r in all_records if 
-                         r["record_type"] == "随礼记录" and 
-                         r["return_occasion"] and event_name in r["return_occasion"]]
-        
-        # 合并相关记录
-        related_records.extend(gift_records)
-        related_records.extend(return_records)
-        
-        if not related_records:
+        occasions = find_occasions(cursor, event_name)
+        if not occasions:
             cursor.close()
             return jsonify({
                 'success': False, 
                 'message': f'没有找到与"{event_name}"相关的记录'
             })
+
+        # 受礼记录按事件名称匹配，随礼记录按回礼事件匹配
+        placeholders = ", ".join(["%s"] * len(occasions))
+        where_clause = f"""
+            (record_type = '受礼记录' AND occasion IN ({placeholders}))
+            OR (record_type = '随礼记录' AND return_occasion IN ({placeholders}))
+        """
+        params = occasions + occasions
+
+        cursor.execute(f"""
+            SELECT COUNT(*) AS records_count,
+                   COALESCE(SUM(CASE WHEN record_type = '受礼记录' THEN amount ELSE 0 END), 0) AS gift_amount,
+                   COALESCE(SUM(CASE WHEN record_type = '随礼记录' THEN return_amount ELSE 0 END), 0) AS return_amount
+            FROM gift_records
+            WHERE {where_clause}
+        """, params)
+        summary = cursor.fetchone()
+        records_count = summary['records_count']
         
-        # 计算受礼总额（受礼记录中的金额）
-        gift_amount = sum(float(r["amount"]) for r in gift_records)
+        if not records_count:
+            cursor.close()
+            return jsonify({
+                'success': False, 
+                'message': f'没有找到与"{event_name}"相关的记录'
+            })
         
-        # 计算回礼总额（随礼记录中的回礼金额）
-        return_amount = sum(float(r.get("return_amount", 0)) for r in return_records)
+        gift_amount = float(summary['gift_amount'])
+        return_amount = float(summary['return_amount'])
         
         # 计算总金额
         total_amount = gift_amount + return_amount
+
+        cursor.execute(f"""
+            SELECT id, record_type, name, amount, occasion, date, 
+                   has_returned, return_amount, return_occasion, return_date, remark, owner
+            FROM gift_records
+            WHERE {where_clause}
+            ORDER BY date DESC, id DESC
+            LIMIT %s OFFSET %s
+        """, params + [per_page, (page - 1) * per_page])
+        related_records = cursor.fetchall()
         
         # 处理日期格式
         for record in related_records:
@@ -1794,8 +3657,11 @@ def get_event_statistics():
             'gift_amount': gift_amount,
             'return_amount': return_amount,
             'total_amount': total_amount,
-            'records_count': len(related_records),
-            'related_records': related_records
+            'records_count': records_count,
+            'related_records': related_records,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': (records_count + per_page - 1) // per_page
         })
         
     except Error as e:
@@ -1806,17 +3672,59 @@ def get_event_statistics():
             connection.close()
 
 # ===================== 新增：回礼记录统计API =====================
+def return_records_where(start_date, end_date, owner):
+    """回礼记录统计的筛选条件，返回 (WHERE 子句, 参数)"""
+    # 构建查询条件
+    where_conditions = ["date BETWEEN %s AND %s"]
+    params = [start_date, end_date]
+    
+    # 添加所属人筛选
+    if owner != "全部":
+        where_conditions.append("owner = %s")
+        params.append(owner)
+    
+    # 查询条件：回礼事件不为空
+    # 包括：1. 随礼记录（回礼事件不为空） 2. 受礼记录（回礼事件不为空）
+    where_conditions.append("(return_occasion IS NOT NULL AND return_occasion != '')")
+    return " AND ".join(where_conditions), params
+
+def return_records_page_query(where_clause, params, per_page, after=None):
+    """回礼记录按 (date, id) 游标取一页（多取一行判断是否还有下一页），返回 (SQL, 参数)"""
+    params = list(params)
+    if after:
+        condition, condition_params = keyset_condition(('date', 'id'), after, descending=True)
+        where_clause += f" AND {condition}"
+        params.extend(condition_params)
+    return f"""
+        SELECT id, record_type, name, amount, occasion, date, 
+               has_returned, return_amount, return_occasion, return_date, remark, owner
+        FROM gift_records 
+        WHERE {where_clause}
+        ORDER BY date DESC, id DESC
+        LIMIT %s
+    """, params + [per_page + 1]
+
 @app.route('/api/return_records/statistics')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_return_records_statistics():
-    """获取回礼记录统计"""
+    """获取回礼记录统计：合计在数据库中按类型汇总，记录按 (date, id) 游标分页返回"""
+    connection = None
     try:
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         owner = request.args.get('owner', '全部')
+        _, per_page = get_page_args(default_per_page=100)
+        page_cursor = request.args.get('cursor', '')
         
         if not start_date or not end_date:
             return jsonify({'success': False, 'message': '请选择开始日期和结束日期'})
+
+        try:
+            after = decode_page_cursor(page_cursor, 2) if page_cursor else None
+        except ValueError:
+            return jsonify({'success': False, 'message': '分页游标无效'}), 400
         
         logger.info(f"回礼记录统计 - 开始日期: {start_date}, 结束日期: {end_date}, 所属人: {owner}")
         
@@ -1826,42 +3734,30 @@ def get_return_records_statistics():
         
         cursor = connection.cursor(dictionary=True)
         
-        # 构建查询条件
-        where_conditions = ["date BETWEEN %s AND %s"]
-        params = [start_date, end_date]
-        
-        # 添加所属人筛选
-        if owner != "全部":
-            where_conditions.append("owner = %s")
-            params.append(owner)
-        
-        # 查询条件：回礼事件不为空
-        # 包括：1. 随礼记录（回礼事件不为空） 2. 受礼记录（回礼事件不为空）
-        where_conditions.append("(return_occasion IS NOT NULL AND return_occasion != '')")
-        
-        where_clause = " AND ".join(where_conditions)
+        where_clause, params = return_records_where(start_date, end_date, owner)
         
-        # 查询符合条件的记录
-        query = f"""
-            SELECT id, record_type, name, amount, occasion, date, 
-                   has_returned, return_amount, return_occasion, return_date, remark, owner
+        # 计算总支出金额
+        # 随礼记录：支出金额 = 金额；受礼记录：支出金额 = 回礼金额
+        cursor.execute(f"""
+            SELECT COUNT(*) AS records_count,
+                   SUM(CASE WHEN record_type = '随礼记录' THEN 1 ELSE 0 END) AS return_gift_count,
+                   SUM(CASE WHEN record_type = '受礼记录' THEN 1 ELSE 0 END) AS gift_count,
+                   COALESCE(SUM(CASE WHEN record_type = '随礼记录' THEN amount ELSE 0 END), 0) AS return_gift_amount,
+                   COALESCE(SUM(CASE WHEN record_type = '受礼记录' THEN COALESCE(return_amount, 0) ELSE 0 END), 0) AS gift_return_amount
             FROM gift_records 
             WHERE {where_clause}
-            ORDER BY date DESC
-        """
+        """, params)
+        summary = cursor.fetchone()
+        return_gift_amount = float(summary['return_gift_amount'])
+        gift_return_amount = float(summary['gift_return_amount'])
         
-        cursor.execute(query, params)
+        # 查询当前页的记录
+        cursor.execute(*return_records_page_query(where_clause, params, per_page, after))
         records = cursor.fetchall()
-        
-        # 计算总支出金额
-        total_amount = 0.0
-        for record in records:
-            if record['record_type'] == '随礼记录':
-                # 随礼记录：支出金额 = 金额
-                total_amount += float(record['amount'])
-            elif record['record_type'] == '受礼记录' and record['return_amount']:
-                # 受礼记录：支出金额 = 回礼金额
-                total_amount += float(record['return_amount'] or 0)
+        next_cursor = None
+        if len(records) > per_page:
+            records = records[:per_page]
+            next_cursor = encode_page_cursor(records[-1]['date'], records[-1]['id'])
         
         # 格式化记录数据
         formatted_records = []
@@ -1882,13 +3778,17 @@ def get_return_records_statistics():
             formatted_records.append(formatted_record)
         
         cursor.close()
-        connection.close()
         
         return jsonify({
             'success': True,
-            'records_count': len(records),
-            'total_amount': total_amount,
+            'records_count': summary['records_count'],
+            'total_amount': return_gift_amount + gift_return_amount,
+            'amount_by_type': {
+                '随礼记录': {'count': int(summary['return_gift_count'] or 0), 'amount': return_gift_amount},
+                '受礼记录': {'count': int(summary['gift_count'] or 0), 'amount': gift_return_amount}
+            },
             'records': formatted_records,
+            'next_cursor': next_cursor,
             'query_params': {
                 'start_date': start_date,
                 'end_date': end_date,
@@ -1902,9 +3802,14 @@ def get_return_records_statistics():
     except Exception as e:
         logger.error(f"回礼记录统计异常: {str(e)}")
         return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
 
 @app.route('/api/return_records/statistics/export')
 @login_required
+@query_budget('export')
+@read_replica
 def export_return_records_statistics():
     """导出回礼记录统计结果"""
     try:
@@ -2065,16 +3970,130 @@ def export_return_records_statistics():
         if connection and connection.is_connected():
             connection.close()
 
+# 列表排序方式对应的 ORDER BY 列（最后一列为 id，保证顺序唯一，可用于游标分页）
+RECORD_SORTS = {
+    '按记录类型排序': (('record_type', 'date', 'id'), True),
+    '按姓名首字母排序': (('name_pinyin_key', 'name', 'id'), False),
+    '按时间降序': (('date', 'id'), True),
+    '按金额降序': (('amount', 'id'), True),
+}
+RECORD_DEFAULT_SORT = (('id',), False)
+
+RECORD_COLUMNS = """id, record_type, name, amount, occasion, date, 
+                   has_returned, return_amount, return_occasion, return_date, remark, owner"""
+
+@schema_migration('0002_gift_records_sort_indexes')
+def migrate_gift_records_sort_indexes(cursor):
+    """礼金记录列表各排序方式使用的索引"""
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_type_date', 'record_type, date')
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_date', 'date')
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_amount', 'amount')
+
+@schema_migration('0003_gift_records_name_pinyin_key')
+def migrate_gift_records_name_pinyin_key(cursor):
+    """姓名拼音首字母排序键：写入时计算并保存，按姓名排序直接走索引"""
+    storage.add_column(cursor, 'gift_records', 'name_pinyin_key', "VARCHAR(100) NOT NULL DEFAULT ''")
+
+    cursor.execute("SELECT id, name FROM gift_records")
+    rows = cursor.fetchall()
+    for start in range(0, len(rows), 500):
+        cursor.executemany("UPDATE gift_records SET name_pinyin_key = %s WHERE id = %s",
+                           [(get_pinyin_sort_key(name), record_id) for record_id, name in rows[start:start + 500]])
+
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_name_pinyin', 'name_pinyin_key, name')
+
+# 完成状态，与 calculate_completion_status 的规则一致
+COMPLETION_STATUS_EXPRESSION = """
+    CASE
+        WHEN name <> '' AND amount > 0 AND occasion <> '' AND date IS NOT NULL THEN
+            CASE
+                WHEN return_amount > 0 AND return_occasion <> '' AND return_date IS NOT NULL THEN '已完成'
+                WHEN record_type = '受礼记录' THEN '仅受礼'
+                WHEN record_type = '随礼记录' THEN '仅随礼'
+                ELSE '未完成'
+            END
+        ELSE '未完成'
+    END
+"""
+
+@schema_migration('0004_gift_records_completion_status')
+def migrate_gift_records_completion_status(cursor):
+    """完成状态生成列，按完成状态筛选、计数和分页都在数据库中完成"""
+    storage.add_column(cursor, 'gift_records', 'completion_status',
+                       f"VARCHAR(10) GENERATED ALWAYS AS ({COMPLETION_STATUS_EXPRESSION}) "
+                       f"{storage.generated_column_storage}")
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_owner_type_status',
+                         'owner, record_type, completion_status')
+
+@schema_migration('0005_gift_name_index')
+def migrate_gift_name_index(cursor):
+    """姓名检索词表：支持拼音首字母、全拼前缀和汉字子串检索"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS gift_name_index (
+            term VARCHAR(100) NOT NULL,
+            record_id INT NOT NULL,
+            PRIMARY KEY (term, record_id)
+        )
+    """)
+    storage.create_index(cursor, 'gift_name_index', 'idx_gift_name_index_record', 'record_id')
+
+    cursor.execute("SELECT id, name FROM gift_records")
+    for record_id, name in cursor.fetchall():
+        update_name_index(cursor, record_id, name)
+
+@schema_migration('0006_gift_occasions')
+def migrate_gift_occasions(cursor):
+    """事件字典及按事件汇总使用的索引"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS gift_occasions (
+            occasion VARCHAR(100) PRIMARY KEY
+        )
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO gift_occasions (occasion)
+        SELECT DISTINCT occasion FROM gift_records WHERE occasion IS NOT NULL AND occasion <> ''
+        UNION
+        SELECT DISTINCT return_occasion FROM gift_records WHERE return_occasion IS NOT NULL AND return_occasion <> ''
+    """)
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_type_occasion', 'record_type, occasion')
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_type_return_occasion', 'record_type, return_occasion')
+
+@schema_migration('0008_gift_records_date_owner_return')
+def migrate_gift_records_date_owner_return(cursor):
+    """回礼记录统计按日期范围、所属人筛选回礼事件非空的记录"""
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_date_owner_return',
+                         'date, owner, return_occasion')
+
 # 修改加载记录函数，添加分页
+def gift_page_query(columns, descending, page, per_page, after=None):
+    """礼金列表一页的查询（多取一行判断是否还有下一页），返回 (SQL, 参数)
+
+    排序列不一定都在返回字段中（如拼音排序键），以 sort_0、sort_1… 单独取出用于生成游标。
+    """
+    direction = 'DESC' if descending else 'ASC'
+    where_clause, params = keyset_condition(columns, after, descending) if after else ("1=1", [])
+    query = f"""
+        SELECT {RECORD_COLUMNS}, {", ".join(f"{c} AS sort_{i}" for i, c in enumerate(columns))}
+        FROM gift_records
+        WHERE {where_clause}
+        ORDER BY {", ".join(f"{c} {direction}" for c in columns)}
+        LIMIT %s
+    """
+    params.append(per_page + 1)
+    if not after:
+        query += " OFFSET %s"
+        params.append((page - 1) * per_page)
+    return query, params
+
 @app.route('/api/records')
 @login_required
 def get_records():
-    """获取记录（带分页）"""
+    """获取记录（带分页），排序和分页在数据库中完成，支持游标分页"""
     try:
         # 获取分页参数
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        page, per_page = get_page_args(default_per_page=50)
         sort_method = request.args.get('sort_method', '按记录类型排序')
+        page_cursor = request.args.get('cursor', '')
         
         logger.info(f"获取记录请求 - 页码: {page}, 每页: {per_page}, 排序方式: {sort_method}")
         
@@ -2084,49 +4103,32 @@ def get_records():
 
         cursor = connection.cursor(dictionary=True)
         
-        # 获取所有记录
-        cursor.execute("""
-            SELECT id, record_type, name, amount, occasion, date, 
-                   has_returned, return_amount, return_occasion, return_date, remark, owner
-            FROM gift_records 
-        """)
-        all_records = cursor.fetchall()
-        
         # 获取总记录数
-        total = len(all_records)
+        cursor.execute("SELECT COUNT(*) as total FROM gift_records")
+        total = cursor.fetchone()['total']
+
+        columns, descending = RECORD_SORTS.get(sort_method, RECORD_DEFAULT_SORT)
+        after = None
+        if page_cursor:
+            try:
+                after = decode_page_cursor(page_cursor, len(columns))
+            except ValueError:
+                cursor.close()
+                return jsonify({'error': '分页游标无效'}), 400
+
+        cursor.execute(*gift_page_query(columns, descending, page, per_page, after))
+        paginated_records = cursor.fetchall()
+        next_cursor = None
+        if len(paginated_records) > per_page:
+            paginated_records = paginated_records[:per_page]
+            last = paginated_records[-1]
+            next_cursor = encode_page_cursor(*(last[f"sort_{i}"] for i in range(len(columns))))
+        for record in paginated_records:
+            for i in range(len(columns)):
+                del record[f"sort_{i}"]
         
         cursor.close()
 
-        # 根据排序方式排序
-        if sort_method == '按记录类型排序':
-            all_records.sort(key=lambda x: (x['record_type'], x['date']), reverse=True)
-        elif sort_method == '按姓名首字母排序':
-            if HAS_PINYIN:
-                from pypinyin import lazy_pinyin
-                
-                def get_pinyin_sort_key(name):
-                    if not name:
-                        return ''
-                    try:
-                        pinyin_list = lazy_pinyin(name, style=Style.FIRST_LETTER)
-                        return ''.join([p[0].upper() for p in pinyin_list if p])
-                    except Exception as e:
-                        logger.error(f"拼音转换错误: {e}")
-                        return name
-                
-                all_records.sort(key=lambda x: get_pinyin_sort_key(x['name']))
-            else:
-                all_records.sort(key=lambda x: x['name'] or '')
-        elif sort_method == '按时间降序':
-            all_records.sort(key=lambda x: x['date'] or '', reverse=True)
-        elif sort_method == '按金额降序':
-            all_records.sort(key=lambda x: float(x['amount']), reverse=True)
-        
-        # 分页处理
-        start_idx = (page - 1) * per_page
-        end_idx = min(start_idx + per_page, total)
-        paginated_records = all_records[start_idx:end_idx]
-        
         # 处理记录数据
         for record in paginated_records:
             record['id'] = int(record['id'])
@@ -2163,7 +4165,8 @@ def get_records():
             'total': total,
             'page': page,
             'per_page': per_page,
-            'total_pages': total_pages
+            'total_pages': total_pages,
+            'next_cursor': next_cursor
         })
     except Error as e:
         logger.error(f"加载记录错误: {e}")
@@ -2172,6 +4175,44 @@ def get_records():
         if connection and connection.is_connected():
             connection.close()
 
+def build_gift_search_filter(data):
+    """根据搜索条件生成 gift_records 的 WHERE 子句和参数，搜索列表与搜索统计共用"""
+    conditions = []
+    params = []
+
+    # 记录类型筛选
+    record_type_filter = data.get('record_type', '全部')
+    if record_type_filter != '全部':
+        conditions.append("record_type = %s")
+        params.append(record_type_filter)
+
+    # 姓名筛选
+    name_filter = data.get('name', '').strip()
+    if name_filter:
+        condition, condition_params = name_search_condition(name_filter)
+        conditions.append(condition)
+        params.extend(condition_params)
+
+    # 日期筛选
+    date_filter = data.get('date', '').strip()
+    if date_filter:
+        conditions.append("date = %s")
+        params.append(date_filter)
+
+    # 所属人筛选
+    owner_filter = data.get('owner', '全部')
+    if owner_filter != '全部':
+        conditions.append("owner = %s")
+        params.append(owner_filter)
+
+    # 完成状态筛选
+    status_filter = data.get('completion_status', '全部')
+    if status_filter != '全部':
+        conditions.append("completion_status = %s")
+        params.append(status_filter)
+
+    return " AND ".join(conditions) or "1=1", params
+
 @app.route('/api/records/search', methods=['POST'])
 @login_required
 def search_records():
@@ -2180,8 +4221,7 @@ def search_records():
         data = request.json
         
         # 获取分页参数
-        page = data.get('page', 1)
-        per_page = data.get('per_page', 50)
+        page, per_page = get_page_args(data, default_per_page=50)
         
         logger.info(f"搜索记录请求 - 页码: {page}, 每页: {per_page}, 搜索条件: {data}")
         
@@ -2192,42 +4232,14 @@ def search_records():
         cursor = connection.cursor(dictionary=True)
         
         # 构建查询
-        query = """
+        where_clause, params = build_gift_search_filter(data)
+        query = f"""
             SELECT id, record_type, name, amount, occasion, date, 
                    has_returned, return_amount, return_occasion, return_date, remark, owner
             FROM gift_records 
-            WHERE 1=1
+            WHERE {where_clause}
         """
-        count_query = "SELECT COUNT(*) as total FROM gift_records WHERE 1=1"
-        params = []
-
-        # 记录类型筛选
-        record_type_filter = data.get('record_type', '全部')
-        if record_type_filter != '全部':
-            query += " AND record_type = %s"
-            count_query += " AND record_type = %s"
-            params.append(record_type_filter)
-
-        # 姓名筛选
-        name_filter = data.get('name', '').strip()
-        if name_filter:
-            query += " AND name LIKE %s"
-            count_query += " AND name LIKE %s"
-            params.append(f"%{name_filter}%")
-
-        # 日期筛选
-        date_filter = data.get('date', '').strip()
-        if date_filter:
-            query += " AND date = %s"
-            count_query += " AND date = %s"
-            params.append(date_filter)
-
-        # 所属人筛选
-        owner_filter = data.get('owner', '全部')
-        if owner_filter != '全部':
-            query += " AND owner = %s"
-            count_query += " AND owner = %s"
-            params.append(owner_filter)
+        count_query = f"SELECT COUNT(*) as total FROM gift_records WHERE {where_clause}"
         
         # 获取排序方式
         sort_method = data.get('sort_method', '按记录类型排序')
@@ -2236,14 +4248,8 @@ def search_records():
         if sort_method == '按记录类型排序':
             query += " ORDER BY record_type, date DESC"
         elif sort_method == '按姓名首字母排序':
-            # 使用拼音首字母进行排序
-            if HAS_PINYIN:
-                # 如果安装了pypinyin，我们可以在应用层面排序
-                # 先获取所有数据，然后在应用层面排序
-                pass
-            else:
-                # 如果没有安装pypinyin，使用简单的Unicode排序
-                query += " ORDER BY name"
+            # 使用保存的拼音首字母排序键
+            query += " ORDER BY name_pinyin_key, name, id"
         elif sort_method == '按时间降序':
             query += " ORDER BY date DESC"
         elif sort_method == '按金额降序':
@@ -2254,44 +4260,10 @@ def search_records():
         total_result = cursor.fetchone()
         total = total_result['total'] if total_result else 0
         
-        # 执行查询获取记录
-        cursor.execute(query, params)
-        all_records = cursor.fetchall()
-        
-        # 完成状态筛选（在应用层面处理）
-        status_filter = data.get('completion_status', '全部')
-        if status_filter != '全部':
-            filtered_records = []
-            for record in all_records:
-                current_status = calculate_completion_status(record)
-                if status_filter == current_status:
-                    filtered_records.append(record)
-            all_records = filtered_records
-            total = len(all_records)
-        
-        # 如果需要按拼音排序且安装了pypinyin
-        if sort_method == '按姓名首字母排序' and HAS_PINYIN:
-            from pypinyin import lazy_pinyin
-            
-            def get_pinyin_sort_key(name):
-                if not name:
-                    return ''
-                # 获取每个字的拼音，取首字母
-                try:
-                    pinyin_list = lazy_pinyin(name, style=Style.FIRST_LETTER)
-                    # 转换为大写字符串用于排序
-                    return ''.join([p[0].upper() for p in pinyin_list if p])
-                except Exception as e:
-                    logger.error(f"拼音转换错误: {e}")
-                    return name
-            
-            # 按拼音首字母排序
-            all_records.sort(key=lambda x: get_pinyin_sort_key(x['name']))
-        
-        # 分页处理
-        start_idx = (page - 1) * per_page
-        end_idx = min(start_idx + per_page, total)
-        paginated_records = all_records[start_idx:end_idx]
+        # 分页查询当前页的记录
+        query += " LIMIT %s OFFSET %s"
+        cursor.execute(query, params + [per_page, (page - 1) * per_page])
+        paginated_records = cursor.fetchall()
         
         cursor.close()
 
@@ -2343,6 +4315,193 @@ def search_records():
     
     
 
+# 统计面板的金额区间（含上下限）
+GIFT_AMOUNT_RANGES = [
+    (0, 200, '0-200元'),
+    (201, 500, '201-500元'),
+    (501, 1000, '501-1000元'),
+    (1001, None, '1000元以上')
+]
+
+def _type_totals(rows):
+    """把按记录类型分组的汇总行整理为 {记录类型: {count, amount, return_amount, returned_count}}"""
+    totals = {record_type: {'count': 0, 'amount': 0.0, 'return_amount': 0.0, 'returned_count': 0}
+              for record_type in ('受礼记录', '随礼记录')}
+    for row in rows:
+        totals[row['record_type']] = {
+            'count': row['record_count'],
+            'amount': float(row['amount'] or 0),
+            'return_amount': float(row['return_amount'] or 0),
+            'returned_count': int(row['returned_count'] or 0)
+        }
+    return totals
+
+@app.route('/api/records/search/stats', methods=['POST'])
+@login_required
+@query_budget('statistics')
+@read_replica
+def search_records_stats():
+    """搜索结果的统计数据：与搜索列表使用相同的筛选条件，只返回汇总结果"""
+    connection = None
+    try:
+        data = request.json or {}
+        where_clause, params = build_gift_search_filter(data)
+
+        connection = create_connection()
+        if not connection:
+            return jsonify({'success': False, 'message': '数据库连接失败'}), 500
+
+        cursor = connection.cursor(dictionary=True)
+        type_columns = """
+            COUNT(*) AS record_count,
+            SUM(amount) AS amount,
+            SUM(COALESCE(return_amount, 0)) AS return_amount,
+            SUM(CASE WHEN return_amount > 0 THEN 1 ELSE 0 END) AS returned_count
+        """
+
+        # 总数与已完成数
+        cursor.execute(f"""
+            SELECT COUNT(*) AS total_count,
+                   SUM(CASE WHEN completion_status = '已完成' THEN 1 ELSE 0 END) AS completed_count
+            FROM gift_records WHERE {where_clause}
+        """, params)
+        row = cursor.fetchone()
+        total_count = row['total_count']
+        completed_count = int(row['completed_count'] or 0)
+
+        # 按所属人、记录类型
+        cursor.execute(f"""
+            SELECT {GIFT_SUMMARY_OWNER} AS owner_name, record_type, {type_columns}
+            FROM gift_records WHERE {where_clause}
+            GROUP BY {GIFT_SUMMARY_OWNER}, record_type
+        """, params)
+        owner_rows = {}
+        for row in cursor.fetchall():
+            owner_rows.setdefault(row['owner_name'], []).append(row)
+        owners = {owner: _type_totals(rows) for owner, rows in owner_rows.items()}
+
+        # 金额区间分布
+        range_case = " ".join(
+            f"WHEN amount >= {low} AND amount <= {high} THEN {i}" if high is not None
+            else f"WHEN amount >= {low} THEN {i}"
+            for i, (low, high, _) in enumerate(GIFT_AMOUNT_RANGES))
+        cursor.execute(f"""
+            SELECT CASE {range_case} END AS range_index, record_type, {type_columns}
+            FROM gift_records WHERE {where_clause}
+            GROUP BY CASE {range_case} END, record_type
+        """, params)
+        range_rows = {}
+        for row in cursor.fetchall():
+            if row['range_index'] is not None:
+                range_rows.setdefault(int(row['range_index']), []).append(row)
+        amount_ranges = [dict(label=label, **_type_totals(range_rows.get(i, [])))
+                         for i, (_, _, label) in enumerate(GIFT_AMOUNT_RANGES)]
+
+        # 最近三年的年度趋势
+        today = date.today()
+        cursor.execute(f"""
+            SELECT YEAR(date) AS year, record_type, {type_columns}
+            FROM gift_records WHERE {where_clause} AND date >= %s
+            GROUP BY YEAR(date), record_type
+        """, params + [date(today.year - 2, 1, 1)])
+        year_rows = {}
+        for row in cursor.fetchall():
+            year_rows.setdefault(str(row['year']), []).append(row)
+        years = {year: _type_totals(rows) for year, rows in year_rows.items()}
+
+        # 最近12个月
+        cursor.execute(f"""
+            SELECT YEAR(date) AS year, MONTH(date) AS month, record_type, {type_columns}
+            FROM gift_records WHERE {where_clause} AND date >= %s
+            GROUP BY YEAR(date), MONTH(date), record_type
+        """, params + [subtract_months(today.replace(day=1), 11)])
+        month_rows = {}
+        for row in cursor.fetchall():
+            month_rows.setdefault(f"{int(row['year'])}-{int(row['month']):02d}", []).append(row)
+        months = {month: _type_totals(rows) for month, rows in month_rows.items()}
+
+        # 人员往来（按往来总金额排序）
+        cursor.execute(f"""
+            SELECT name,
+                   COUNT(*) AS total_interactions,
+                   COUNT(DISTINCT occasion) AS occasion_count,
+                   SUM(CASE WHEN record_type = '受礼记录' THEN 1 ELSE 0 END) AS gift_count,
+                   SUM(CASE WHEN record_type = '受礼记录' THEN amount ELSE 0 END) AS gift_amount,
+                   SUM(CASE WHEN record_type = '随礼记录' THEN 1 ELSE 0 END) AS return_count,
+                   SUM(CASE WHEN record_type = '随礼记录' THEN amount ELSE 0 END) AS return_amount,
+                   SUM(CASE WHEN record_type = '受礼记录' THEN COALESCE(return_amount, 0) ELSE 0 END) AS return_given,
+                   SUM(CASE WHEN record_type = '随礼记录' THEN COALESCE(return_amount, 0) ELSE 0 END) AS return_received
+            FROM gift_records WHERE {where_clause}
+            GROUP BY name
+            ORDER BY SUM(amount) DESC, name
+        """, params)
+        persons = []
+        for row in cursor.fetchall():
+            person = {key: float(row[key] or 0) for key in
+                      ('gift_amount', 'return_amount', 'return_given', 'return_received')}
+            person.update({key: int(row[key] or 0) for key in
+                           ('total_interactions', 'occasion_count', 'gift_count', 'return_count')})
+            person['name'] = row['name']
+            person['net_amount'] = (person['gift_amount'] + person['return_received']) - \
+                                   (person['return_amount'] + person['return_given'])
+            persons.append(person)
+
+        # 热门事件（各取金额前10）
+        cursor.execute(f"""
+            SELECT record_type, occasion, COUNT(*) AS record_count, COUNT(DISTINCT name) AS people,
+                   SUM(amount) AS total_amount,
+                   SUM(CASE WHEN return_amount > 0 THEN 1 ELSE 0 END) AS returned_count
+            FROM gift_records WHERE {where_clause}
+            GROUP BY record_type, occasion
+            ORDER BY SUM(amount) DESC
+        """, params)
+        occasions = {'受礼记录': [], '随礼记录': []}
+        for row in cursor.fetchall():
+            top = occasions.setdefault(row['record_type'], [])
+            if len(top) < 10:
+                top.append({
+                    'occasion': row['occasion'],
+                    'count': row['record_count'],
+                    'people': row['people'],
+                    'total_amount': float(row['total_amount'] or 0),
+                    'returned_count': int(row['returned_count'] or 0)
+                })
+
+        # 未完成往来（金额前10）
+        cursor.execute(f"""
+            SELECT name, occasion, amount, completion_status, date
+            FROM gift_records
+            WHERE {where_clause} AND completion_status IN ('仅受礼', '仅随礼')
+            ORDER BY amount DESC
+            LIMIT 10
+        """, params)
+        incomplete_records = cursor.fetchall()
+        for record in incomplete_records:
+            record['amount'] = float(record['amount'])
+            if record['date'] and not isinstance(record['date'], str):
+                record['date'] = record['date'].strftime("%Y-%m-%d")
+
+        cursor.close()
+
+        return jsonify({
+            'success': True,
+            'total_count': total_count,
+            'completed_count': completed_count,
+            'owners': owners,
+            'amount_ranges': amount_ranges,
+            'years': years,
+            'months': months,
+            'persons': persons,
+            'occasions': occasions,
+            'incomplete_records': incomplete_records
+        })
+    except Error as e:
+        logger.error(f"搜索统计错误: {e}")
+        return jsonify({'success': False, 'message': '获取统计失败'}), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
 @app.route('/api/records', methods=['POST'])
 @login_required
 def add_record():
@@ -2484,8 +4643,10 @@ def delete_record(record_id):
 
 @app.route('/api/statistics')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_statistics():
-    """获取统计数据（基于整个数据库，而不是当前页）"""
+    """获取统计数据（基于整个数据库，而不是当前页），读取按所属人、记录类型维护的汇总计数"""
     connection = create_connection()
     if not connection:
         return jsonify({'error': '数据库连接失败'}), 500
@@ -2493,91 +4654,448 @@ def get_statistics():
     try:
         cursor = connection.cursor(dictionary=True)
         
-        # 从数据库中获取所有记录来计算统计
+        # 汇总计数表随记录写入增量维护
         cursor.execute("""
-            SELECT id, record_type, name, amount, occasion, date, 
-                   has_returned, return_amount, return_occasion, return_date, remark, owner
-            FROM gift_records 
+            SELECT owner AS owner_name, record_type, record_count,
+                   amount_sum AS amount, return_amount_sum AS return_amount, completed_count
+            FROM gift_summary
+            WHERE record_count > 0
         """)
-        all_records = cursor.fetchall()
-        
-        # 基础统计
-        gift_records = [r for r in all_records if r["record_type"] == "受礼记录"]
-        return_records = [r for r in all_records if r["record_type"] == "随礼记录"]
-        
-        # 按所属人统计
-        gift_records_a = [r for r in gift_records if r.get('owner') == '郭宁' or not r.get('owner')]
-        return_records_a = [r for r in return_records if r.get('owner') == '郭宁' or not r.get('owner')]
-        gift_records_b = [r for r in gift_records if r.get('owner') == '李佳慧']
-        return_records_b = [r for r in return_records if r.get('owner') == '李佳慧']
         
         # ==================== 按照新规则计算金额 ====================
-        # 郭宁受礼总额 = 郭宁的受礼记录金额 + 郭宁的随礼记录中的回礼金额
-        total_gift_amount_a = float(0)
-        total_return_amount_a = float(0)
-        total_gift_amount_b = float(0)
-        total_return_amount_b = float(0)
-        
-        # 确保金额转换为浮点数
-        for r in gift_records_a:
-            total_gift_amount_a += float(r["amount"] or 0)
-        
-        for r in return_records_a:
-            total_gift_amount_a += float(r["return_amount"] or 0)
-        
-        for r in gift_records_a:
-            total_return_amount_a += float(r["return_amount"] or 0)
-        
-        for r in return_records_a:
-            total_return_amount_a += float(r["amount"] or 0)
-        
-        for r in gift_records_b:
-            total_gift_amount_b += float(r["amount"] or 0)
-        
-        for r in return_records_b:
-            total_gift_amount_b += float(r["return_amount"] or 0)
-        
-        for r in gift_records_b:
-            total_return_amount_b += float(r["return_amount"] or 0)
-        
-        for r in return_records_b:
-            total_return_amount_b += float(r["amount"] or 0)
+        # 所属人受礼总额 = 受礼记录金额 + 随礼记录中的回礼金额
+        # 所属人随礼总额 = 随礼记录金额 + 受礼记录中的回礼金额
+        owners = {}
+        for row in cursor.fetchall():
+            owner_stats = owners.setdefault(row['owner_name'], {
+                'gift_count': 0,
+                'return_count': 0,
+                'total_gift_amount': 0.0,
+                'total_return_amount': 0.0,
+                'completed_count': 0
+            })
+            amount = float(row['amount'])
+            return_amount = float(row['return_amount'])
+            if row['record_type'] == '受礼记录':
+                owner_stats['gift_count'] += row['record_count']
+                owner_stats['total_gift_amount'] += amount
+                owner_stats['total_return_amount'] += return_amount
+            else:
+                owner_stats['return_count'] += row['record_count']
+                owner_stats['total_gift_amount'] += return_amount
+                owner_stats['total_return_amount'] += amount
+            owner_stats['completed_count'] += int(row['completed_count'] or 0)
         
-        # 已完成回礼统计
-        completed_records = [r for r in all_records if calculate_completion_status(r) == "已完成"]
+        empty = {'gift_count': 0, 'return_count': 0, 'total_gift_amount': 0.0, 'total_return_amount': 0.0}
+        stats_a = owners.get('郭宁', empty)
+        stats_b = owners.get('李佳慧', empty)
+        total_count = sum(o['gift_count'] + o['return_count'] for o in owners.values())
         
         stats = {
-            'total_count': len(all_records),
-            'gift_count_a': len(gift_records_a),
-            'return_count_a': len(return_records_a),
-            'gift_count_b': len(gift_records_b),
-            'return_count_b': len(return_records_b),
-            'total_gift_amount_a': total_gift_amount_a,
-            'total_return_amount_a': total_return_amount_a,
-            'total_gift_amount_b': total_gift_amount_b,
-            'total_return_amount_b': total_return_amount_b,
-            'completed_count': len(completed_records)
+            'total_count': total_count,
+            'gift_count_a': stats_a['gift_count'],
+            'return_count_a': stats_a['return_count'],
+            'gift_count_b': stats_b['gift_count'],
+            'return_count_b': stats_b['return_count'],
+            'total_gift_amount_a': stats_a['total_gift_amount'],
+            'total_return_amount_a': stats_a['total_return_amount'],
+            'total_gift_amount_b': stats_b['total_gift_amount'],
+            'total_return_amount_b': stats_b['total_return_amount'],
+            'completed_count': sum(o['completed_count'] for o in owners.values()),
+            'owners': owners
         }
         
         cursor.close()
-        logger.info(f"统计数据 - 总记录数: {len(all_records)}, 郭宁受礼金额: {total_gift_amount_a}, 李佳慧受礼金额: {total_gift_amount_b}")
-        return jsonify(stats)
+        logger.info(f"统计数据 - 总记录数: {total_count}, 所属人数: {len(owners)}")
+        return jsonify(stats)
+    except Error as e:
+        logger.error(f"获取统计错误: {e}")
+        return jsonify({'error': '获取统计失败'}), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+# ===================== 礼金汇总计数 =====================
+# 汇总行的分组口径，未填写所属人的记录归入默认所属人
+GIFT_SUMMARY_OWNER = "COALESCE(NULLIF(owner, ''), '郭宁')"
+
+def get_gift_summary_row(cursor, record_id):
+    """读取单条记录在汇总表中对应的分组和金额（字典游标）"""
+    cursor.execute(f"""
+        SELECT {GIFT_SUMMARY_OWNER} AS owner, record_type, name, amount,
+               COALESCE(return_amount, 0) AS return_amount, completion_status
+        FROM gift_records WHERE id = %s
+    """, (record_id,))
+    return cursor.fetchone()
+
+def normalize_person_name(name):
+    """人员台账的姓名键：去掉首尾及重复空白，不区分大小写（与 MySQL 的 utf8mb4_unicode_ci 比较规则一致）"""
+    return ' '.join((name or '').split()).casefold()
+
+def apply_gift_summary_delta(cursor, row, sign):
+    """把单条记录计入（sign=1）或移出（sign=-1）汇总表和人员台账"""
+    if not row:
+        return
+    is_gift = row['record_type'] == '受礼记录'
+    cursor.execute("""
+        INSERT INTO gift_person_summary
+        (person_key, owner, gift_count, gift_amount, gift_returned_amount,
+         return_count, return_amount, return_received_amount)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            gift_count = gift_count + VALUES(gift_count),
+            gift_amount = gift_amount + VALUES(gift_amount),
+            gift_returned_amount = gift_returned_amount + VALUES(gift_returned_amount),
+            return_count = return_count + VALUES(return_count),
+            return_amount = return_amount + VALUES(return_amount),
+            return_received_amount = return_received_amount + VALUES(return_received_amount)
+    """, (normalize_person_name(row['name']), row['owner'],
+          sign if is_gift else 0, sign * row['amount'] if is_gift else 0, sign * row['return_amount'] if is_gift else 0,
+          0 if is_gift else sign, 0 if is_gift else sign * row['amount'], 0 if is_gift else sign * row['return_amount']))
+    cursor.execute("""
+        INSERT INTO gift_summary (owner, record_type, record_count, amount_sum, return_amount_sum, completed_count)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            record_count = record_count + VALUES(record_count),
+            amount_sum = amount_sum + VALUES(amount_sum),
+            return_amount_sum = return_amount_sum + VALUES(return_amount_sum),
+            completed_count = completed_count + VALUES(completed_count)
+    """, (row['owner'], row['record_type'], sign, sign * row['amount'], sign * row['return_amount'],
+          sign if row['completion_status'] == '已完成' else 0))
+
+def rebuild_gift_summary(cursor, repair=True):
+    """按 gift_records 重新汇总并与汇总表比对，返回不一致的分组；repair 为 True 时用重新汇总的结果覆盖"""
+    cursor.execute(f"""
+        SELECT {GIFT_SUMMARY_OWNER} AS owner, record_type, COUNT(*) AS record_count,
+               COALESCE(SUM(amount), 0) AS amount_sum,
+               COALESCE(SUM(return_amount), 0) AS return_amount_sum,
+               SUM(CASE WHEN completion_status = '已完成' THEN 1 ELSE 0 END) AS completed_count
+        FROM gift_records
+        GROUP BY {GIFT_SUMMARY_OWNER}, record_type
+    """)
+    expected = {(r[0], r[1]): r[2:] for r in cursor.fetchall()}
+    return _sync_summary_table(cursor, 'gift_summary', ('owner', 'record_type'),
+                               ('record_count', 'amount_sum', 'return_amount_sum', 'completed_count'),
+                               expected, repair)
+
+def rebuild_gift_person_summary(cursor, repair=True):
+    """按 gift_records 重新汇总人员台账并比对，返回不一致的 (姓名, 所属人)；repair 为 True 时覆盖"""
+    cursor.execute(f"""
+        SELECT name, {GIFT_SUMMARY_OWNER}, record_type, amount, COALESCE(return_amount, 0)
+        FROM gift_records
+    """)
+    expected = {}
+    for name, owner, record_type, amount, return_amount in cursor.fetchall():
+        totals = expected.setdefault((normalize_person_name(name), owner), [0, 0, 0, 0, 0, 0])
+        offset = 0 if record_type == '受礼记录' else 3
+        totals[offset] += 1
+        totals[offset + 1] += Decimal(str(amount))
+        totals[offset + 2] += Decimal(str(return_amount))
+    return _sync_summary_table(cursor, 'gift_person_summary', ('person_key', 'owner'),
+                               ('gift_count', 'gift_amount', 'gift_returned_amount',
+                                'return_count', 'return_amount', 'return_received_amount'),
+                               expected, repair)
+
+def _sync_summary_table(cursor, table, key_columns, value_columns, expected, repair):
+    """比对汇总表与重新汇总的结果（计数取整、金额保留两位），repair 为 True 时整表覆盖"""
+    cents = Decimal('0.01')
+
+    def normalize(values):
+        return tuple(int(v or 0) if column.endswith('count') else Decimal(str(v or 0)).quantize(cents)
+                     for column, v in zip(value_columns, values))
+
+    expected = {key: normalize(values) for key, values in expected.items()}
+    count_filter = " OR ".join(f"{c} <> 0" for c in value_columns if c.endswith('count'))
+    cursor.execute(f"SELECT {', '.join(key_columns + value_columns)} FROM {table} WHERE {count_filter}")
+    actual = {tuple(r[:len(key_columns)]): normalize(r[len(key_columns):]) for r in cursor.fetchall()}
+
+    mismatched = sorted(key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key))
+    if repair and mismatched:
+        cursor.execute(f"DELETE FROM {table}")
+        placeholders = ", ".join(["%s"] * (len(key_columns) + len(value_columns)))
+        # 表的比较规则可能把 Python 中不同的键视为相同（如带重音的字母），相同键的行累加而不是报主键冲突
+        updates = ", ".join(f"{c} = {c} + VALUES({c})" for c in value_columns)
+        cursor.executemany(f"""
+            INSERT INTO {table} ({', '.join(key_columns + value_columns)}) VALUES ({placeholders})
+            ON DUPLICATE KEY UPDATE {updates}
+        """, [key + values for key, values in expected.items()])
+    return mismatched
+
+@schema_migration('0007_gift_summary')
+def migrate_gift_summary(cursor):
+    """按所属人、记录类型维护的礼金汇总计数表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS gift_summary (
+            owner VARCHAR(50) NOT NULL,
+            record_type VARCHAR(10) NOT NULL,
+            record_count INT NOT NULL DEFAULT 0,
+            amount_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+            return_amount_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+            completed_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (owner, record_type)
+        )
+    """)
+    rebuild_gift_summary(cursor)
+
+@schema_migration('0009_gift_person_summary')
+def migrate_gift_person_summary(cursor):
+    """按姓名、所属人维护的人员往来台账，以及查询往来明细使用的索引"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS gift_person_summary (
+            person_key VARCHAR(100) NOT NULL,
+            owner VARCHAR(50) NOT NULL,
+            gift_count INT NOT NULL DEFAULT 0,
+            gift_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+            gift_returned_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+            return_count INT NOT NULL DEFAULT 0,
+            return_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+            return_received_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (person_key, owner)
+        )
+    """)
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_name_date', 'name, date')
+    rebuild_gift_person_summary(cursor)
+
+@schema_migration('0013_gift_records_person_key')
+def migrate_gift_records_person_key(cursor):
+    """往来明细按人员台账的姓名键查询（姓名中多余空白、大小写不同的记录归为同一人），合计按新的键重建"""
+    storage.add_column(cursor, 'gift_records', 'person_key', "VARCHAR(100) NOT NULL DEFAULT ''")
+
+    cursor.execute("SELECT id, name FROM gift_records")
+    rows = cursor.fetchall()
+    for start in range(0, len(rows), 500):
+        cursor.executemany("UPDATE gift_records SET person_key = %s WHERE id = %s",
+                           [(normalize_person_name(name), record_id) for record_id, name in rows[start:start + 500]])
+
+    storage.create_index(cursor, 'gift_records', 'idx_gift_records_person_date', 'person_key, date')
+    storage.drop_index(cursor, 'gift_records', 'idx_gift_records_name_date')
+    rebuild_gift_person_summary(cursor)
+
+@app.cli.command('rebuild-gift-summary')
+@click.option('--check', is_flag=True, help='只检查，不修复')
+def rebuild_gift_summary_command(check):
+    """核对礼金汇总计数表和人员台账，不一致时按 gift_records 重建"""
+    connection = _checkout_connection()
+    if not connection:
+        click.echo("数据库连接失败", err=True)
+        return
+
+    try:
+        cursor = connection.cursor()
+        mismatched = rebuild_gift_summary(cursor, repair=not check)
+        person_mismatched = rebuild_gift_person_summary(cursor, repair=not check)
+        connection.commit()
+        cursor.close()
+        if not mismatched and not person_mismatched:
+            click.echo("礼金汇总计数与记录一致")
+        else:
+            for owner, record_type in mismatched:
+                click.echo(f"不一致: {owner} / {record_type}")
+            for person_key, owner in person_mismatched:
+                click.echo(f"人员台账不一致: {person_key} / {owner}")
+            total = len(mismatched) + len(person_mismatched)
+            click.echo("仅检查，未修复" if check else f"已重建 {total} 个分组")
+    except Error as e:
+        connection.rollback()
+        click.echo(f"重建失败: {e}", err=True)
+    finally:
+        connection.close()
+
+# ===================== 记账汇总计数 =====================
+def apply_account_summary_delta(cursor, record_type, amount, sign, count=1):
+    """把记账记录计入（sign=1）或移出（sign=-1）汇总计数"""
+    mark_account_data_changed()
+    cursor.execute("""
+        INSERT INTO daily_account_summary (record_type, record_count, amount_sum)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            record_count = record_count + VALUES(record_count),
+            amount_sum = amount_sum + VALUES(amount_sum)
+    """, (record_type, sign * count, sign * Decimal(str(amount))))
+
+def rebuild_account_summary(cursor, repair=True):
+    """按 daily_accounts 重新汇总并与汇总计数比对，返回不一致的记录类型；repair 为 True 时覆盖"""
+    cursor.execute("""
+        SELECT record_type, COUNT(*), COALESCE(SUM(amount), 0)
+        FROM daily_accounts
+        GROUP BY record_type
+    """)
+    expected = {(r[0],): r[1:] for r in cursor.fetchall()}
+    return _sync_summary_table(cursor, 'daily_account_summary', ('record_type',),
+                               ('record_count', 'amount_sum'), expected, repair)
+
+@schema_migration('0010_daily_account_summary')
+def migrate_daily_account_summary(cursor):
+    """按记录类型维护的记账汇总计数表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_account_summary (
+            record_type VARCHAR(10) PRIMARY KEY,
+            record_count INT NOT NULL DEFAULT 0,
+            amount_sum DECIMAL(14,2) NOT NULL DEFAULT 0
+        )
+    """)
+    rebuild_account_summary(cursor)
+
+@app.cli.command('rebuild-account-summary')
+@click.option('--check', is_flag=True, help='只检查，不修复')
+def rebuild_account_summary_command(check):
+    """核对记账汇总计数，不一致时按 daily_accounts 重建"""
+    connection = _checkout_connection()
+    if not connection:
+        click.echo("数据库连接失败", err=True)
+        return
+
+    try:
+        cursor = connection.cursor()
+        mismatched = rebuild_account_summary(cursor, repair=not check)
+        connection.commit()
+        cursor.close()
+        if not mismatched:
+            click.echo("记账汇总计数与记录一致")
+        else:
+            for (record_type,) in mismatched:
+                click.echo(f"不一致: {record_type}")
+            click.echo("仅检查，未修复" if check else f"已重建 {len(mismatched)} 个分组")
+    except Error as e:
+        connection.rollback()
+        click.echo(f"重建失败: {e}", err=True)
+    finally:
+        connection.close()
+
+@app.route('/api/person_ledger')
+@login_required
+@read_replica
+def get_person_ledger():
+    """人员往来台账：合计直接读取人员台账表，往来明细分页返回"""
+    connection = None
+    try:
+        name = ' '.join(request.args.get('name', '').split())
+        person_key = normalize_person_name(name)
+        owner = request.args.get('owner', '全部')
+        page, per_page = get_page_args(default_per_page=50)
+
+        if not person_key:
+            return jsonify({'success': False, 'message': '姓名不能为空'})
+
+        connection = create_connection()
+        if not connection:
+            return jsonify({'success': False, 'message': '数据库连接失败'}), 500
+
+        cursor = connection.cursor(dictionary=True)
+
+        # 按主键读取合计，不随往来记录数增长
+        summary_query = """
+            SELECT COALESCE(SUM(gift_count), 0) AS gift_count,
+                   COALESCE(SUM(gift_amount), 0) AS gift_amount,
+                   COALESCE(SUM(gift_returned_amount), 0) AS gift_returned_amount,
+                   COALESCE(SUM(return_count), 0) AS return_count,
+                   COALESCE(SUM(return_amount), 0) AS return_amount,
+                   COALESCE(SUM(return_received_amount), 0) AS return_received_amount
+            FROM gift_person_summary
+            WHERE person_key = %s
+        """
+        summary_params = [person_key]
+        if owner != '全部':
+            summary_query += " AND owner = %s"
+            summary_params.append(owner)
+        cursor.execute(summary_query, summary_params)
+        row = cursor.fetchone()
+        summary = {key: float(row[key]) for key in
+                   ('gift_amount', 'gift_returned_amount', 'return_amount', 'return_received_amount')}
+        summary['gift_count'] = int(row['gift_count'])
+        summary['return_count'] = int(row['return_count'])
+
+        # 对方给我们的 = 受礼金额 + 随礼后收到的回礼；我们给对方的 = 随礼金额 + 受礼后的回礼
+        summary['received_total'] = summary['gift_amount'] + summary['return_received_amount']
+        summary['given_total'] = summary['return_amount'] + summary['gift_returned_amount']
+        summary['balance'] = summary['received_total'] - summary['given_total']
+        records_count = summary['gift_count'] + summary['return_count']
+
+        if not records_count:
+            cursor.close()
+            return jsonify({'success': False, 'message': f'没有找到"{name}"的往来记录'})
+
+        history_query = """
+            SELECT id, record_type, name, amount, occasion, date,
+                   has_returned, return_amount, return_occasion, return_date, remark, owner
+            FROM gift_records
+            WHERE person_key = %s
+        """
+        history_params = [person_key]
+        if owner != '全部':
+            history_query += f" AND {GIFT_SUMMARY_OWNER} = %s"
+            history_params.append(owner)
+        history_query += " ORDER BY date DESC, id DESC LIMIT %s OFFSET %s"
+        cursor.execute(history_query, history_params + [per_page, (page - 1) * per_page])
+        records = cursor.fetchall()
+        cursor.close()
+
+        for record in records:
+            record['amount'] = float(record['amount'])
+            record['return_amount'] = float(record['return_amount'] or 0)
+            record['has_returned'] = bool(record['has_returned'])
+            record['date'] = record['date'].strftime('%Y-%m-%d') if record['date'] else ''
+            record['return_date'] = record['return_date'].strftime('%Y-%m-%d') if record['return_date'] else ''
+            record['return_occasion'] = record['return_occasion'] or ''
+            record['remark'] = record['remark'] or ''
+            record['owner'] = record['owner'] or '郭宁'
+
+        return jsonify({
+            'success': True,
+            'name': name,
+            'owner': owner,
+            'summary': summary,
+            'records': records,
+            'records_count': records_count,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': (records_count + per_page - 1) // per_page
+        })
     except Error as e:
-        logger.error(f"获取统计错误: {e}")
-        return jsonify({'error': '获取统计失败'}), 500
+        logger.error(f"获取人员台账错误: {e}")
+        return jsonify({'success': False, 'message': '获取人员台账失败'}), 500
     finally:
         if connection and connection.is_connected():
             connection.close()
 
+def log_page_query(conditions, params, page, per_page, after=None):
+    """操作日志一页的查询（多取一行判断是否还有下一页），返回 (SQL, 参数)
+
+    有游标时从游标位置继续向后翻页，否则按页码定位。
+    """
+    conditions = list(conditions)
+    params = list(params)
+    if after:
+        conditions.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        params.extend([after[0], after[0], after[1]])
+    query = f"""
+        SELECT id, operation_type, operation_details, user_name, record_id, ip_address, created_at
+        FROM system_logs 
+        WHERE {" AND ".join(conditions) or "1=1"}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    """
+    params.append(per_page + 1)
+    if not after:
+        query += " OFFSET %s"
+        params.append((page - 1) * per_page)
+    return query, params
+
 @app.route('/api/logs')
 @login_required
 def get_system_logs():
+    """获取操作日志：关键词走全文索引，支持 (created_at, id) 游标分页，总数短时缓存"""
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    page, per_page = get_page_args()
     operation_type = request.args.get('operation_type', '')
     date_range = request.args.get('date_range', '')
-    keyword = request.args.get('keyword', '')
+    keyword = request.args.get('keyword', '').strip()
+    page_cursor = request.args.get('cursor', '')
+
+    try:
+        after = decode_page_cursor(page_cursor, 2) if page_cursor else None
+    except ValueError:
+        return jsonify({'error': '分页游标无效'}), 400
     
     connection = create_connection()
     if not connection:
@@ -2587,43 +5105,50 @@ def get_system_logs():
         cursor = connection.cursor(dictionary=True)
         
         # 构建查询条件
-        query = """
-            SELECT id, operation_type, operation_details, user_name, record_id, ip_address, created_at
-            FROM system_logs 
-            WHERE 1=1
-        """
+        conditions = []
         params = []
 
         if operation_type and operation_type != '全部':
-            query += " AND operation_type = %s"
+            conditions.append("operation_type = %s")
             params.append(operation_type)
 
+        # 时间范围换算成起始时间，条件直接落在 created_at 索引上
         if date_range and date_range != '全部':
-            if date_range == '今天':
-                query += " AND DATE(created_at) = CURDATE()"
-            elif date_range == '最近7天':
-                query += " AND created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)"
-            elif date_range == '最近30天':
-                query += " AND created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)"
-            elif date_range == '最近3个月':
-                query += " AND created_at >= DATE_SUB(NOW(), INTERVAL 3 MONTH)"
+            now = datetime.now()
+            since = {
+                '今天': now.replace(hour=0, minute=0, second=0, microsecond=0),
+                '最近7天': now - timedelta(days=7),
+                '最近30天': now - timedelta(days=30),
+                '最近3个月': subtract_months(now, 3)
+            }.get(date_range)
+            if since:
+                conditions.append("created_at >= %s")
+                params.append(since)
 
         if keyword:
-            query += " AND (operation_details LIKE %s OR user_name LIKE %s)"
-            params.extend([f"%{keyword}%", f"%{keyword}%"])
+            fulltext = storage.log_keyword_condition(cursor, keyword)
+            if fulltext:
+                conditions.append(fulltext[0])
+                params.extend(fulltext[1])
+            else:
+                conditions.append("(operation_details LIKE %s OR user_name LIKE %s)")
+                params.extend([f"%{keyword}%", f"%{keyword}%"])
 
-        # 获取总数
-        count_query = f"SELECT COUNT(*) as total FROM ({query}) as t"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
+        where_clause = " AND ".join(conditions) or "1=1"
 
-        # 添加排序和分页
-        query += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
-        offset = (page - 1) * per_page
-        params.extend([per_page, offset])
+        # 获取总数（相同筛选条件在短时间内复用缓存的结果）
+        count_key = ('system_logs', operation_type, date_range, keyword)
+        total = log_count_cache.get(count_key)
+        if total is None:
+            cursor.execute(f"SELECT COUNT(*) as total FROM system_logs WHERE {where_clause}", params)
+            total = cursor.fetchone()['total']
+            log_count_cache.set(count_key, total)
 
-        cursor.execute(query, params)
+        cursor.execute(*log_page_query(conditions, params, page, per_page, after))
         logs = cursor.fetchall()
+        has_more = len(logs) > per_page
+        logs = logs[:per_page]
+        next_cursor = encode_page_cursor(logs[-1]['created_at'], logs[-1]['id']) if has_more else None
         
         # 格式化日期
         for log in logs:
@@ -2637,7 +5162,9 @@ def get_system_logs():
             'total': total,
             'page': page,
             'per_page': per_page,
-            'total_pages': (total + per_page - 1) // per_page
+            'total_pages': (total + per_page - 1) // per_page,
+            'has_more': has_more,
+            'next_cursor': next_cursor
         })
         
     except Error as e:
@@ -2758,14 +5285,101 @@ def get_account_categories():
         if connection and connection.is_connected():
             connection.close()
 
+ACCOUNT_COLUMNS = """id, record_type, category, subcategory, amount, account_date, 
+                   description, payment_method, owner"""
+
+@schema_migration('0011_daily_accounts_date_id')
+def migrate_daily_accounts_date_id(cursor):
+    """记账记录列表按 (account_date, id) 游标分页使用的索引"""
+    storage.create_index(cursor, 'daily_accounts', 'idx_daily_accounts_date_id', 'account_date, id')
+
+# 记账记录的索引：列表与搜索按 account_date DESC, id DESC 排序，等值筛选列在前、日期在后；
+# 统计接口按日期范围筛选后按所属人/类型/类别分组，用覆盖索引避免回表
+DAILY_ACCOUNT_INDEXES = [
+    ('idx_daily_accounts_owner_date', 'owner, account_date'),
+    ('idx_daily_accounts_type_date', 'record_type, account_date'),
+    ('idx_daily_accounts_owner_type_date', 'owner, record_type, account_date'),
+    ('idx_daily_accounts_category_date', 'category, subcategory, account_date'),
+    ('idx_daily_accounts_stats', 'account_date, owner, record_type, category, amount')
+]
+
+# 被上面的组合索引（或 idx_daily_accounts_date_id）的前缀覆盖的旧索引，MySQL 建表时的同名索引一并清理
+REDUNDANT_DAILY_ACCOUNT_INDEXES = [
+    'idx_daily_accounts_date', 'idx_daily_accounts_type', 'idx_daily_accounts_owner', 'idx_daily_accounts_category',
+    'idx_account_date', 'idx_record_type', 'idx_owner', 'idx_category'
+]
+
+@schema_migration('0012_daily_accounts_filter_indexes')
+def migrate_daily_accounts_filter_indexes(cursor):
+    """记账搜索各筛选组合和统计分组使用的组合索引，删除冗余的单列索引"""
+    for index, columns in DAILY_ACCOUNT_INDEXES:
+        storage.create_index(cursor, 'daily_accounts', index, columns)
+    for index in REDUNDANT_DAILY_ACCOUNT_INDEXES:
+        storage.drop_index(cursor, 'daily_accounts', index)
+
+def account_page_query(where_clause, params, page, per_page, after=None, backward=False):
+    """记账列表一页的查询（多取一行判断是否还有下一页），返回 (SQL, 参数)
+
+    有游标 after 时按 (account_date, id) 定位，否则按页码 OFFSET。
+    """
+    params = list(params)
+    if after:
+        # 向前翻页时按升序取游标之后的行，再反转回降序
+        condition, condition_params = keyset_condition(('account_date', 'id'), after, descending=not backward)
+        where_clause = f"({where_clause}) AND {condition}"
+        params.extend(condition_params)
+    order = 'ASC' if backward else 'DESC'
+    query = f"""
+        SELECT {ACCOUNT_COLUMNS}
+        FROM daily_accounts 
+        WHERE {where_clause}
+        ORDER BY account_date {order}, id {order}
+        LIMIT %s
+    """
+    params.append(per_page + 1)
+    if not after:
+        query += " OFFSET %s"
+        params.append((page - 1) * per_page)
+    return query, params
+
+def fetch_account_page(cursor, where_clause, params, page, per_page, page_cursor='', direction='next'):
+    """按 account_date DESC, id DESC 取一页记账记录，返回 (records, next_cursor, prev_cursor)
+
+    带游标时按 (account_date, id) 定位，不再扫描并丢弃前面的行；
+    direction 为 prev 时取游标之前的一页。游标无效时抛出 ValueError。
+    """
+    after = None
+    backward = False
+    if page_cursor:
+        after = decode_page_cursor(page_cursor, 2)
+        backward = direction == 'prev'
+    query, params = account_page_query(where_clause, params, page, per_page, after, backward)
+
+    cursor.execute(query, params)
+    records = cursor.fetchall()
+    has_more = len(records) > per_page
+    records = records[:per_page]
+    if backward:
+        records.reverse()
+    if not records:
+        return records, None, None
+
+    first, last = records[0], records[-1]
+    has_next = True if backward else has_more
+    has_prev = has_more if backward else bool(page_cursor) or page > 1
+    next_cursor = encode_page_cursor(last['account_date'], last['id']) if has_next else None
+    prev_cursor = encode_page_cursor(first['account_date'], first['id']) if has_prev else None
+    return records, next_cursor, prev_cursor
+
 @app.route('/api/account/records')
 @login_required
 def get_account_records():
     """获取记账记录（带分页）"""
     try:
         # 获取分页参数
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page, per_page = get_page_args()
+        page_cursor = request.args.get('cursor', '')
+        direction = request.args.get('direction', 'next')
         
         connection = create_connection()
         if not connection:
@@ -2773,35 +5387,23 @@ def get_account_records():
 
         cursor = connection.cursor(dictionary=True)
         
-        # 计算偏移量
-        offset = (page - 1) * per_page
-        
-        # 查询当前页的记录
-        cursor.execute("""
-            SELECT id, record_type, category, subcategory, amount, account_date, 
-                   description, payment_method, owner
-            FROM daily_accounts 
-            ORDER BY account_date DESC, id DESC
-            LIMIT %s OFFSET %s
-        """, (per_page, offset))
-        records = cursor.fetchall()
-        
-        # 获取总记录数（使用估算值提高性能）
-        cursor.execute("""
-            SELECT COUNT(*) as total_count FROM daily_accounts
-        """)
-        total_result = cursor.fetchone()
-        total_count = total_result['total_count'] if total_result else 0
+        # 查询当前页的记录（带游标时按 account_date, id 定位）
+        try:
+            records, next_cursor, prev_cursor = fetch_account_page(
+                cursor, "1=1", [], page, per_page, page_cursor, direction)
+        except ValueError:
+            cursor.close()
+            return jsonify({'error': '分页游标无效'}), 400
         
-        # 获取统计信息（优化版，避免多次查询）
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_count,
-                COALESCE(SUM(CASE WHEN record_type = '支出' THEN amount ELSE 0 END), 0) as total_expense,
-                COALESCE(SUM(CASE WHEN record_type = '收入' THEN amount ELSE 0 END), 0) as total_income
-            FROM daily_accounts
-        """)
-        stats = cursor.fetchone()
+        # 总数和收支合计读取随写入维护的汇总计数
+        cursor.execute("SELECT record_type, record_count, amount_sum FROM daily_account_summary")
+        totals = {row['record_type']: row for row in cursor.fetchall()}
+        total_count = sum(int(row['record_count']) for row in totals.values())
+        stats = {
+            'total_count': total_count,
+            'total_expense': totals['支出']['amount_sum'] if '支出' in totals else 0,
+            'total_income': totals['收入']['amount_sum'] if '收入' in totals else 0
+        }
         
         for record in records:
             record['id'] = int(record['id'])
@@ -2825,7 +5427,9 @@ def get_account_records():
                 'total': total_count,
                 'page': page,
                 'per_page': per_page,
-                'total_pages': (total_count + per_page - 1) // per_page
+                'total_pages': (total_count + per_page - 1) // per_page,
+                'next_cursor': next_cursor,
+                'prev_cursor': prev_cursor
             },
             'stats': {
                 'total_count': stats['total_count'],
@@ -2849,39 +5453,11 @@ def add_account_record():
     try:
         data = request.json
         
-        # 数据验证
-        if not data.get('category') or not data.get('category').strip():
-            return jsonify({'success': False, 'message': '类别不能为空'})
-        
-        try:
-            amount = float(data['amount'])
-            if amount <= 0:
-                return jsonify({'success': False, 'message': '金额必须大于0'})
-        except (ValueError, TypeError):
-            return jsonify({'success': False, 'message': '金额格式错误'})
-            
-        if not data.get('account_date') or not data.get('account_date').strip():
-            return jsonify({'success': False, 'message': '日期不能为空'})
-        
-        record = {
-            'record_type': data.get('record_type', '支出'),
-            'owner': data.get('owner', '郭宁'),
-            'category': data['category'].strip(),
-            'subcategory': data.get('subcategory', '').strip(),
-            'amount': amount,
-            'account_date': data['account_date'].strip(),
-            'description': data.get('description', '').strip(),
-            'payment_method': data.get('payment_method', '现金')
-        }
-        
-        # 检查是否重复
-        if is_duplicate_account_record(record):
-            return jsonify({
-                'success': False, 
-                'message': '该记录已存在，请勿重复添加！',
-                'duplicate': True
-            })
+        record, error = parse_account_record(data)
+        if error:
+            return jsonify({'success': False, 'message': error})
         
+        # 重复检查在 save_account_record 中完成
         result = save_account_record(record)
         if result == 'duplicate':
             return jsonify({
@@ -2898,6 +5474,52 @@ def add_account_record():
         logger.error(f"添加记账记录错误: {str(e)}")
         return jsonify({'success': False, 'message': f'系统错误: {str(e)}'})
 
+@app.route('/api/account/records/bulk', methods=['POST'])
+@login_required
+def add_account_records_bulk():
+    """批量添加记账记录（请求体为记录数组，或 {"records": [...]}）"""
+    try:
+        data = request.get_json(silent=True)
+        items = data.get('records') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'success': False, 'message': '请提供要添加的记录列表'}), 400
+        if len(items) > BULK_ACCOUNT_MAX_ITEMS:
+            return jsonify({'success': False, 'message': f'单次最多添加{BULK_ACCOUNT_MAX_ITEMS}条记录'}), 400
+
+        # 一次遍历完成校验，只有通过校验的记录进入数据库
+        results = []
+        valid_records = []
+        valid_indexes = []
+        for index, item in enumerate(items):
+            record, error = parse_account_record(item)
+            if error:
+                results.append({'index': index, 'status': 'invalid', 'message': error})
+            else:
+                results.append({'index': index, 'status': None})
+                valid_records.append(record)
+                valid_indexes.append(index)
+
+        if valid_records:
+            statuses = save_account_records_bulk(valid_records, user_name=session.get('username', 'admin'))
+            if statuses is None:
+                return jsonify({'success': False, 'message': '保存到数据库失败'}), 500
+            for index, status in zip(valid_indexes, statuses):
+                results[index]['status'] = status
+                if status == 'duplicate':
+                    results[index]['message'] = '该记录已存在'
+
+        return jsonify({
+            'success': True,
+            'created': sum(1 for r in results if r['status'] == 'created'),
+            'duplicates': sum(1 for r in results if r['status'] == 'duplicate'),
+            'invalid': sum(1 for r in results if r['status'] == 'invalid'),
+            'results': results
+        })
+
+    except Exception as e:
+        logger.error(f"批量添加记账记录错误: {str(e)}")
+        return jsonify({'success': False, 'message': f'系统错误: {str(e)}'}), 500
+
 @app.route('/api/account/records/<int:record_id>', methods=['PUT'])
 @login_required
 def update_account_record(record_id):
@@ -2905,40 +5527,12 @@ def update_account_record(record_id):
     try:
         data = request.json
         
-        # 数据验证
-        if not data.get('category') or not data.get('category').strip():
-            return jsonify({'success': False, 'message': '类别不能为空'})
-        
-        try:
-            amount = float(data['amount'])
-            if amount <= 0:
-                return jsonify({'success': False, 'message': '金额必须大于0'})
-        except (ValueError, TypeError):
-            return jsonify({'success': False, 'message': '金额格式错误'})
-            
-        if not data.get('account_date') or not data.get('account_date').strip():
-            return jsonify({'success': False, 'message': '日期不能为空'})
-        
-        record = {
-            'id': record_id,
-            'record_type': data.get('record_type', '支出'),
-            'owner': data.get('owner', '郭宁'),
-            'category': data['category'].strip(),
-            'subcategory': data.get('subcategory', '').strip(),
-            'amount': amount,
-            'account_date': data['account_date'].strip(),
-            'description': data.get('description', '').strip(),
-            'payment_method': data.get('payment_method', '现金')
-        }
-        
-        # 检查是否重复（排除当前记录）
-        if is_duplicate_account_record(record, exclude_id=record_id):
-            return jsonify({
-                'success': False, 
-                'message': '该记录已存在，请勿重复添加！',
-                'duplicate': True
-            })
+        record, error = parse_account_record(data)
+        if error:
+            return jsonify({'success': False, 'message': error})
+        record['id'] = record_id
         
+        # 重复检查在 save_account_record 中完成
         result = save_account_record(record)
         if result == 'duplicate':
             return jsonify({
@@ -2946,6 +5540,8 @@ def update_account_record(record_id):
                 'message': '该记录已存在，请勿重复添加！',
                 'duplicate': True
             })
+        elif result == 'not_found':
+            return jsonify({'success': False, 'message': '记录不存在'}), 404
         elif result:
             return jsonify({'success': True})
         else:
@@ -2967,6 +5563,8 @@ def delete_account_record(record_id):
 # ===================== 修复：基础记账统计API =====================
 @app.route('/api/account/statistics')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_account_statistics():
     """获取记账统计信息"""
     try:
@@ -3007,6 +5605,8 @@ def get_account_statistics():
 # ===================== 新增：日历视图API =====================
 @app.route('/api/account/calendar')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_calendar_data():
     """获取日历视图数据"""
     try:
@@ -3154,6 +5754,8 @@ def get_calendar_data():
 # ===================== 修复：详细记账统计API =====================
 @app.route('/api/account/statistics/detailed')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_detailed_account_statistics():
     """获取详细的记账统计信息"""
     try:
@@ -3167,8 +5769,10 @@ def get_detailed_account_statistics():
             end_date = datetime.now().strftime('%Y-%m-%d')
             start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
         
-        statistics = get_account_statistics_by_period(stat_type, start_date, end_date, owner)
-        summary = get_account_summary_statistics(start_date, end_date, owner)
+        account_filter = AccountFilter.from_mapping(
+            {'start_date': start_date, 'end_date': end_date, 'owner': owner})
+        statistics = get_account_statistics_by_period(stat_type, account_filter)
+        summary = get_account_summary_statistics(account_filter)
         
         return jsonify({
             'statistics': statistics,
@@ -3207,107 +5811,25 @@ def search_account_records():
         cursor = connection.cursor(dictionary=True)
         
         # 获取分页参数
-        page = data.get('page', 1)
-        per_page = data.get('per_page', 20)
-        offset = (page - 1) * per_page
+        page, per_page = get_page_args(data)
+        page_cursor = data.get('cursor') or ''
+        direction = data.get('direction', 'next')
         
-        # 构建查询条件
-        query = """
-            SELECT id, record_type, category, subcategory, amount, account_date, 
-                   description, payment_method, owner
-            FROM daily_accounts 
-            WHERE 1=1
-        """
-        count_query = "SELECT COUNT(*) as total FROM daily_accounts WHERE 1=1"
-        params = []
-
-        # 记录类型筛选
-        record_type_filter = data.get('record_type', '全部')
-        if record_type_filter != '全部':
-            query += " AND record_type = %s"
-            count_query += " AND record_type = %s"
-            params.append(record_type_filter)
-
-        # 类别筛选
-        category_filter = data.get('category', '全部')
-        if category_filter != '全部':
-            query += " AND category = %s"
-            count_query += " AND category = %s"
-            params.append(category_filter)
-
-        # 子类别筛选
-        subcategory_filter = data.get('subcategory', '全部')
-        if subcategory_filter != '全部':
-            query += " AND subcategory = %s"
-            count_query += " AND subcategory = %s"
-            params.append(subcategory_filter)
-
-        # 日期范围筛选（新增开始时间和结束时间）
-        start_date = data.get('start_date', '').strip()
-        end_date = data.get('end_date', '').strip()
-        
-        if start_date and end_date:
-            query += " AND account_date BETWEEN %s AND %s"
-            count_query += " AND account_date BETWEEN %s AND %s"
-            params.extend([start_date, end_date])
-        elif start_date:
-            query += " AND account_date >= %s"
-            count_query += " AND account_date >= %s"
-            params.append(start_date)
-        elif end_date:
-            query += " AND account_date <= %s"
-            count_query += " AND account_date <= %s"
-            params.append(end_date)
-
-        # 所属人筛选
-        owner_filter = data.get('owner', '全部')
-        if owner_filter != '全部':
-            query += " AND owner = %s"
-            count_query += " AND owner = %s"
-            params.append(owner_filter)
-
-        # 获取总数
-        cursor.execute(count_query, params)
-        total_result = cursor.fetchone()
-        total_count = total_result['total'] if total_result else 0
+        # 列表查询与统计查询共用同一组筛选条件
+        account_filter = AccountFilter.from_mapping(data)
+        where_clause, params = account_filter.where()
 
-        # 添加排序和分页
-        query += " ORDER BY account_date DESC, id DESC LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
+        # 总数和收支合计：一次按记录类型分组的聚合
+        stats = account_search_totals(cursor, account_filter)
+        total_count = stats['total_count']
 
-        cursor.execute(query, params)
-        records = cursor.fetchall()
-        
-        # 计算统计信息
-        stats_query = """
-            SELECT 
-                COUNT(*) as total_count,
-                COALESCE(SUM(CASE WHEN record_type = '支出' THEN amount ELSE 0 END), 0) as total_expense,
-                COALESCE(SUM(CASE WHEN record_type = '收入' THEN amount ELSE 0 END), 0) as total_income
-            FROM daily_accounts 
-            WHERE 1=1
-        """
-        stats_params = params[:-2] if len(params) > 2 else []  # 移除分页参数
-        
-        # 构建统计查询的WHERE条件
-        where_index = 0
-        if 'record_type' in data and data['record_type'] != '全部':
-            stats_query += " AND record_type = %s"
-        if 'category' in data and data['category'] != '全部':
-            stats_query += " AND category = %s"
-        if 'subcategory' in data and data['subcategory'] != '全部':
-            stats_query += " AND subcategory = %s"
-        if start_date and end_date:
-            stats_query += " AND account_date BETWEEN %s AND %s"
-        elif start_date:
-            stats_query += " AND account_date >= %s"
-        elif end_date:
-            stats_query += " AND account_date <= %s"
-        if 'owner' in data and data['owner'] != '全部':
-            stats_query += " AND owner = %s"
-        
-        cursor.execute(stats_query, stats_params)
-        stats_result = cursor.fetchone()
+        # 排序和分页（带游标时按 account_date, id 定位）
+        try:
+            records, next_cursor, prev_cursor = fetch_account_page(
+                cursor, where_clause, params, page, per_page, page_cursor, direction)
+        except ValueError:
+            cursor.close()
+            return jsonify({'error': '分页游标无效'}), 400
         
         for record in records:
             record['id'] = int(record['id'])
@@ -3331,14 +5853,11 @@ def search_account_records():
                 'total': total_count,
                 'page': page,
                 'per_page': per_page,
-                'total_pages': (total_count + per_page - 1) // per_page
+                'total_pages': (total_count + per_page - 1) // per_page,
+                'next_cursor': next_cursor,
+                'prev_cursor': prev_cursor
             },
-            'stats': {
-                'total_count': stats_result['total_count'] if stats_result else 0,
-                'total_expense': float(stats_result['total_expense']) if stats_result else 0.0,
-                'total_income': float(stats_result['total_income']) if stats_result else 0.0,
-                'net_amount': float(stats_result['total_income']) - float(stats_result['total_expense']) if stats_result else 0.0
-            }
+            'stats': stats
         })
         
     except Error as e:
@@ -3509,16 +6028,9 @@ def import_account_data():
                     'payment_method': str(row_data.get('支付方式', '现金')).strip()
                 }
                 
-                # 检查是否重复
-                if is_duplicate_account_record(record):
-                    duplicate_count += 1
-                    duplicate_messages.append(f"第{row_num}行: 记录已存在，跳过导入")
-                    continue
-                
-                # 保存记录
+                # 保存记录（重复检查在 save_account_record 中完成）
                 result = save_account_record(record)
                 if result == 'duplicate':
-                    # 这种情况不应该发生，因为我们已经检查过了，但为了安全还是处理
                     duplicate_count += 1
                     duplicate_messages.append(f"第{row_num}行: 记录已存在，跳过导入")
                 elif result:
@@ -3942,16 +6454,19 @@ def download_gift_records_template():
 
 @app.route('/api/account/export')
 @login_required
+@query_budget('export')
+@read_replica
 def export_account_data():
     """导出记账数据到Excel - 修复版，支持日期范围"""
     try:
         # 获取查询参数
-        record_type = request.args.get('record_type', '全部')
-        category = request.args.get('category', '全部')
-        subcategory = request.args.get('subcategory', '全部')
-        start_date = request.args.get('start_date', '')
-        end_date = request.args.get('end_date', '')
-        owner = request.args.get('owner', '全部')
+        account_filter = AccountFilter.from_mapping(request.args)
+        record_type = account_filter.record_type or '全部'
+        category = account_filter.category or '全部'
+        subcategory = account_filter.subcategory or '全部'
+        start_date = account_filter.start_date or ''
+        end_date = account_filter.end_date or ''
+        owner = account_filter.owner or '全部'
         
         connection = create_connection()
         if not connection:
@@ -3959,47 +6474,15 @@ def export_account_data():
 
         cursor = connection.cursor(dictionary=True)
         
-        # 构建查询条件 - 修复：支持日期范围
-        query = """
+        # 与记账搜索使用同一组筛选条件
+        where_clause, params = account_filter.where()
+        query = f"""
             SELECT record_type, category, subcategory, amount, account_date, 
                    description, payment_method, owner
             FROM daily_accounts 
-            WHERE 1=1
+            WHERE {where_clause}
+            ORDER BY account_date DESC, id DESC
         """
-        params = []
-
-        # 记录类型筛选
-        if record_type != '全部':
-            query += " AND record_type = %s"
-            params.append(record_type)
-
-        # 类别筛选
-        if category != '全部':
-            query += " AND category = %s"
-            params.append(category)
-
-        # 子类别筛选
-        if subcategory != '全部':
-            query += " AND subcategory = %s"
-            params.append(subcategory)
-
-        # 日期范围筛选 - 修复：正确处理日期范围
-        if start_date and end_date:
-            query += " AND account_date BETWEEN %s AND %s"
-            params.extend([start_date, end_date])
-        elif start_date:
-            query += " AND account_date >= %s"
-            params.append(start_date)
-        elif end_date:
-            query += " AND account_date <= %s"
-            params.append(end_date)
-
-        # 所属人筛选
-        if owner != '全部':
-            query += " AND owner = %s"
-            params.append(owner)
-
-        query += " ORDER BY account_date DESC, id DESC"
 
         logger.info(f"导出查询SQL: {query}")
         logger.info(f"导出查询参数: {params}")
@@ -4137,17 +6620,19 @@ def export_account_data():
 # ===================== 新增：记账统计导出路由 =====================
 @app.route('/api/account/statistics/export')
 @login_required
+@query_budget('export')
+@read_replica
 def export_account_statistics():
     """导出记账统计信息"""
     try:
         stat_type = request.args.get('type', 'monthly')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        owner = request.args.get('owner', '全部')
         
         # 获取统计数据和汇总
-        statistics = get_account_statistics_by_period(stat_type, start_date, end_date, owner)
-        summary = get_account_summary_statistics(start_date, end_date, owner)
+        account_filter = AccountFilter.from_mapping(request.args, fields=('start_date', 'end_date', 'owner'))
+        statistics = get_account_statistics_by_period(stat_type, account_filter)
+        summary = get_account_summary_statistics(account_filter)
         
         # 创建Excel工作簿
         wb = Workbook()
@@ -4224,6 +6709,8 @@ def export_account_statistics():
 # ===================== 修复：图表数据API - 修正所属人收支对比数据 =====================
 @app.route('/api/account/statistics/charts')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_account_charts_data():
     """获取图表数据"""
     try:
@@ -4238,6 +6725,13 @@ def get_account_charts_data():
         
         logger.info(f"获取图表数据 - 日期: {start_date} 到 {end_date}, 所属人: {owner}")
         
+        account_filter = AccountFilter.from_mapping(
+            {'start_date': start_date, 'end_date': end_date, 'owner': owner})
+        cache_key = account_cache_key('charts', account_filter)
+        chart_data = account_cache_get(cache_key)
+        if chart_data is not None:
+            return jsonify(chart_data)
+        
         connection = create_connection()
         if not connection:
             return jsonify({'error': '数据库连接失败'}), 500
@@ -4246,14 +6740,7 @@ def get_account_charts_data():
             cursor = connection.cursor(dictionary=True)
             
             # 构建查询条件
-            where_conditions = ["account_date BETWEEN %s AND %s"]
-            params = [start_date, end_date]
-            
-            if owner and owner != "全部":
-                where_conditions.append("owner = %s")
-                params.append(owner)
-            
-            where_clause = " AND ".join(where_conditions)
+            where_clause, params = account_filter.where()
             
             # 月度趋势数据
             monthly_query = f"""
@@ -4421,6 +6908,7 @@ def get_account_charts_data():
             chart_data['yearly']['labels'] = [f"{year}年" for year in yearly_labels]
             
             cursor.close()
+            account_cache_set(cache_key, chart_data)
             return jsonify(chart_data)
             
         except Error as e:
@@ -4440,6 +6928,8 @@ def get_account_charts_data():
 # ===================== 修复：完整类别统计图表API =====================
 @app.route('/api/account/statistics/categories')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_category_charts_data():
     """获取类别统计图表数据（完整版）"""
     try:
@@ -4455,6 +6945,9 @@ def get_category_charts_data():
         
         logger.info(f"获取类别统计图表数据 - 时间范围: {time_range}, 日期: {start_date} 到 {end_date}, 所属人: {owner}")
         
+        account_filter = AccountFilter.from_mapping(
+            {'start_date': start_date, 'end_date': end_date, 'owner': owner})
+        
         connection = create_connection()
         if not connection:
             return jsonify({'error': '数据库连接失败'}), 500
@@ -4463,14 +6956,7 @@ def get_category_charts_data():
             cursor = connection.cursor(dictionary=True)
             
             # 构建查询条件
-            where_conditions = ["account_date BETWEEN %s AND %s"]
-            params = [start_date, end_date]
-            
-            if owner and owner != "全部":
-                where_conditions.append("owner = %s")
-                params.append(owner)
-            
-            where_clause = " AND ".join(where_conditions)
+            where_clause, params = account_filter.where()
             
             if time_range == 'all':
                 # 全部数据 - 简单的类别统计
@@ -4659,11 +7145,11 @@ def get_time_based_category_data(cursor, where_clause, params, time_range):
             order_field = 'YEAR(account_date)'
         elif time_range == 'quarterly':
             time_group = 'YEAR(account_date), QUARTER(account_date)'
-            time_label = 'CONCAT(YEAR(account_date), "年第", QUARTER(account_date), "季度") as time_period'
+            time_label = "CONCAT(YEAR(account_date), '年第', QUARTER(account_date), '季度') as time_period"
             order_field = 'YEAR(account_date), QUARTER(account_date)'
         elif time_range == 'monthly':
             time_group = 'YEAR(account_date), MONTH(account_date)'
-            time_label = 'CONCAT(YEAR(account_date), "年", LPAD(MONTH(account_date), 2, "0"), "月") as time_period'
+            time_label = "CONCAT(YEAR(account_date), '年', LPAD(MONTH(account_date), 2, '0'), '月') as time_period"
             order_field = 'YEAR(account_date), MONTH(account_date)'
         else:
             # 默认为年度
@@ -4812,6 +7298,8 @@ def get_time_based_category_data(cursor, where_clause, params, time_range):
 # ===================== 新增：子类别金额统计API =====================
 @app.route('/api/account/statistics/subcategory')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_subcategory_statistics():
     """获取子类别金额统计"""
     try:
@@ -4833,18 +7321,9 @@ def get_subcategory_statistics():
         cursor = connection.cursor(dictionary=True)
         
         # 构建查询条件
-        where_conditions = ["account_date BETWEEN %s AND %s"]
-        params = [start_date, end_date]
-        
-        if subcategory != '全部':
-            where_conditions.append("subcategory = %s")
-            params.append(subcategory)
-        
-        if owner != '全部':
-            where_conditions.append("owner = %s")
-            params.append(owner)
-        
-        where_clause = " AND ".join(where_conditions)
+        account_filter = AccountFilter.from_mapping(
+            {'subcategory': subcategory, 'owner': owner, 'start_date': start_date, 'end_date': end_date})
+        where_clause, params = account_filter.where()
         
         # 总统计查询
         total_query = f"""
@@ -4903,6 +7382,8 @@ def get_subcategory_statistics():
 
 @app.route('/api/account/statistics/subcategory/export')
 @login_required
+@query_budget('export')
+@read_replica
 def export_subcategory_statistics():
     """导出子类别统计结果"""
     try:
@@ -4918,18 +7399,9 @@ def export_subcategory_statistics():
         cursor = connection.cursor(dictionary=True)
         
         # 构建查询条件
-        where_conditions = ["account_date BETWEEN %s AND %s"]
-        params = [start_date, end_date]
-        
-        if subcategory != '全部':
-            where_conditions.append("subcategory = %s")
-            params.append(subcategory)
-        
-        if owner != '全部':
-            where_conditions.append("owner = %s")
-            params.append(owner)
-        
-        where_clause = " AND ".join(where_conditions)
+        account_filter = AccountFilter.from_mapping(
+            {'subcategory': subcategory, 'owner': owner, 'start_date': start_date, 'end_date': end_date})
+        where_clause, params = account_filter.where()
         
         # 查询详细记录
         detail_query = f"""
@@ -5059,14 +7531,12 @@ def debug_database_status():
         cursor = connection.cursor(dictionary=True)
         
         # 检查表是否存在
-        cursor.execute("SHOW TABLES LIKE 'daily_accounts'")
-        accounts_table_exists = cursor.fetchone() is not None
+        accounts_table_exists = storage.table_exists(cursor, 'daily_accounts')
         
         # 检查表结构
         table_info = {}
         if accounts_table_exists:
-            cursor.execute("DESCRIBE daily_accounts")
-            table_info['daily_accounts'] = cursor.fetchall()
+            table_info['daily_accounts'] = storage.describe_table(cursor, 'daily_accounts')
             
             # 检查是否有数据
             cursor.execute("SELECT COUNT(*) as count FROM daily_accounts")
@@ -5086,10 +7556,122 @@ def debug_database_status():
         if connection and connection.is_connected():
             connection.close()
 
+@app.route('/api/debug/pool_status')
+@login_required
+def debug_pool_status():
+    """调试连接池状态（等待次数、占用数等）"""
+    return jsonify({
+        'success': True,
+        'pools': [pool.get_stats() for pool in [db_pool] + read_pools],
+        'replicas_down': [name for name, until in _replica_down_until.items() if until > time.time()]
+    })
+
+@app.route('/api/debug/audit_log_status')
+@login_required
+def debug_audit_log_status():
+    """调试操作日志写入队列状态（已写入、丢弃、失败数等）"""
+    return jsonify({'success': True, 'audit_log': audit_writer.get_stats()})
+
+def index_report_queries():
+    """索引检查使用的各接口典型查询：(名称, SQL, 参数)，SQL 由各接口实际使用的查询构造函数生成"""
+    start, end = '2024-01-01', '2024-12-31'
+
+    def account_filter(**values):
+        return AccountFilter.from_mapping(values)
+
+    def account_page(**values):
+        return account_page_query(*account_filter(**values).where(), page=1, per_page=20)
+
+    probes = [
+        ('记账列表', account_page()),
+        ('记账列表（游标翻页）', account_page_query("1=1", [], 1, 20, after=[end, 1000])),
+        ('记账搜索：日期范围', account_page(start_date=start, end_date=end)),
+        ('记账搜索：所属人+日期', account_page(owner='郭宁', start_date=start, end_date=end)),
+        ('记账搜索：类型+日期', account_page(record_type='支出', start_date=start, end_date=end)),
+        ('记账搜索：所属人+类型+日期', account_page(owner='郭宁', record_type='支出', start_date=start, end_date=end)),
+        ('记账搜索：类别+子类别', account_page(category='食品酒水', subcategory='午餐')),
+        ('记账搜索：类型+类别+日期', account_page(record_type='支出', category='食品酒水', start_date=start)),
+        ('记账搜索合计', account_totals_query(account_filter(owner='郭宁', start_date=start, end_date=end))),
+        ('记账统计：月度', account_period_query('monthly', account_filter(start_date=start, end_date=end))),
+        ('记账统计：类别', account_period_query('category', account_filter(start_date=start, end_date=end))),
+        ('记账统计：所属人明细', account_period_query('owner_detail', account_filter(start_date=start, end_date=end))),
+        ('礼金列表', gift_page_query(*RECORD_DEFAULT_SORT, page=1, per_page=20)),
+        ('回礼记录统计', return_records_page_query(*return_records_where(start, end, '郭宁'), per_page=100)),
+        ('操作日志列表', log_page_query(["operation_type = %s", "created_at >= %s"], ['添加记录', start],
+                                        page=1, per_page=20))
+    ]
+    return [(name, sql, params) for name, (sql, params) in probes]
+
+@app.route('/api/debug/index_report')
+@login_required
+def debug_index_report():
+    """调试索引使用情况：对各接口的典型查询执行 EXPLAIN，标记全表扫描和额外排序"""
+    connection = None
+    try:
+        connection = create_connection()
+        if not connection:
+            return jsonify({'success': False, 'message': '数据库连接失败'}), 500
+
+        cursor = connection.cursor(dictionary=True)
+        report = []
+        for name, sql, params in index_report_queries():
+            result = storage.explain(cursor, " ".join(sql.split()), params)
+            result['name'] = name
+            report.append(result)
+        cursor.close()
+
+        flagged = [item['name'] for item in report if item['full_scan'] or item['filesort']]
+        return jsonify({'success': True, 'backend': storage.name, 'flagged': flagged, 'queries': report})
+
+    except Error as e:
+        logger.error(f"索引检查失败: {e}")
+        return jsonify({'success': False, 'message': f'索引检查失败: {str(e)}'}), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+@app.route('/api/debug/summary_check', methods=['GET', 'POST'])
+@login_required
+def debug_summary_check():
+    """核对汇总计数表与明细记录：GET 只检查，POST 按明细重建不一致的汇总表"""
+    connection = None
+    try:
+        repair = request.method == 'POST'
+        connection = create_connection(write=repair)
+        if not connection:
+            return jsonify({'success': False, 'message': '数据库连接失败'}), 500
+
+        cursor = connection.cursor()
+        mismatched = {
+            'gift_summary': [list(key) for key in rebuild_gift_summary(cursor, repair=repair)],
+            'gift_person_summary': [list(key) for key in rebuild_gift_person_summary(cursor, repair=repair)],
+            'daily_account_summary': [list(key) for key in rebuild_account_summary(cursor, repair=repair)]
+        }
+        cursor.close()
+        if repair:
+            connection.commit()
+            if mismatched['daily_account_summary']:
+                mark_account_data_changed()
+
+        return jsonify({
+            'success': True,
+            'consistent': not any(mismatched.values()),
+            'repaired': repair,
+            'mismatched': mismatched
+        })
+
+    except Error as e:
+        logger.error(f"汇总核对失败: {e}")
+        return jsonify({'success': False, 'message': f'汇总核对失败: {str(e)}'}), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
 @app.route('/api/debug/chart_data_verify')
 @login_required
 def debug_chart_data_verify():
     """调试图表数据验证"""
+    connection = None
     try:
         start_date = request.args.get('start_date', '2024-01-01')
         end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
@@ -5160,6 +7742,9 @@ def debug_chart_data_verify():
     except Exception as e:
         logger.error(f"调试图表数据验证错误: {str(e)}")
         return jsonify({'error': str(e)}), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
 
 @app.route('/api/account/export/test')
 @login_required
@@ -5446,6 +8031,8 @@ def delete_owner(owner_name):
 
 @app.route('/api/account/statistics/by_owner')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_statistics_by_owner():
     """按所属人进行深度统计"""
     try:
@@ -5465,10 +8052,7 @@ def get_statistics_by_owner():
         cursor = connection.cursor(dictionary=True)
         
         # 构建查询条件
-        where_conditions = ["account_date BETWEEN %s AND %s"]
-        params = [start_date, end_date]
-        
-        where_clause = " AND ".join(where_conditions)
+        where_clause, params = AccountFilter.from_mapping({'start_date': start_date, 'end_date': end_date}).where()
         
         # 根据统计类型构建查询
         if stat_type == 'monthly':
@@ -5594,6 +8178,8 @@ def get_statistics_by_owner():
 
 @app.route('/api/account/statistics/owner_comparison')
 @login_required
+@query_budget('statistics')
+@read_replica
 def get_owner_comparison_statistics():
     """所属人对比统计"""
     try:
@@ -5748,52 +8334,14 @@ def get_owner_comparison_statistics():
 
 
 
-# 数据库连接池
-db_pool = None
-
-# 优化数据库连接池配置
-def init_database_pool():
-    global db_pool
-    try:
-        db_pool = pooling.MySQLConnectionPool(
-            pool_name="gift_pool",
-            pool_size=10,  # 增加连接数
-            pool_reset_session=True,
-            **DB_CONFIG
-        )
-        logger.info("数据库连接池初始化成功")
-    except Error as e:
-        logger.error(f"数据库连接池初始化失败: {e}")
-        
-def safe_execute(cursor, query, params=None, timeout=30):
-    """安全执行SQL查询（带超时）"""
-    try:
-        # 设置查询超时
-        cursor.execute("SET SESSION MAX_EXECUTION_TIME=%s", (timeout * 1000,))
-        cursor.execute(query, params or ())
-        if cursor.with_rows:
-            result = cursor.fetchall()
-            return result
-        return None
-    except Error as e:
-        raise e
-
-def create_connection():
-    """创建数据库连接（使用连接池）"""
-    try:
-        if db_pool:
-            return db_pool.get_connection()
-        else:
-            return mysql.connector.connect(**DB_CONFIG)
-    except Error as e:
-        logger.error(f"数据库连接失败: {str(e)}")
-        return None
-
+# 应用创建时执行一次数据库初始化和结构迁移，保证各入口启动后表结构都是最新的
+db_initialized = DB_INIT_ON_STARTUP and init_database()
+if DB_INIT_ON_STARTUP and not db_initialized:
+    logger.error("数据库初始化失败，请检查数据库配置后运行 flask init-db")
 
 if __name__ == '__main__':
     # 初始化数据库
-    if init_database():
-        init_database_pool()  # 初始化连接池
+    if db_initialized or init_database():
         logger.info("数据库初始化成功")
         logger.info("家庭记账管理系统已启动!")
         logger.info("访问地址: http://localhost:5000")
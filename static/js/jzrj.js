@@ -9,6 +9,8 @@ let accountsPerPage = 20;
 let totalAccountPages = 1;
 let totalAccountRecords = 0;
 let currentSearchParams = null; // 记录当前搜索参数
+let accountPageCursors = {}; // 页码 -> 分页游标（按 account_date, id 定位）
+let accountCursorKey = '';
 
 // 系统日志相关变量
 let currentLogPage = 1;
@@ -1589,6 +1591,8 @@ function loadAccountRecords(page = currentAccountPage) {
 	
 	console.log('加载记录 - 当前页面:', page, '搜索参数:', currentSearchParams);
 	
+	resetAccountPageCursorsIfChanged();
+	
 	try {
 		// 如果有搜索条件，使用搜索，否则正常加载
 		if (currentSearchParams && Object.keys(currentSearchParams).length > 0) {
@@ -1596,7 +1600,8 @@ function loadAccountRecords(page = currentAccountPage) {
 			const searchData = {
 				...currentSearchParams,
 				page: page,
-				per_page: perPage
+				per_page: perPage,
+				cursor: accountPageCursors[page] || null
 			};
 			
 			// 清理参数：移除可能的空值或无效值
@@ -1651,11 +1656,28 @@ function loadAccountRecords(page = currentAccountPage) {
 	}
 }
 
+// 搜索条件或每页条数变化后，之前记录的游标不再适用
+function resetAccountPageCursorsIfChanged() {
+	const cursorKey = JSON.stringify([currentSearchParams, accountsPerPage]);
+	if (cursorKey !== accountCursorKey) {
+		accountCursorKey = cursorKey;
+		accountPageCursors = {};
+	}
+}
+
 // 新增：加载所有记录（无搜索条件）
 function loadAllAccountRecords(page = 1) {
 	console.log('加载所有记录，页码:', page);
 	
-	fetch(`/api/account/records?page=${page}&per_page=${accountsPerPage}`)
+	// 搜索失败回退到全部记录时 currentSearchParams 已清空，不能沿用搜索结果的游标
+	resetAccountPageCursorsIfChanged();
+	
+	const params = new URLSearchParams({ page: page, per_page: accountsPerPage });
+	if (accountPageCursors[page]) {
+		params.set('cursor', accountPageCursors[page]);
+	}
+	
+	fetch(`/api/account/records?${params.toString()}`)
 		.then(response => {
 			if (!response.ok) {
 				return response.text().then(text => {
@@ -1695,6 +1717,9 @@ if (data.records) {
 totalAccountRecords = data.pagination?.total || 0;
 totalAccountPages = data.pagination?.total_pages || 1;
 currentAccountPage = data.pagination?.page || 1;
+if (data.pagination?.next_cursor) {
+	accountPageCursors[currentAccountPage + 1] = data.pagination.next_cursor;
+}
 
 // 更新统计信息（兼容不同数据结构）
 if (data.stats) {
@@ -11,6 +11,9 @@ let currentPage = 1;
 let recordsPerPage = 20;
 let totalPages = 1;
 let totalRecords = 0;
+// 已知页码对应的分页游标，排序方式变化时清空
+let recordPageCursors = {};
+let recordSortKey = '';
 
 // 搜索状态变量
 let currentSearchData = null;
@@ -20,6 +23,9 @@ let currentLogPage = 1;
 const logsPerPage = 20;
 let totalLogPages = 1;
 let totalLogs = 0;
+// 已知页码对应的分页游标，筛选条件变化时清空
+let logPageCursors = {};
+let logFilterKey = '';
 
 // 事件统计相关变量
 let currentEventName = '';
@@ -201,11 +207,19 @@ async function loadRecords() {
 		} else {
 			// 如果是普通状态，使用普通API
 			const sortMethod = document.getElementById('searchSortMethod').value;
+			if (sortMethod !== recordSortKey) {
+				recordSortKey = sortMethod;
+				recordPageCursors = {};
+			}
 			const params = new URLSearchParams({
 				page: currentPage,
 				per_page: recordsPerPage,
 				sort_method: sortMethod
 			});
+			// 顺序翻页时带上游标，后端无需 OFFSET 跳过前面的记录
+			if (recordPageCursors[currentPage]) {
+				params.set('cursor', recordPageCursors[currentPage]);
+			}
 			url = `/api/records?${params}`;
 			method = 'GET';
 			body = null;
@@ -227,6 +241,9 @@ async function loadRecords() {
 		const response = await fetch(url, options);
 		if (response.ok) {
 			const data = await response.json();
+			if (!currentSearchData && data.next_cursor) {
+				recordPageCursors[currentPage + 1] = data.next_cursor;
+			}
 			records = data.records || [];
 			totalRecords = data.total || 0;
 			totalPages = data.total_pages || 1;
@@ -1070,7 +1087,7 @@ async function calculateEventStats() {
 			document.getElementById('modalEventTotalAmount').textContent = eventStats.totalAmount.toFixed(2);
 			
 			// 显示相关记录表格
-			renderEventRecordsTable(data.related_records || []);
+			renderEventRecordsTable(data.related_records || [], data.records_count || 0);
 			
 			// 显示结果区域
 			document.getElementById('eventStatsResult').style.display = 'block';
@@ -1090,7 +1107,7 @@ async function calculateEventStats() {
 }
 
 // 渲染事件相关记录表格
-function renderEventRecordsTable(relatedRecords) {
+function renderEventRecordsTable(relatedRecords, recordsCount = 0) {
 	const tbody = document.getElementById('eventRecordsTableBody');
 	tbody.innerHTML = '';
 	
@@ -1121,6 +1138,13 @@ function renderEventRecordsTable(relatedRecords) {
 		`;
 		tbody.appendChild(tr);
 	});
+	
+	// 相关记录分页返回，超出部分只提示数量
+	if (recordsCount > relatedRecords.length) {
+		const tr = document.createElement('tr');
+		tr.innerHTML = `<td colspan="8" class="text-center text-muted">共 ${recordsCount} 条相关记录，仅显示最近 ${relatedRecords.length} 条</td>`;
+		tbody.appendChild(tr);
+	}
 }
 
 // 在仪表板显示事件统计
@@ -1178,6 +1202,10 @@ function openReturnRecordsStatsModal() {
 	modal.show();
 }
 
+// 当前回礼统计查询条件及下一页游标
+let returnRecordsParams = null;
+let returnRecordsNextCursor = null;
+
 // 计算回礼记录统计
 async function calculateReturnRecordsStats() {
 	const startDate = document.getElementById('returnStartDate').value;
@@ -1219,7 +1247,9 @@ async function calculateReturnRecordsStats() {
 				document.getElementById('returnRecordsCount').textContent = data.records_count;
 				document.getElementById('returnTotalAmount').textContent = data.total_amount.toFixed(2);
 				
-				// 渲染记录表格
+				// 渲染记录表格（分页返回，可点击“加载更多”继续加载）
+				returnRecordsParams = params;
+				returnRecordsNextCursor = data.next_cursor;
 				renderReturnRecordsTable(data.records || []);
 				
 				// 显示结果区域
@@ -1242,12 +1272,38 @@ async function calculateReturnRecordsStats() {
 	}
 }
 
+// 加载下一页回礼记录
+async function loadMoreReturnRecords() {
+	if (!returnRecordsParams || !returnRecordsNextCursor) return;
+	
+	const params = new URLSearchParams(returnRecordsParams);
+	params.set('cursor', returnRecordsNextCursor);
+	try {
+		const response = await fetch(`/api/return_records/statistics?${params}`);
+		const data = await response.json();
+		if (response.ok && data.success) {
+			returnRecordsNextCursor = data.next_cursor;
+			renderReturnRecordsTable(data.records || [], true);
+		} else {
+			showAlert(data.message || '加载失败', 'error');
+		}
+	} catch (error) {
+		console.error('加载回礼记录错误:', error);
+		showAlert('加载失败，请检查网络连接', 'error');
+	}
+}
+
 // 渲染回礼记录表格
-function renderReturnRecordsTable(records) {
+function renderReturnRecordsTable(records, append = false) {
 	const tbody = document.getElementById('returnRecordsTableBody');
-	tbody.innerHTML = '';
+	if (append) {
+		const moreRow = document.getElementById('returnRecordsMoreRow');
+		if (moreRow) moreRow.remove();
+	} else {
+		tbody.innerHTML = '';
+	}
 	
-	if (records.length === 0) {
+	if (records.length === 0 && !append) {
 		const tr = document.createElement('tr');
 		tr.innerHTML = `<td colspan="9" class="text-center py-4 text-muted">
 			<div class="empty-state">
@@ -1259,9 +1315,7 @@ function renderReturnRecordsTable(records) {
 		return;
 	}
 	
-	// 按记录日期降序排列
-	records.sort((a, b) => new Date(b.date) - new Date(a.date));
-	
+	// 后端已按记录日期降序排列
 	records.forEach(record => {
 		// 格式化日期
 		const formatDate = (dateStr) => {
@@ -1295,6 +1349,16 @@ function renderReturnRecordsTable(records) {
 		`;
 		tbody.appendChild(tr);
 	});
+	
+	if (returnRecordsNextCursor) {
+		const tr = document.createElement('tr');
+		tr.id = 'returnRecordsMoreRow';
+		tr.innerHTML = `<td colspan="9" class="text-center">
+			<button type="button" class="btn btn-sm btn-outline-primary">加载更多</button>
+		</td>`;
+		tr.querySelector('button').addEventListener('click', loadMoreReturnRecords);
+		tbody.appendChild(tr);
+	}
 }
 
 // 导出回礼统计结果
@@ -1325,60 +1389,36 @@ function exportReturnStats() {
 // 显示统计详情
 async function showStatistics() {
 	try {
-		// 获取所有记录用于统计（不分页）
-		let allRecordsForStats = [];
+		// 统计由后端按当前搜索条件汇总，不再下载全部记录
+		const searchData = currentSearchData ? {
+			record_type: document.getElementById('searchRecordType').value,
+			name: document.getElementById('searchName').value,
+			date: document.getElementById('searchDate').value,
+			completion_status: document.getElementById('searchCompletionStatus').value,
+			owner: document.getElementById('searchOwner').value
+		} : {};
 		
-		if (currentSearchData) {
-			// 如果有搜索条件，使用搜索条件获取所有记录
-			const searchData = {
-				record_type: document.getElementById('searchRecordType').value,
-				name: document.getElementById('searchName').value,
-				date: document.getElementById('searchDate').value,
-				completion_status: document.getElementById('searchCompletionStatus').value,
-				owner: document.getElementById('searchOwner').value,
-				sort_method: document.getElementById('searchSortMethod').value
-			};
-			
-			const response = await fetch('/api/records/search', {
-				method: 'POST',
-				headers: {
-					'Content-Type': 'application/json',
-				},
-				body: JSON.stringify({
-					...searchData,
-					page: 1,
-					per_page: 10000  // 获取大量记录，确保获取所有符合条件的记录
-				})
-			});
-			
-			if (response.ok) {
-				const data = await response.json();
-				allRecordsForStats = data.records || [];
-			}
-		} else {
-			// 如果没有搜索条件，获取所有记录
-			const sortMethod = document.getElementById('searchSortMethod').value;
-			const params = new URLSearchParams({
-				page: 1,
-				per_page: 10000,  // 获取大量记录，确保获取所有记录
-				sort_method: sortMethod
-			});
-			
-			const response = await fetch(`/api/records?${params}`);
-			if (response.ok) {
-				const data = await response.json();
-				allRecordsForStats = data.records || [];
-			}
+		const response = await fetch('/api/records/search/stats', {
+			method: 'POST',
+			headers: {
+				'Content-Type': 'application/json',
+			},
+			body: JSON.stringify(searchData)
+		});
+		const stats = await response.json();
+		if (!response.ok || !stats.success) {
+			showAlert(stats.message || '获取统计信息失败', 'error');
+			return;
 		}
 		
 		// 加载基础统计
-		loadBasicStats(allRecordsForStats);
+		loadBasicStats(stats);
 		
 		// 加载详细分析
-		loadDetailedAnalysis(allRecordsForStats);
+		loadDetailedAnalysis(stats);
 		
 		// 加载人员分析
-		loadPersonAnalysis(allRecordsForStats);
+		loadPersonAnalysis(stats);
 		
 		const modal = new bootstrap.Modal(document.getElementById('statisticsModal'));
 		modal.show();
@@ -1389,41 +1429,28 @@ async function showStatistics() {
 }
 
 // 加载基础统计
-function loadBasicStats(allRecords) {
-	// 使用传入的所有记录进行计算
-	const giftRecords = allRecords.filter(r => r.record_type === "受礼记录");
-	const returnRecords = allRecords.filter(r => r.record_type === "随礼记录");
-	
-	// 按所属人统计
-	const giftRecordsA = giftRecords.filter(r => r.owner === '郭宁' || !r.owner);
-	const returnRecordsA = returnRecords.filter(r => r.owner === '郭宁' || !r.owner);
-	const giftRecordsB = giftRecords.filter(r => r.owner === '李佳慧');
-	const returnRecordsB = returnRecords.filter(r => r.owner === '李佳慧');
+function loadBasicStats(stats) {
+	// 使用后端按所属人、记录类型汇总的结果
+	const emptyTotals = { count: 0, amount: 0, return_amount: 0, returned_count: 0 };
+	const ownerA = stats.owners['郭宁'] || {};
+	const ownerB = stats.owners['李佳慧'] || {};
+	const giftA = ownerA['受礼记录'] || emptyTotals;
+	const returnA = ownerA['随礼记录'] || emptyTotals;
+	const giftB = ownerB['受礼记录'] || emptyTotals;
+	const returnB = ownerB['随礼记录'] || emptyTotals;
 	
 	// 按照新规则计算金额
 	// 郭宁受礼总额 = 郭宁的受礼记录金额 + 郭宁的随礼记录中的回礼金额
-	const totalGiftAmountA = (
-		giftRecordsA.reduce((sum, r) => sum + parseFloat(r.amount), 0) +
-		returnRecordsA.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0)
-	);
+	const totalGiftAmountA = giftA.amount + returnA.return_amount;
 	
 	// 郭宁随礼总额 = 郭宁的受礼记录中的回礼金额 + 郭宁的随礼记录金额
-	const totalReturnAmountA = (
-		giftRecordsA.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0) +
-		returnRecordsA.reduce((sum, r) => sum + parseFloat(r.amount), 0)
-	);
+	const totalReturnAmountA = giftA.return_amount + returnA.amount;
 	
 	// 李佳慧受礼总额 = 李佳慧的受礼记录金额 + 李佳慧的随礼记录中的回礼金额
-	const totalGiftAmountB = (
-		giftRecordsB.reduce((sum, r) => sum + parseFloat(r.amount), 0) +
-		returnRecordsB.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0)
-	);
+	const totalGiftAmountB = giftB.amount + returnB.return_amount;
 	
 	// 李佳慧随礼总额 = 李佳慧的受礼记录中的回礼金额 + 李佳慧的随礼记录金额
-	const totalReturnAmountB = (
-		giftRecordsB.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0) +
-		returnRecordsB.reduce((sum, r) => sum + parseFloat(r.amount), 0)
-	);
+	const totalReturnAmountB = giftB.return_amount + returnB.amount;
 	
 	let statsHTML = `
 		<div class="row">
@@ -1437,7 +1464,7 @@ function loadBasicStats(allRecords) {
 							<div class="col-6">
 								<div class="stats-card">
 									<div class="stats-label">总记录数</div>
-									<div class="stats-number">${giftRecordsA.length}</div>
+									<div class="stats-number">${giftA.count}</div>
 								</div>
 							</div>
 							<div class="col-6">
@@ -1449,8 +1476,8 @@ function loadBasicStats(allRecords) {
 							</div>
 						</div>
 						<div class="mt-3">
-							<p><i class="bi bi-check-circle text-success me-2"></i>已回礼: ${giftRecordsA.filter(r => r.return_amount > 0).length} 条</p>
-							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${giftRecordsA.length > 0 ? (totalGiftAmountA / giftRecordsA.length).toFixed(2) : 0} 元</p>
+							<p><i class="bi bi-check-circle text-success me-2"></i>已回礼: ${giftA.returned_count} 条</p>
+							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${giftA.count > 0 ? (totalGiftAmountA / giftA.count).toFixed(2) : 0} 元</p>
 						</div>
 					</div>
 				</div>
@@ -1465,7 +1492,7 @@ function loadBasicStats(allRecords) {
 							<div class="col-6">
 								<div class="stats-card">
 									<div class="stats-label">总记录数</div>
-									<div class="stats-number">${returnRecordsA.length}</div>
+									<div class="stats-number">${returnA.count}</div>
 								</div>
 							</div>
 							<div class="col-6">
@@ -1477,8 +1504,8 @@ function loadBasicStats(allRecords) {
 							</div>
 						</div>
 						<div class="mt-3">
-							<p><i class="bi bi-check-circle text-success me-2"></i>收到回礼: ${returnRecordsA.filter(r => r.return_amount > 0).length} 条</p>
-							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${returnRecordsA.length > 0 ? (totalReturnAmountA / returnRecordsA.length).toFixed(2) : 0} 元</p>
+							<p><i class="bi bi-check-circle text-success me-2"></i>收到回礼: ${returnA.returned_count} 条</p>
+							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${returnA.count > 0 ? (totalReturnAmountA / returnA.count).toFixed(2) : 0} 元</p>
 						</div>
 					</div>
 				</div>
@@ -1496,7 +1523,7 @@ function loadBasicStats(allRecords) {
 							<div class="col-6">
 								<div class="stats-card">
 									<div class="stats-label">总记录数</div>
-									<div class="stats-number">${giftRecordsB.length}</div>
+									<div class="stats-number">${giftB.count}</div>
 								</div>
 							</div>
 							<div class="col-6">
@@ -1508,8 +1535,8 @@ function loadBasicStats(allRecords) {
 							</div>
 						</div>
 						<div class="mt-3">
-							<p><i class="bi bi-check-circle text-success me-2"></i>已回礼: ${giftRecordsB.filter(r => r.return_amount > 0).length} 条</p>
-							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${giftRecordsB.length > 0 ? (totalGiftAmountB / giftRecordsB.length).toFixed(2) : 0} 元</p>
+							<p><i class="bi bi-check-circle text-success me-2"></i>已回礼: ${giftB.returned_count} 条</p>
+							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${giftB.count > 0 ? (totalGiftAmountB / giftB.count).toFixed(2) : 0} 元</p>
 						</div>
 					</div>
 				</div>
@@ -1524,7 +1551,7 @@ function loadBasicStats(allRecords) {
 							<div class="col-6">
 								<div class="stats-card">
 									<div class="stats-label">总记录数</div>
-									<div class="stats-number">${returnRecordsB.length}</div>
+									<div class="stats-number">${returnB.count}</div>
 								</div>
 							</div>
 							<div class="col-6">
@@ -1536,8 +1563,8 @@ function loadBasicStats(allRecords) {
 							</div>
 						</div>
 						<div class="mt-3">
-							<p><i class="bi bi-check-circle text-success me-2"></i>收到回礼: ${returnRecordsB.filter(r => r.return_amount > 0).length} 条</p>
-							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${returnRecordsB.length > 0 ? (totalReturnAmountB / returnRecordsB.length).toFixed(2) : 0} 元</p>
+							<p><i class="bi bi-check-circle text-success me-2"></i>收到回礼: ${returnB.returned_count} 条</p>
+							<p><i class="bi bi-calculator text-primary me-2"></i>平均金额: ${returnB.count > 0 ? (totalReturnAmountB / returnB.count).toFixed(2) : 0} 元</p>
 						</div>
 					</div>
 				</div>
@@ -1555,13 +1582,13 @@ function loadBasicStats(allRecords) {
 							<div class="col-4">
 								<div class="stats-card">
 									<div class="stats-label">总记录数</div>
-									<div class="stats-number">${allRecords.length}</div>
+									<div class="stats-number">${stats.total_count}</div>
 								</div>
 							</div>
 							<div class="col-4">
 								<div class="stats-card">
 									<div class="stats-label">已完成回礼</div>
-									<div class="stats-number">${allRecords.filter(r => calculateCompletionStatus(r) === "已完成").length}</div>
+									<div class="stats-number">${stats.completed_count}</div>
 								</div>
 							</div>
 							<div class="col-4">
@@ -1588,34 +1615,26 @@ function loadBasicStats(allRecords) {
 }
 
 // 加载详细分析
-function loadDetailedAnalysis(allRecords) {
-	// 金额区间分布分析
-	const amountRanges = [
-		{ min: 0, max: 200, label: '0-200元' },
-		{ min: 201, max: 500, label: '201-500元' },
-		{ min: 501, max: 1000, label: '501-1000元' },
-		{ min: 1001, max: Infinity, label: '1000元以上' }
-	];
+function loadDetailedAnalysis(stats) {
+	const emptyTotals = { count: 0, amount: 0, return_amount: 0, returned_count: 0 };
 	
+	// 金额区间分布分析
 	let amountRangeHTML = '<div class="card mb-4"><div class="card-header"><h6><i class="bi bi-cash-coin me-2"></i>金额区间分布</h6></div><div class="card-body"><div class="row">';
-	amountRanges.forEach(range => {
-		const giftRecords = allRecords.filter(r => r.record_type === "受礼记录" && r.amount >= range.min && r.amount <= range.max);
-		const returnRecords = allRecords.filter(r => r.record_type === "随礼记录" && r.amount >= range.min && r.amount <= range.max);
+	stats.amount_ranges.forEach(range => {
+		const gift = range['受礼记录'];
+		const ret = range['随礼记录'];
 		
-		const giftTotal = giftRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-		const returnTotal = returnRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-		
-		const percentage = allRecords.length > 0 ? ((giftRecords.length + returnRecords.length) / allRecords.length * 100).toFixed(1) : 0;
+		const percentage = stats.total_count > 0 ? ((gift.count + ret.count) / stats.total_count * 100).toFixed(1) : 0;
 		
 		amountRangeHTML += `
 			<div class="col-md-3">
 				<div class="stats-card">
 					<div class="stats-label">${range.label}</div>
-					<div class="stats-number">${giftRecords.length + returnRecords.length}</div>
+					<div class="stats-number">${gift.count + ret.count}</div>
 					<div class="stats-label">${percentage}% 占比</div>
 					<div class="mt-2">
-						<small class="text-muted">受礼: ${giftRecords.length}条 (${giftTotal.toFixed(2)}元)</small><br>
-						<small class="text-muted">随礼: ${returnRecords.length}条 (${returnTotal.toFixed(2)}元)</small>
+						<small class="text-muted">受礼: ${gift.count}条 (${gift.amount.toFixed(2)}元)</small><br>
+						<small class="text-muted">随礼: ${ret.count}条 (${ret.amount.toFixed(2)}元)</small>
 					</div>
 				</div>
 			</div>
@@ -1629,14 +1648,9 @@ function loadDetailedAnalysis(allRecords) {
 	
 	let yearTrendHTML = '<div class="card mb-4"><div class="card-header"><h6><i class="bi bi-calendar-range me-2"></i>年度趋势分析</h6></div><div class="card-body"><div class="row">';
 	years.forEach(year => {
-		const yearGiftRecords = allRecords.filter(r => r.record_type === "受礼记录" && new Date(r.date).getFullYear() === year);
-		const yearReturnRecords = allRecords.filter(r => r.record_type === "随礼记录" && new Date(r.date).getFullYear() === year);
-		
-		const giftTotal = yearGiftRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-		const returnTotal = yearReturnRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-		
-		const returnAmount = yearGiftRecords.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0);
-		const receivedReturn = yearReturnRecords.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0);
+		const yearData = stats.years[year] || {};
+		const yearGift = yearData['受礼记录'] || emptyTotals;
+		const yearReturn = yearData['随礼记录'] || emptyTotals;
 		
 		yearTrendHTML += `
 			<div class="col-md-4">
@@ -1649,21 +1663,21 @@ function loadDetailedAnalysis(allRecords) {
 							<div class="col-6">
 								<div class="text-center mb-3">
 									<div class="text-success fw-bold">受礼</div>
-									<div class="h5">${yearGiftRecords.length}</div>
-									<div class="text-muted small">${giftTotal.toFixed(2)}元</div>
+									<div class="h5">${yearGift.count}</div>
+									<div class="text-muted small">${yearGift.amount.toFixed(2)}元</div>
 								</div>
 							</div>
 							<div class="col-6">
 								<div class="text-center mb-3">
 									<div class="text-warning fw-bold">随礼</div>
-									<div class="h5">${yearReturnRecords.length}</div>
-									<div class="text-muted small">${returnTotal.toFixed(2)}元</div>
+									<div class="h5">${yearReturn.count}</div>
+									<div class="text-muted small">${yearReturn.amount.toFixed(2)}元</div>
 								</div>
 							</div>
 						</div>
 						<div class="mt-2">
-							<small class="text-muted">回礼: ${returnAmount.toFixed(2)}元</small><br>
-							<small class="text-muted">收到回礼: ${receivedReturn.toFixed(2)}元</small>
+							<small class="text-muted">回礼: ${yearGift.return_amount.toFixed(2)}元</small><br>
+							<small class="text-muted">收到回礼: ${yearReturn.return_amount.toFixed(2)}元</small>
 						</div>
 					</div>
 				</div>
@@ -1686,171 +1700,71 @@ function loadDetailedAnalysis(allRecords) {
 	
 	let monthAnalysisHTML = '<div class="card mb-4"><div class="card-header"><h6><i class="bi bi-calendar-month me-2"></i>最近12个月活动分析</h6></div><div class="card-body"><div class="table-responsive"><table class="table table-sm"><thead><tr><th>月份</th><th>受礼</th><th>随礼</th><th>回礼</th><th>收到回礼</th></tr></thead><tbody>';
 	months.forEach(monthData => {
-		const monthGiftRecords = allRecords.filter(r => {
-			const recordDate = new Date(r.date);
-			return r.record_type === "受礼记录" && 
-				   recordDate.getFullYear() === monthData.year && 
-				   recordDate.getMonth() + 1 === monthData.month;
-		});
+		const monthStats = stats.months[monthData.label] || {};
+		const monthGift = monthStats['受礼记录'] || emptyTotals;
+		const monthReturn = monthStats['随礼记录'] || emptyTotals;
 		
-		const monthReturnRecords = allRecords.filter(r => {
-			const recordDate = new Date(r.date);
-			return r.record_type === "随礼记录" && 
-				   recordDate.getFullYear() === monthData.year && 
-				   recordDate.getMonth() + 1 === monthData.month;
-		});
-		
-		if (monthGiftRecords.length > 0 || monthReturnRecords.length > 0) {
-			const giftTotal = monthGiftRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-			const returnTotal = monthReturnRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-			
-			const returnAmount = monthGiftRecords.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0);
-			const receivedReturn = monthReturnRecords.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0);
-			
+		if (monthGift.count > 0 || monthReturn.count > 0) {
 			monthAnalysisHTML += `
 				<tr>
 					<td>${monthData.label}</td>
-					<td>${monthGiftRecords.length} (${giftTotal.toFixed(2)}元)</td>
-					<td>${monthReturnRecords.length} (${returnTotal.toFixed(2)}元)</td>
-					<td>${returnAmount.toFixed(2)}元</td>
-					<td>${receivedReturn.toFixed(2)}元</td>
+					<td>${monthGift.count} (${monthGift.amount.toFixed(2)}元)</td>
+					<td>${monthReturn.count} (${monthReturn.amount.toFixed(2)}元)</td>
+					<td>${monthGift.return_amount.toFixed(2)}元</td>
+					<td>${monthReturn.return_amount.toFixed(2)}元</td>
 				</tr>
 			`;
 		}
 	});
 	monthAnalysisHTML += '</tbody></table></div></div></div>';
 	
-	// 人员往来分析（按总金额前10名）
-	const personMap = {};
-	allRecords.forEach(record => {
-		if (!personMap[record.name]) {
-			personMap[record.name] = {
-				name: record.name,
-				giftCount: 0,
-				giftAmount: 0,
-				returnCount: 0,
-				returnAmount: 0,
-				occasions: new Set(),
-				returnGiven: 0,
-				returnReceived: 0
-			};
-		}
-		
-		const person = personMap[record.name];
-		person.occasions.add(record.occasion);
-		
-		if (record.record_type === "受礼记录") {
-			person.giftCount++;
-			person.giftAmount += parseFloat(record.amount);
-			person.returnGiven += parseFloat(record.return_amount || 0);
-		} else {
-			person.returnCount++;
-			person.returnAmount += parseFloat(record.amount);
-			person.returnReceived += parseFloat(record.return_amount || 0);
-		}
-	});
-	
-	const sortedPersons = Object.values(personMap)
-		.sort((a, b) => (b.giftAmount + b.returnAmount) - (a.giftAmount + a.returnAmount))
-		.slice(0, 10);
+	// 人员往来分析（按总金额前10名，后端已排序）
+	const sortedPersons = stats.persons.slice(0, 10);
 	
 	let personAnalysisHTML = '<div class="card mb-4"><div class="card-header"><h6><i class="bi bi-people me-2"></i>人员往来分析（按总金额前10名）</h6></div><div class="card-body"><div class="table-responsive"><table class="table table-sm"><thead><tr><th>排名</th><th>姓名</th><th>往来次数</th><th>场合数</th><th>受礼金额</th><th>随礼金额</th><th>回礼</th><th>收到回礼</th><th>净收支</th></tr></thead><tbody>';
 	sortedPersons.forEach((person, index) => {
-		const totalInteractions = person.giftCount + person.returnCount;
-		const netAmount = (person.giftAmount + person.returnReceived) - (person.returnAmount + person.returnGiven);
+		const netAmount = person.net_amount;
 		const netClass = netAmount >= 0 ? 'text-success' : 'text-danger';
 		
 		personAnalysisHTML += `
 			<tr>
 				<td>${index + 1}</td>
 				<td><strong>${person.name}</strong></td>
-				<td>${totalInteractions}</td>
-				<td>${person.occasions.size}</td>
-				<td>${person.giftAmount.toFixed(2)}</td>
-				<td>${person.returnAmount.toFixed(2)}</td>
-				<td>${person.returnGiven.toFixed(2)}</td>
-				<td>${person.returnReceived.toFixed(2)}</td>
+				<td>${person.total_interactions}</td>
+				<td>${person.occasion_count}</td>
+				<td>${person.gift_amount.toFixed(2)}</td>
+				<td>${person.return_amount.toFixed(2)}</td>
+				<td>${person.return_given.toFixed(2)}</td>
+				<td>${person.return_received.toFixed(2)}</td>
 				<td class="${netClass}"><strong>${netAmount >= 0 ? '+' : ''}${netAmount.toFixed(2)}</strong></td>
 			</tr>
 		`;
 	});
 	personAnalysisHTML += '</tbody></table></div></div></div>';
 	
-	// 事件分析
-	const giftOccasions = {};
-	const returnOccasions = {};
-	
-	allRecords.forEach(record => {
-		if (record.record_type === "受礼记录") {
-			if (!giftOccasions[record.occasion]) {
-				giftOccasions[record.occasion] = {
-					count: 0,
-					totalAmount: 0,
-					people: new Set(),
-					returnCount: 0
-				};
-			}
-			giftOccasions[record.occasion].count++;
-			giftOccasions[record.occasion].totalAmount += parseFloat(record.amount);
-			giftOccasions[record.occasion].people.add(record.name);
-			if (record.return_amount > 0) giftOccasions[record.occasion].returnCount++;
-		} else {
-			if (!returnOccasions[record.occasion]) {
-				returnOccasions[record.occasion] = {
-					count: 0,
-					totalAmount: 0,
-					people: new Set(),
-					returnCount: 0
-				};
-			}
-			returnOccasions[record.occasion].count++;
-			returnOccasions[record.occasion].totalAmount += parseFloat(record.amount);
-			returnOccasions[record.occasion].people.add(record.name);
-			if (record.return_amount > 0) returnOccasions[record.occasion].returnCount++;
-		}
-	});
-	
-	// 按金额排序
-	const sortedGiftOccasions = Object.entries(giftOccasions)
-		.sort(([, a], [, b]) => b.totalAmount - a.totalAmount)
-		.slice(0, 10);
-	
-	const sortedReturnOccasions = Object.entries(returnOccasions)
-		.sort(([, a], [, b]) => b.totalAmount - a.totalAmount)
-		.slice(0, 10);
-	
+	// 事件分析（后端已按金额排序并取前10）
 	let occasionHTML = '<div class="row"><div class="col-md-6"><div class="card mb-4"><div class="card-header"><h6><i class="bi bi-gift me-2"></i>热门受礼事件（前10）</h6></div><div class="card-body"><div class="table-responsive"><table class="table table-sm"><thead><tr><th>事件</th><th>次数</th><th>人数</th><th>总金额</th><th>回礼率</th></tr></thead><tbody>';
-	sortedGiftOccasions.forEach(([occasion, data]) => {
-		const avgAmount = data.totalAmount / data.count;
-		const returnRate = (data.returnCount / data.count * 100).toFixed(1);
-		occasionHTML += `<tr><td>${occasion}</td><td>${data.count}</td><td>${data.people.size}</td><td>${data.totalAmount.toFixed(2)}元</td><td>${returnRate}%</td></tr>`;
+	stats.occasions['受礼记录'].forEach(data => {
+		const returnRate = (data.returned_count / data.count * 100).toFixed(1);
+		occasionHTML += `<tr><td>${data.occasion}</td><td>${data.count}</td><td>${data.people}</td><td>${data.total_amount.toFixed(2)}元</td><td>${returnRate}%</td></tr>`;
 	});
 	occasionHTML += '</tbody></table></div></div></div></div><div class="col-md-6"><div class="card mb-4"><div class="card-header"><h6><i class="bi bi-arrow-return-right me-2"></i>热门随礼事件（前10）</h6></div><div class="card-body"><div class="table-responsive"><table class="table table-sm"><thead><tr><th>事件</th><th>次数</th><th>人数</th><th>总金额</th><th>回礼率</th></tr></thead><tbody>';
-	sortedReturnOccasions.forEach(([occasion, data]) => {
-		const avgAmount = data.totalAmount / data.count;
-		const returnRate = (data.returnCount / data.count * 100).toFixed(1);
-		occasionHTML += `<tr><td>${occasion}</td><td>${data.count}</td><td>${data.people.size}</td><td>${data.totalAmount.toFixed(2)}元</td><td>${returnRate}%</td></tr>`;
+	stats.occasions['随礼记录'].forEach(data => {
+		const returnRate = (data.returned_count / data.count * 100).toFixed(1);
+		occasionHTML += `<tr><td>${data.occasion}</td><td>${data.count}</td><td>${data.people}</td><td>${data.total_amount.toFixed(2)}元</td><td>${returnRate}%</td></tr>`;
 	});
 	occasionHTML += '</tbody></table></div></div></div></div></div>';
 	
-	// 未完成往来明细
-	const incompleteRecords = allRecords
-		.filter(record => {
-			const status = calculateCompletionStatus(record);
-			return status === "仅受礼" || status === "仅随礼";
-		})
-		.sort((a, b) => parseFloat(b.amount) - parseFloat(a.amount))
-		.slice(0, 10);
-	
+	// 未完成往来明细（后端按金额取前10）
 	let incompleteHTML = '<div class="card mb-4"><div class="card-header"><h6><i class="bi bi-clock-history me-2"></i>未完成往来明细（金额前10名）</h6></div><div class="card-body"><div class="table-responsive"><table class="table table-sm"><thead><tr><th>姓名</th><th>事件</th><th>金额</th><th>状态</th><th>日期</th><th>天数</th></tr></thead><tbody>';
-	incompleteRecords.forEach((record, index) => {
-		const status = calculateCompletionStatus(record);
+	stats.incomplete_records.forEach(record => {
+		const status = record.completion_status;
 		const recordDate = new Date(record.date);
 		const today = new Date();
 		const daysAgo = Math.floor((today - recordDate) / (1000 * 60 * 60 * 24));
 		const statusColor = status === "仅受礼" ? "text-primary" : "text-warning";
 		
-		incompleteHTML += `<tr><td>${record.name}</td><td>${record.occasion}</td><td>${parseFloat(record.amount).toFixed(2)}元</td><td class="${statusColor}">${status}</td><td>${record.date}</td><td>${daysAgo}天前</td></tr>`;
+		incompleteHTML += `<tr><td>${record.name}</td><td>${record.occasion}</td><td>${record.amount.toFixed(2)}元</td><td class="${statusColor}">${status}</td><td>${record.date}</td><td>${daysAgo}天前</td></tr>`;
 	});
 	incompleteHTML += '</tbody></table></div></div></div>';
 	
@@ -1868,56 +1782,20 @@ function loadDetailedAnalysis(allRecords) {
 }
 
 // 加载人员分析
-function loadPersonAnalysis(allRecords) {
-	const personMap = {};
-	
-	// 统计每个人的所有往来记录
-	allRecords.forEach(record => {
-		if (!personMap[record.name]) {
-			personMap[record.name] = {
-				name: record.name,
-				giftRecords: [],
-				returnRecords: [],
-				occasions: new Set()
-			};
-		}
-		
-		const person = personMap[record.name];
-		person.occasions.add(record.occasion);
-		
-		if (record.record_type === "受礼记录") {
-			person.giftRecords.push(record);
-		} else {
-			person.returnRecords.push(record);
-		}
-	});
-	
-	// 计算每个人的统计信息
-	const personStats = Object.values(personMap).map(person => {
-		const giftTotal = person.giftRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-		const returnTotal = person.returnRecords.reduce((sum, r) => sum + parseFloat(r.amount), 0);
-		const returnGiven = person.giftRecords.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0);
-		const returnReceived = person.returnRecords.reduce((sum, r) => sum + parseFloat(r.return_amount || 0), 0);
-		
-		// 净收支计算：
-		const netAmount = (giftTotal + returnReceived) - (returnTotal + returnGiven);
-		
-		return {
-			name: person.name,
-			totalInteractions: person.giftRecords.length + person.returnRecords.length,
-			occasionCount: person.occasions.size,
-			giftCount: person.giftRecords.length,
-			giftAmount: giftTotal,
-			returnCount: person.returnRecords.length,
-			returnAmount: returnTotal,
-			returnGiven: returnGiven,
-			returnReceived: returnReceived,
-			netAmount: netAmount
-		};
-	});
-	
-	// 按总往来金额排序
-	personStats.sort((a, b) => (b.giftAmount + b.returnAmount) - (a.giftAmount + a.returnAmount));
+function loadPersonAnalysis(stats) {
+	// 后端已按往来总金额排序
+	const personStats = stats.persons.map(person => ({
+		name: person.name,
+		totalInteractions: person.total_interactions,
+		occasionCount: person.occasion_count,
+		giftCount: person.gift_count,
+		giftAmount: person.gift_amount,
+		returnCount: person.return_count,
+		returnAmount: person.return_amount,
+		returnGiven: person.return_given,
+		returnReceived: person.return_received,
+		netAmount: person.net_amount
+	}));
 	
 	let personHTML = '<div class="card"><div class="card-header"><h6><i class="bi bi-person-lines-fill me-2"></i>人员详细分析</h6></div><div class="card-body"><div class="table-responsive"><table class="table table-sm table-hover"><thead><tr><th>姓名</th><th>往来次数</th><th>场合数</th><th>受礼次数</th><th>受礼金额</th><th>随礼次数</th><th>随礼金额</th><th>回礼金额</th><th>收到回礼</th><th class="text-end">净收支</th></tr></thead><tbody>';
 	
@@ -1962,6 +1840,12 @@ async function loadSystemLogs() {
 	const dateRange = document.getElementById('logDateRange').value;
 	const keyword = document.getElementById('logKeyword').value;
 
+	const filterKey = JSON.stringify([operationType, dateRange, keyword]);
+	if (filterKey !== logFilterKey) {
+		logFilterKey = filterKey;
+		logPageCursors = {};
+	}
+
 	try {
 		const params = new URLSearchParams({
 			page: currentLogPage,
@@ -1970,10 +1854,17 @@ async function loadSystemLogs() {
 			date_range: dateRange,
 			keyword: keyword
 		});
+		// 顺序翻页时带上游标，后端无需 OFFSET 跳过前面的记录
+		if (logPageCursors[currentLogPage]) {
+			params.set('cursor', logPageCursors[currentLogPage]);
+		}
 
 		const response = await fetch(`/api/logs?${params}`);
 		if (response.ok) {
 			const data = await response.json();
+			if (data.next_cursor) {
+				logPageCursors[currentLogPage + 1] = data.next_cursor;
+			}
 			renderSystemLogs(data.logs);
 			updateLogsPagination(data);
 			updateLogsStats(data);
@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 测试使用临时 SQLite 库，必须在导入 app 之前设置
+_db_dir = tempfile.mkdtemp()
+os.environ['STORAGE_BACKEND'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(_db_dir, 'test.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    assert app_module.init_database()
+    app_module.app.config['TESTING'] = True
+    return app_module
+
+
+@pytest.fixture
+def client(app):
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess['logged_in'] = True
+        sess['username'] = 'admin'
+    return client
+
+
+def query(app, sql, params=()):
+    connection = app.create_connection()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        connection.close()
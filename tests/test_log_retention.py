@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import query
+
+
+def insert_log(app, created_at):
+    connection = app.create_connection()
+    cursor = connection.cursor()
+    cursor.execute("""
+        INSERT INTO system_logs (operation_type, operation_details, user_name, created_at)
+        VALUES (%s, %s, %s, %s)
+    """, ('系统操作', '保留测试', 'test', created_at))
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def test_purge_with_zero_days_is_not_the_default(app):
+    insert_log(app, datetime.now() - timedelta(hours=1))
+
+    app.purge_expired_logs(retention_days=0)
+
+    assert query(app, "SELECT id FROM system_logs WHERE operation_details = %s", ('保留测试',)) == []
+
+
+def test_purge_rejects_negative_days(app):
+    with pytest.raises(ValueError):
+        app.purge_expired_logs(retention_days=-1)
+
+
+def test_purge_command_rejects_negative_days(app):
+    result = app.app.test_cli_runner().invoke(args=['purge-logs', '--days', '-1'])
+    assert result.exit_code != 0
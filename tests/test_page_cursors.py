@@ -0,0 +1,43 @@
+import base64
+import json
+
+import pytest
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii')
+
+
+MALFORMED = [
+    'not-base64!',
+    raw_cursor([]),
+    raw_cursor(['2024-01-01 00:00:00']),
+    raw_cursor(['2024-01-01 00:00:00', [1]]),
+    raw_cursor(['2024-01-01 00:00:00', True]),
+    raw_cursor({'created_at': '2024-01-01'}),
+]
+
+
+@pytest.mark.parametrize('cursor', MALFORMED)
+def test_decode_page_cursor_rejects_malformed(app, cursor):
+    with pytest.raises(ValueError):
+        app.decode_page_cursor(cursor, 2)
+
+
+def test_decode_page_cursor_checks_arity(app):
+    with pytest.raises(ValueError):
+        app.decode_page_cursor(raw_cursor(['2024-01-01', 1, 2]), 2)
+
+
+def test_decode_page_cursor_round_trip(app):
+    cursor = app.encode_page_cursor('2024-01-01', 7)
+    assert app.decode_page_cursor(cursor, 2) == ['2024-01-01', 7]
+
+
+@pytest.mark.parametrize('path', ['/api/logs', '/api/records', '/api/account/records',
+                                  '/api/return_records/statistics?start_date=2024-01-01&end_date=2024-12-31'])
+@pytest.mark.parametrize('cursor', MALFORMED)
+def test_malformed_cursor_is_a_bad_request(client, path, cursor):
+    separator = '&' if '?' in path else '?'
+    response = client.get(f'{path}{separator}cursor={cursor}')
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+import pytest
+
+from test_write_transactions import gift_payload
+
+
+@pytest.fixture
+def gift_records(client):
+    for i in range(3):
+        client.post('/api/records', json=gift_payload(f'分页测试{i}'))
+
+
+@pytest.mark.parametrize('args, expected', [
+    ({}, (1, 20)),
+    ({'page': '0', 'per_page': '0'}, (1, 1)),
+    ({'page': '-3', 'per_page': '-5'}, (1, 1)),
+    ({'page': 'abc', 'per_page': 'x'}, (1, 20)),
+    ({'page': '2', 'per_page': '1000000'}, (2, 10000)),
+])
+def test_get_page_args_clamps(app, args, expected):
+    with app.app.test_request_context(query_string=args):
+        assert app.get_page_args() == expected
+    assert app.get_page_args(args) == expected
+
+
+@pytest.mark.parametrize('url', [
+    '/api/records?page=1&per_page=0',
+    '/api/records?page=-1&per_page=-1',
+    '/api/logs?page=0&per_page=0',
+    '/api/account/records?page=-2&per_page=0',
+])
+def test_list_routes_accept_edge_page_values(client, gift_records, url):
+    response = client.get(url)
+    assert response.status_code == 200
+
+
+def test_search_accepts_edge_page_values(client, gift_records):
+    response = client.post('/api/records/search', json={'name': '分页测试', 'page': 0, 'per_page': 0})
+    assert response.status_code == 200
+    assert len(response.get_json()['records']) == 1
+
+
+@pytest.mark.parametrize('query', ['page=1&per_page=0', 'page=-1&per_page=-1'])
+def test_event_statistics_accepts_edge_page_values(client, gift_records, query):
+    response = client.get(f'/api/event_statistics?event_name=婚礼&{query}')
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+
+
+@pytest.mark.parametrize('query', ['page=1&per_page=0', 'page=-1&per_page=-1'])
+def test_person_ledger_accepts_edge_page_values(client, gift_records, query):
+    response = client.get(f'/api/person_ledger?name=分页测试0&{query}')
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
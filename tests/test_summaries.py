@@ -0,0 +1,71 @@
+from mysql.connector import Error
+
+from conftest import query
+from test_write_transactions import gift_payload
+
+
+def summary_mismatches(app, rebuild):
+    connection = app.create_connection()
+    try:
+        cursor = connection.cursor()
+        mismatched = rebuild(cursor, repair=False)
+        cursor.close()
+        return mismatched
+    finally:
+        connection.close()
+
+
+def test_gift_summary_matches_records_after_failed_update(app, client, monkeypatch):
+    client.post('/api/records', json=gift_payload('汇总测试', amount=300))
+    record_id = query(app, "SELECT id FROM gift_records WHERE name = %s", ('汇总测试',))[0]['id']
+
+    apply_delta = app.apply_gift_summary_delta
+
+    def fail_on_add(cursor, row, sign):
+        # 原记录已移出汇总，计入新值前失败
+        if sign > 0:
+            raise Error(msg='injected failure')
+        apply_delta(cursor, row, sign)
+    monkeypatch.setattr(app, 'apply_gift_summary_delta', fail_on_add)
+
+    response = client.put(f'/api/records/{record_id}', json=gift_payload('汇总测试', amount=900, owner='李佳慧'))
+
+    assert response.get_json()['success'] is False
+    assert query(app, "SELECT amount, owner FROM gift_records WHERE id = %s", (record_id,)) == [
+        {'amount': 300, 'owner': '郭宁'}]
+    assert summary_mismatches(app, app.rebuild_gift_summary) == []
+
+
+def test_summary_check_repairs_drifted_summary(app, client):
+    client.post('/api/records', json=gift_payload('核对测试'))
+    connection = app.create_connection()
+    cursor = connection.cursor()
+    cursor.execute("UPDATE gift_summary SET record_count = record_count + 5")
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+    checked = client.get('/api/debug/summary_check').get_json()
+    assert checked['consistent'] is False
+    assert checked['mismatched']['gift_summary']
+
+    repaired = client.post('/api/debug/summary_check').get_json()
+    assert repaired['repaired'] is True
+    assert client.get('/api/debug/summary_check').get_json()['consistent'] is True
+
+
+def test_person_summary_matches_records_after_failed_rename(app, client, monkeypatch):
+    client.post('/api/records', json=gift_payload('台账测试'))
+    record_id = query(app, "SELECT id FROM gift_records WHERE name = %s", ('台账测试',))[0]['id']
+
+    def fail_after_update(cursor, record_id, name):
+        raise Error(msg='injected failure')
+    monkeypatch.setattr(app, 'update_name_index', fail_after_update)
+
+    client.put(f'/api/records/{record_id}', json=gift_payload('台账改名'))
+
+    assert query(app, "SELECT person_key FROM gift_records WHERE id = %s", (record_id,)) == [
+        {'person_key': '台账测试'}]
+    assert query(app, "SELECT person_key FROM gift_person_summary WHERE person_key = %s AND gift_count <> 0",
+                 ('台账改名',)) == []
+    assert summary_mismatches(app, app.rebuild_gift_person_summary) == []
@@ -0,0 +1,39 @@
+from mysql.connector import Error
+
+from conftest import query
+
+
+def gift_payload(name, **overrides):
+    payload = {
+        'record_type': '受礼记录', 'name': name, 'amount': 200, 'occasion': '婚礼',
+        'date': '2024-05-01', 'return_amount': 0, 'return_occasion': '', 'return_date': '',
+        'remark': '', 'owner': '郭宁'
+    }
+    payload.update(overrides)
+    return payload
+
+
+def fail_after_insert(monkeypatch, app):
+    def register_occasions(cursor, *occasions):
+        raise Error(msg='injected failure')
+    monkeypatch.setattr(app, 'register_occasions', register_occasions)
+
+
+def test_failed_gift_save_persists_nothing(app, client, monkeypatch):
+    fail_after_insert(monkeypatch, app)
+
+    response = client.post('/api/records', json=gift_payload('失败测试'))
+
+    assert response.get_json()['success'] is False
+    assert query(app, "SELECT id FROM gift_records WHERE name = %s", ('失败测试',)) == []
+    assert query(app, "SELECT record_id FROM gift_name_index WHERE record_id NOT IN (SELECT id FROM gift_records)") == []
+
+
+def test_failed_write_does_not_discard_other_writes(app, client, monkeypatch):
+    assert client.post('/api/records', json=gift_payload('成功测试')).get_json()['success'] is True
+    fail_after_insert(monkeypatch, app)
+    client.post('/api/records', json=gift_payload('失败测试2'))
+
+    names = {row['name'] for row in query(app, "SELECT name FROM gift_records")}
+    assert '成功测试' in names
+    assert '失败测试2' not in names